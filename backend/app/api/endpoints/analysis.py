@@ -4,12 +4,16 @@ Analysis API endpoints for paper concept extraction and clarification
 
 import uuid
 from typing import Dict, Any
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
 from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
 
-from ...models.paper import ConceptResponse, Concept
+from ...core.tracing import tracer
+from ...models.paper import ConceptResponse, Concept, Paper
 from ...services.gemini_service import GeminiService
+from ...services.paper_events import STATE_CONCEPTS_READY, STATE_FAILED, publish_state
+from ...services.paper_index import paper_changed
+from ...utils.etag import check_etag, make_etag
 from .upload import papers_db  # Import shared papers database
 
 router = APIRouter()
@@ -43,6 +47,13 @@ async def analyze_paper(paper_id: str) -> Dict[str, Any]:
             detail="Paper content not available. Upload may still be processing.",
         )
 
+    with tracer.span("paper.analyze", paper_id=paper_id) as span:
+        result = await run_paper_analysis(paper)
+        span.set_attribute("concepts", len(paper.concepts))
+    return result
+
+
+async def run_paper_analysis(paper: Paper) -> Dict[str, Any]:
     try:
         # Analyze paper with Gemini (this will also extract concepts)
         print(f"Starting analysis for paper: {paper.title}")
@@ -100,6 +111,10 @@ async def analyze_paper(paper_id: str) -> Dict[str, Any]:
         paper.insights = analysis_result["insights"]
         paper.methodology = analysis_result["methodology"]
         paper.full_analysis = analysis_result["full_analysis"]
+        paper_changed(paper)
+        await publish_state(
+            paper, STATE_CONCEPTS_READY, concepts_count=len(paper.concepts)
+        )
 
         print(f"Analysis completed for paper: {paper.title}")
 
@@ -110,12 +125,17 @@ async def analyze_paper(paper_id: str) -> Dict[str, Any]:
         }
 
     except Exception as e:
-        print(f"Analysis failed for paper {paper_id}: {e}")
+        print(f"Analysis failed for paper {paper.id}: {e}")
+        # The paper may be half updated; clients must not keep a stale copy
+        paper_changed(paper)
+        await publish_state(paper, STATE_FAILED, stage="analysis", error=str(e))
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
 
 @router.get("/papers/{paper_id}/concepts")
-async def get_paper_concepts(paper_id: str) -> ConceptResponse:
+async def get_paper_concepts(
+    paper_id: str, request: Request, response: Response
+) -> ConceptResponse:
     """
     Get extracted concepts for a paper
     """
@@ -123,6 +143,11 @@ async def get_paper_concepts(paper_id: str) -> ConceptResponse:
         raise HTTPException(status_code=404, detail="Paper not found")
 
     paper = papers_db[paper_id]
+    not_modified = check_etag(
+        request, response, make_etag(paper_id, paper.revision, "concepts")
+    )
+    if not_modified:
+        return not_modified
 
     return ConceptResponse(concepts=paper.concepts, total_count=len(paper.concepts))
 
@@ -142,6 +167,7 @@ async def delete_concept(paper_id: str, concept_id: str) -> Dict[str, str]:
     if len(paper.concepts) == initial_concept_count:
         raise HTTPException(status_code=404, detail="Concept not found")
 
+    paper_changed(paper)
     print(f"Deleted concept {concept_id} from paper {paper_id}")
     return {"message": "Concept deleted successfully"}
 
@@ -175,7 +201,9 @@ async def clarify_text(paper_id: str, request: ClarifyRequest) -> Dict[str, str]
 
 
 @router.get("/papers/{paper_id}/insights")
-async def get_paper_insights(paper_id: str) -> Dict[str, Any]:
+async def get_paper_insights(
+    paper_id: str, request: Request, response: Response
+) -> Dict[str, Any]:
     """
     Get key insights from paper analysis
     """
@@ -183,6 +211,11 @@ async def get_paper_insights(paper_id: str) -> Dict[str, Any]:
         raise HTTPException(status_code=404, detail="Paper not found")
 
     paper = papers_db[paper_id]
+    not_modified = check_etag(
+        request, response, make_etag(paper_id, paper.revision, "insights")
+    )
+    if not_modified:
+        return not_modified
 
     return {
         "paper_id": paper_id,
@@ -260,6 +293,10 @@ async def extract_concepts(paper_id: str) -> ConceptResponse:
                 concept_type=concept_data.get("concept_type", "conceptual"),
             )
             paper.concepts.append(concept)
+        paper_changed(paper)
+        await publish_state(
+            paper, STATE_CONCEPTS_READY, concepts_count=len(paper.concepts)
+        )
 
         print(
             f"Concepts refreshed for paper: {paper.title} ({len(paper.concepts)} valid concepts)"
@@ -269,6 +306,8 @@ async def extract_concepts(paper_id: str) -> ConceptResponse:
 
     except Exception as e:
         print(f"Concept extraction failed: {e}")
+        paper_changed(paper)
+        await publish_state(paper, STATE_FAILED, stage="analysis", error=str(e))
         raise HTTPException(
             status_code=500, detail=f"Concept extraction failed: {str(e)}"
         )
@@ -315,6 +354,10 @@ async def generate_additional_concept(paper_id: str) -> Dict[str, Any]:
 
             # Add to existing concepts (don't replace)
             paper.concepts.append(new_concept)
+            paper_changed(paper)
+            await publish_state(
+                paper, STATE_CONCEPTS_READY, concepts_count=len(paper.concepts)
+            )
 
             print(f"Generated additional concept: '{new_concept.name}'")
 
@@ -373,7 +416,9 @@ async def get_code_implementation(
 
 
 @router.get("/papers/{paper_id}/summary")
-async def get_paper_summary(paper_id: str) -> Dict[str, Any]:
+async def get_paper_summary(
+    paper_id: str, request: Request, response: Response
+) -> Dict[str, Any]:
     """
     Get a comprehensive summary of the paper analysis
     """
@@ -381,6 +426,11 @@ async def get_paper_summary(paper_id: str) -> Dict[str, Any]:
         raise HTTPException(status_code=404, detail="Paper not found")
 
     paper = papers_db[paper_id]
+    not_modified = check_etag(
+        request, response, make_etag(paper_id, paper.revision, "summary")
+    )
+    if not_modified:
+        return not_modified
 
     # Calculate concept importance distribution
     importance_distribution = {
@@ -0,0 +1,58 @@
+"""
+Server-push event stream for a paper (Server-Sent Events)
+"""
+
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+
+from ...core.config import settings
+from ...services.paper_events import snapshot_event
+from ...services.paper_index import paper_index
+from .upload import papers_db
+
+# Set by main.py, like video.manager
+manager = None
+
+router = APIRouter()
+
+
+def paper_snapshot(paper_id: str) -> Optional[str]:
+    """Snapshot event for a paper, or None if it does not exist"""
+    paper = papers_db.get(paper_id)
+    status = paper_index.status(paper_id)
+    if paper is None or status is None:
+        return None
+    return snapshot_event(paper, status)
+
+
+@router.get("/papers/{paper_id}/events")
+async def stream_paper_events(paper_id: str) -> StreamingResponse:
+    """
+    Stream a snapshot of the paper followed by its state events and log
+    lines, one JSON object per SSE `data:` line.
+    """
+    snapshot = paper_snapshot(paper_id)
+    if snapshot is None or manager is None:
+        raise HTTPException(status_code=404, detail="Paper not found")
+
+    subscriber = manager.subscribe(paper_id, snapshot)
+
+    async def event_stream():
+        try:
+            while not subscriber.closed:
+                messages = await subscriber.drain(settings.SSE_KEEPALIVE_SECONDS)
+                if not messages:
+                    # Comment line keeps proxies from closing an idle stream
+                    yield ": keepalive\n\n"
+                    continue
+                yield "".join(f"data: {message}\n\n" for message in messages)
+        finally:
+            manager.disconnect(paper_id, subscriber)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,24 @@
+"""
+Immutable, content-addressed media URLs (videos and PDFs)
+"""
+
+from fastapi import APIRouter, HTTPException, Request
+
+from ...services.media_store import media_registry, media_response
+from ...services.storage_manager import storage_manager
+
+router = APIRouter()
+
+
+@router.get("/media/{digest}/{file_name}")
+async def serve_media(digest: str, file_name: str, request: Request):
+    """
+    Serve a registered file. The URL changes whenever the content does, so
+    responses can be cached forever.
+    """
+    path = media_registry.resolve(digest)
+    if path is None or not path.endswith("/" + file_name):
+        raise HTTPException(status_code=404, detail="Media not found")
+
+    storage_manager.touch(path)
+    return media_response(request, path, digest)
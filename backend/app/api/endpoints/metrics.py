@@ -0,0 +1,18 @@
+"""
+Prometheus scrape endpoint
+"""
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from ...core.metrics import registry
+
+router = APIRouter()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics() -> PlainTextResponse:
+    """All process metrics in the Prometheus text exposition format"""
+    return PlainTextResponse(registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -4,14 +4,38 @@ Upload API endpoints for PDF file handling
 
 import os
 import uuid
-from typing import Dict, Any
-from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks
-from fastapi.responses import FileResponse
+from typing import Dict, Any, Optional
+from fastapi import (
+    APIRouter,
+    UploadFile,
+    File,
+    HTTPException,
+    BackgroundTasks,
+    Query,
+    Request,
+    Response,
+)
 
 from ...core.config import settings
-from ...models.paper import Paper, PaperResponse, AnalysisStatus
+from ...core.metrics import upload_bytes_total, uploads_total
+from ...core.tracing import SpanContext, tracer
+from ...models.paper import Paper, AnalysisStatus
 from ...services.pdf_parser import PDFParser
 from ...services.gemini_service import GeminiService
+from ...services.media_store import (
+    REVALIDATE_CACHE_CONTROL,
+    media_registry,
+    media_response,
+)
+from ...services.paper_events import (
+    STATE_FAILED,
+    STATE_METADATA_READY,
+    STATE_PARSED,
+    publish_state,
+)
+from ...services.paper_index import paper_index, paper_changed, paper_removed
+from ...services.storage_manager import storage_manager
+from ...utils.etag import check_etag, make_etag
 
 router = APIRouter()
 
@@ -32,9 +56,11 @@ async def upload_pdf(
     """
     # Validate file
     if not file.filename.endswith(".pdf"):
+        uploads_total.inc(outcome="rejected")
         raise HTTPException(status_code=400, detail="Only PDF files are allowed")
 
     if not file.size or file.size > settings.MAX_FILE_SIZE:
+        uploads_total.inc(outcome="rejected")
         raise HTTPException(
             status_code=400,
             detail=f"File size must be less than {settings.MAX_FILE_SIZE} bytes",
@@ -44,20 +70,26 @@ async def upload_pdf(
         # Generate unique filename
         paper_id = str(uuid.uuid4())
         filename = f"{paper_id}_{file.filename}"
-        file_path = os.path.join(settings.UPLOAD_DIR, filename)
+        file_path = os.path.join(storage_manager.upload_dir, filename)
 
         # Save file
-        content = await file.read()
-        with open(file_path, "wb") as f:
-            f.write(content)
+        with tracer.span("upload.write", filename=file.filename) as write_span:
+            content = await file.read()
+            with open(file_path, "wb") as f:
+                f.write(content)
+            write_span.set_attributes(paper_id=paper_id, bytes=len(content))
 
         # Create paper record
         paper = Paper.create_new(filename=file.filename, file_path=file_path)
         paper.id = paper_id
         papers_db[paper_id] = paper
+        storage_manager.track(paper_id, file_path)
+        paper_changed(paper)
 
-        # Start background processing
-        background_tasks.add_task(process_paper, paper_id)
+        # Start background processing, in the same trace as the upload
+        background_tasks.add_task(process_paper, paper_id, write_span.context)
+        uploads_total.inc(outcome="success")
+        upload_bytes_total.inc(len(content))
 
         return {
             "message": "File uploaded successfully",
@@ -67,64 +99,95 @@ async def upload_pdf(
         }
 
     except Exception as e:
+        uploads_total.inc(outcome="error")
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
 
 @router.get("/papers")
-async def list_papers() -> Dict[str, Any]:
+async def list_papers(
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    analysis_status: Optional[str] = None,
+    video_status: Optional[str] = None,
+) -> Dict[str, Any]:
     """
-    List all uploaded papers
+    List uploaded papers, oldest first. Pass next_cursor back as `cursor`
+    to fetch the following page.
     """
-    paper_responses = []
-    for paper in papers_db.values():
-        paper_responses.append(
-            PaperResponse(
-                id=paper.id,
-                title=paper.title or paper.filename,
-                authors=paper.authors,
-                abstract=paper.abstract,
-                analysis_status=paper.analysis_status.value,
-                video_status=paper.video_status.value,
-                upload_time=paper.upload_time,
-                concepts_count=len(paper.concepts),
-                has_video=bool(paper.video_path),
-            )
+    etag = make_etag(
+        "papers", paper_index.version, cursor, limit, analysis_status, video_status
+    )
+    not_modified = check_etag(request, response, etag)
+    if not_modified:
+        return not_modified
+
+    try:
+        papers, next_cursor = paper_index.page(
+            cursor, limit, analysis_status, video_status
         )
+    except KeyError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
-    return {"papers": paper_responses, "total": len(paper_responses)}
+    return {
+        "papers": papers,
+        "total": paper_index.count(analysis_status, video_status),
+        "next_cursor": next_cursor,
+    }
 
 
 @router.get("/papers/{paper_id}")
-async def get_paper(paper_id: str) -> Paper:
+async def get_paper(
+    paper_id: str, request: Request, response: Response, fields: Optional[str] = None
+) -> Any:
     """
-    Get specific paper details
+    Get specific paper details. `fields` is an optional comma-separated list
+    of top-level fields to return instead of the whole paper.
     """
     if paper_id not in papers_db:
         raise HTTPException(status_code=404, detail="Paper not found")
 
-    return papers_db[paper_id]
+    paper = papers_db[paper_id]
+    not_modified = check_etag(
+        request, response, make_etag(paper_id, paper.revision, fields or "")
+    )
+    if not_modified:
+        return not_modified
+
+    if not fields:
+        return paper
+
+    selected = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = selected - set(Paper.model_fields)
+    if unknown:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}"
+        )
+    return paper.model_dump(mode="json", include=selected)
 
 
 @router.get("/papers/{paper_id}/status")
-async def get_paper_status(paper_id: str) -> Dict[str, Any]:
+async def get_paper_status(
+    paper_id: str, request: Request, response: Response
+) -> Dict[str, Any]:
     """
     Get paper processing status
     """
-    if paper_id not in papers_db:
+    status = paper_index.status(paper_id)
+    if status is None:
         raise HTTPException(status_code=404, detail="Paper not found")
 
-    paper = papers_db[paper_id]
-    return {
-        "paper_id": paper_id,
-        "analysis_status": paper.analysis_status.value,
-        "video_status": paper.video_status.value,
-        "concepts_count": len(paper.concepts),
-        "has_content": bool(paper.content),
-        "has_video": bool(paper.video_path),
-    }
+    not_modified = check_etag(
+        request, response, make_etag(paper_id, status["revision"], "status")
+    )
+    if not_modified:
+        return not_modified
+
+    return status
 
 
-async def process_paper(paper_id: str):
+async def process_paper(paper_id: str, trace_parent: Optional[SpanContext] = None):
     """
     Background task to process uploaded paper
     """
@@ -132,18 +195,38 @@ async def process_paper(paper_id: str):
         return
 
     paper = papers_db[paper_id]
+    with tracer.span("paper.process", parent=trace_parent, paper_id=paper_id) as span:
+        await run_paper_processing(paper)
+        span.set_attribute("analysis_status", paper.analysis_status.value)
+
+
+async def run_paper_processing(paper: Paper):
+    paper_id = paper.id
 
     try:
         paper.analysis_status = AnalysisStatus.PROCESSING
+        paper_changed(paper)
 
         print(f"Parsing PDF for paper {paper_id}")
-        parse_result = await pdf_parser.parse_pdf(paper.file_path)
+        with tracer.span("pdf.parse") as parse_span:
+            parse_result = await pdf_parser.parse_pdf(paper.file_path)
+            parse_span.set_attributes(
+                pages=parse_result["page_count"], chars=len(parse_result["content"])
+            )
+            if not parse_result["success"]:
+                parse_span.record_error(parse_result.get("error"))
 
         if not parse_result["success"]:
             paper.analysis_status = AnalysisStatus.FAILED
+            paper_changed(paper)
+            await publish_state(
+                paper, STATE_FAILED, stage="parsing", error=parse_result.get("error")
+            )
             return
 
         paper.content = parse_result["content"]
+        paper_changed(paper)
+        await publish_state(paper, STATE_PARSED)
 
         ai_metadata = await gemini_service.extract_paper_metadata_with_gemini(
             paper.content
@@ -156,15 +239,21 @@ async def process_paper(paper_id: str):
         paper.abstract = ai_metadata.get("abstract") or parse_result["abstract"]
 
         paper.analysis_status = AnalysisStatus.COMPLETED
+        paper_changed(paper)
+        await publish_state(
+            paper, STATE_METADATA_READY, title=paper.title, authors=paper.authors
+        )
         print(f"Paper processing completed: {paper.title}")
 
     except Exception as e:
         print(f"Error processing paper {paper_id}: {e}")
         paper.analysis_status = AnalysisStatus.FAILED
+        paper_changed(paper)
+        await publish_state(paper, STATE_FAILED, stage="processing", error=str(e))
 
 
 @router.get("/papers/{paper_id}/pdf")
-async def serve_pdf(paper_id: str):
+async def serve_pdf(paper_id: str, request: Request):
     """
     Serve PDF file for embedded viewing
     """
@@ -176,13 +265,17 @@ async def serve_pdf(paper_id: str):
     if not os.path.exists(paper.file_path):
         raise HTTPException(status_code=404, detail="PDF file not found")
 
-    return FileResponse(
-        path=paper.file_path,
+    # This URL is per paper, not per content, so clients revalidate with the
+    # digest as ETag (a 304 when unchanged); only the /api/media digest URL
+    # is immutable. Range requests get 206
+    digest = await media_registry.digest_for(paper.file_path)
+    return media_response(
+        request,
+        paper.file_path,
+        digest,
         media_type="application/pdf",
-        headers={
-            "Content-Disposition": f"inline; filename={paper.filename}",
-            "Cache-Control": "public, max-age=3600",
-        },
+        cache_control=REVALIDATE_CACHE_CONTROL,
+        headers={"Content-Disposition": f"inline; filename={paper.filename}"},
     )
 
 
@@ -197,16 +290,21 @@ async def delete_paper(paper_id: str) -> Dict[str, str]:
     paper = papers_db[paper_id]
 
     try:
-        # Delete file
-        if os.path.exists(paper.file_path):
-            os.remove(paper.file_path)
+        # PDF, clip directories, stitched videos, streams and job logs
+        await storage_manager.delete_paper(paper)
 
-        # Delete video files if they exist
+        # Delete legacy video file if it exists
         if paper.video_path and os.path.exists(paper.video_path):
             os.remove(paper.video_path)
 
+        from . import video  # imports this module, so resolve it lazily
+
+        if video.manager:
+            video.manager.forget(paper_id)
+
         # Remove from database
         del papers_db[paper_id]
+        paper_removed(paper_id)
 
         return {"message": "Paper deleted successfully"}
 
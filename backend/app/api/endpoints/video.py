@@ -1,34 +1,97 @@
 import os
 import asyncio
 import json
-from typing import Dict, Any, List, Optional
+import signal
+from collections import deque
+from typing import Dict, Any, List, Optional, Callable, Awaitable
 from datetime import datetime
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Request, Response
+from fastapi.responses import FileResponse
 from pydantic import BaseModel
 from pathlib import Path
 
 from ...models.paper import Concept, VideoStatus, ConceptVideo
 from ...core.config import settings
+from ...core.metrics import (
+    clip_seconds,
+    clips_total,
+    llm_calls_per_clip,
+    render_attempts_per_clip,
+    stitch_seconds,
+    tex_cache_lookups_total,
+    video_jobs_active,
+    video_jobs_total,
+)
+from ...core.tracing import current_traceparent, tracer
+from ...services.agent_protocol import (
+    EVENT_CLIP_READY,
+    EVENT_DEBUG,
+    EVENT_ERROR,
+    EVENT_METRICS,
+    EVENT_PROGRESS,
+    EVENT_RENDER,
+    EVENT_RENDER_CANCEL,
+    EVENT_RESULT,
+    EVENT_SPAN,
+    REPLY_RENDER_RESULT,
+    ProgressForwarder,
+    decode_event,
+    drain_stream,
+    encode_event,
+)
+from ...services.event_bus import event_bus
+from ...services.job_logs import job_logs
+from ...services.manim_generator import manim_generator, render_budget
+from ...services.media_store import media_registry
+from ...services.render_limits import RENDER_CANCELLED, RenderBudget
+from ...services.paper_events import (
+    STATE_CLIP_READY,
+    STATE_FAILED,
+    STATE_VIDEO_READY,
+    publish_state,
+)
+from ...services.paper_index import paper_changed
+from ...services.storage_manager import storage_manager
+from ...services.video_stitcher import stitch_clips
+from ...services.video_stream import ClipPlaylist, stream_dir_for, stream_url
+from ...utils.etag import check_etag, make_etag
 from .upload import papers_db
 
+# This process's ConnectionManager, set by main.py. Producers publish to the
+# event bus; the manager receives events through its bus subscription.
 manager = None
 
 router = APIRouter()
 
+# Longest single event line accepted from the agent (debug output is truncated)
+AGENT_LINE_LIMIT = 4 * 1024 * 1024
+AGENT_STDERR_TAIL_LINES = 200
+
+# Per concept: set when its running job (including the quality upgrade) has
+# finished, and the upgrade task while one is pending. A regenerate cancels
+# the upgrade and waits for the old job before reusing its paths.
+job_done: Dict[str, asyncio.Event] = {}
+pending_upgrades: Dict[str, asyncio.Task] = {}
+
 
 class GenerateVideoRequest(BaseModel):
     concept_id: str = ""
 
 
 async def run_agent_script(
-    paper_id: str, concept_name: str, concept_description: str, output_dir: str
+    paper_id: str,
+    concept_name: str,
+    concept_description: str,
+    output_dir: str,
+    quality: str = settings.MANIM_QUALITY,
+    on_clip: Optional[Callable[[str], Awaitable[None]]] = None,
 ) -> Dict[str, Any]:
     project_root = Path(__file__).resolve().parents[4]
     agent_script_path = project_root / "backend/run_agent.py"
     python_executable = project_root / "backend/agent_env/bin/python"
     api_key = settings.GEMINI_API_KEY
 
-    if not api_key:
+    if not api_key and settings.llm_needs_api_key:
         return {
             "success": False,
             "error": "GEMINI_API_KEY not found in backend environment.",
@@ -41,68 +104,234 @@ async def run_agent_script(
         concept_description,
         output_dir,
         api_key,
+        quality,
     ]
 
     process = await asyncio.create_subprocess_exec(
         *cmd,
+        stdin=asyncio.subprocess.PIPE,
         stdout=asyncio.subprocess.PIPE,
         stderr=asyncio.subprocess.PIPE,
+        limit=AGENT_LINE_LIMIT,
+        env={
+            **os.environ,
+            **render_budget().to_env(),
+            "MANIM_FINAL_QUALITY": settings.MANIM_QUALITY,
+            "AGENT_SPECULATIVE_CANDIDATES": str(settings.AGENT_SPECULATIVE_CANDIDATES),
+            "AGENT_MAX_LLM_CALLS": str(settings.AGENT_MAX_LLM_CALLS),
+            "AGENT_BATCH_GENERATION": "1" if settings.AGENT_BATCH_GENERATION else "0",
+            "AGENT_DEBUG": "1" if settings.AGENT_DEBUG else "0",
+            "AGENT_DEBUG_MAX_CHARS": str(settings.AGENT_DEBUG_MAX_CHARS),
+            "AGENT_LLM_MODEL": settings.AGENT_LLM_MODEL,
+            "LLM_PROVIDER": settings.LLM_PROVIDER,
+            "LLM_CASSETTE_DIR": os.path.abspath(settings.LLM_CASSETTE_DIR),
+            "LLM_SYNTHETIC_LATENCY": str(settings.LLM_SYNTHETIC_LATENCY),
+            "TEX_CACHE_DIR": (
+                manim_generator.tex_cache.root if manim_generator.tex_cache else ""
+            ),
+            "TEX_CACHE_MB": str(settings.MANIM_TEX_CACHE_MB),
+            # The agent's renders run on this process's warm pool
+            "AGENT_RENDER_SERVER": "1" if manim_generator.render_pool else "0",
+            # The agent parents its spans here and reports them as span events
+            "TRACEPARENT": current_traceparent() if tracer.enabled else "",
+        },
     )
 
+    async def send_progress(message: str):
+        await event_bus.publish(
+            paper_id, json.dumps({"type": "log", "message": message})
+        )
+
+    # Progress goes through a bounded buffer so a slow bus never stalls the
+    # reader, and stderr is drained concurrently so the child can't block on it
+    forwarder = ProgressForwarder(send_progress)
+    forwarder.start()
+    stderr_tail = deque(maxlen=AGENT_STDERR_TAIL_LINES)
+    stderr_task = asyncio.create_task(drain_stream(process.stderr, stderr_tail))
+
     final_result = None
     successful_clips = []
+    metrics = []
+    # Agent renders in flight on the pool, by request id
+    renders: Dict[int, asyncio.Task] = {}
 
-    async for line in process.stdout:
-        decoded_line = line.decode("utf-8").strip()
-
-        if decoded_line.startswith("LOG: "):
-            log_message = decoded_line[5:]
-            if manager:
-                await manager.send_log(
-                    paper_id, json.dumps({"type": "log", "message": log_message})
+    try:
+        async for line in process.stdout:
+            event = decode_event(line)
+            if event is None:
+                continue
+            event_type = event.get("type")
+
+            if event_type in (EVENT_PROGRESS, EVENT_ERROR):
+                forwarder.put(str(event.get("message", "")))
+            elif event_type == EVENT_DEBUG:
+                # Verbose agent diagnostics stay in the server log
+                print(f"[agent {paper_id}] {event.get('message', '')}")
+            elif event_type == EVENT_CLIP_READY:
+                clip_path = event["path"]
+                successful_clips.append(clip_path)
+                if on_clip:
+                    await on_clip(clip_path)
+            elif event_type == EVENT_METRICS:
+                metrics.append(event)
+                record_clip_metrics(event)
+            elif event_type == EVENT_SPAN and isinstance(event.get("span"), dict):
+                tracer.export(event["span"])
+            elif event_type == EVENT_RENDER:
+                renders[event["id"]] = asyncio.create_task(
+                    serve_agent_render(process, event, renders)
                 )
-        elif decoded_line.startswith("CLIP_SUCCESS: "):
-            clip_path = decoded_line[14:]
-            successful_clips.append(clip_path)
-        elif decoded_line.startswith("FINAL_RESULT: "):
-            result_json = decoded_line[14:]
-            try:
-                final_result = json.loads(result_json)
-            except json.JSONDecodeError:
+            elif event_type == EVENT_RENDER_CANCEL:
+                render = renders.get(event.get("id"))
+                if render:
+                    render.cancel()
+            elif event_type == EVENT_RESULT:
                 final_result = {
-                    "success": False,
-                    "error": "Failed to decode agent's final result.",
+                    "success": bool(event.get("success")),
+                    "error": event.get("error"),
                 }
 
-    await process.wait()
+        await process.wait()
+        await stderr_task
+    finally:
+        for render in list(renders.values()):
+            render.cancel()
+        if renders:
+            await asyncio.wait(list(renders.values()))
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+        stderr_task.cancel()
+        await forwarder.close()
+
+    if forwarder.dropped:
+        print(f"Dropped {forwarder.dropped} agent progress messages for {paper_id}")
 
     if final_result:
         final_result["clip_paths"] = successful_clips
+        final_result["metrics"] = metrics
         return final_result
 
-    stderr_output = await process.stderr.read()
-    if stderr_output:
-        error_message = (
-            f"Agent crashed without a final result. STDERR:\n{stderr_output.decode()}"
+    if stderr_tail:
+        error_message = "Agent crashed without a final result. STDERR:\n" + "\n".join(
+            stderr_tail
         )
-        if manager:
-            await manager.send_log(
-                paper_id, json.dumps({"type": "log", "message": error_message})
-            )
+        await send_progress(error_message)
         return {
             "success": False,
             "error": error_message,
             "clip_paths": successful_clips,
+            "metrics": metrics,
         }
 
     return {
         "success": False,
         "error": "Agent finished without providing a result.",
         "clip_paths": successful_clips,
+        "metrics": metrics,
     }
 
 
+async def serve_agent_render(
+    process: asyncio.subprocess.Process,
+    event: Dict[str, Any],
+    renders: Dict[int, asyncio.Task],
+):
+    """
+    Run one render the agent asked for on the warm pool and reply on its
+    stdin. A null result (no warm worker) makes the agent render cold.
+    """
+    pool = manim_generator.render_pool
+    try:
+        result = (
+            await pool.render_async(
+                event["args"],
+                RenderBudget.from_env(event.get("budget") or {}),
+                event.get("niceness", 0),
+            )
+            if pool
+            else None
+        )
+    except asyncio.CancelledError:
+        # The agent cancelled it (another candidate won) or the job ended
+        result = (-signal.SIGKILL, "", "", RENDER_CANCELLED)
+    finally:
+        renders.pop(event["id"], None)
+
+    reply = encode_event(REPLY_RENDER_RESULT, id=event["id"], result=result)
+    try:
+        process.stdin.write(reply.encode("utf-8") + b"\n")
+        await process.stdin.drain()
+    except (BrokenPipeError, ConnectionResetError):
+        pass
+
+
+def record_clip_metrics(event: Dict[str, Any]):
+    """Fold one agent metrics event (one clip) into the process metrics"""
+    clips_total.inc(stage="preview", outcome="success" if event.get("success") else "failure")
+    render_attempts_per_clip.observe(event.get("render_attempts", 0))
+    llm_calls_per_clip.observe(event.get("llm_calls", 0))
+    clip_seconds.observe(event.get("seconds", 0.0))
+    tex_cache_lookups_total.inc(event.get("tex_cache_hits", 0), result="hit")
+    tex_cache_lookups_total.inc(event.get("tex_cache_misses", 0), result="miss")
+
+
+async def traced_stitch(
+    file_prefix: str, clip_paths: List[str], videos_dir: str
+) -> Dict[str, Any]:
+    with tracer.span("video.stitch", clips=len(clip_paths)) as span:
+        stitch_result = await stitch_clips(file_prefix, clip_paths, videos_dir)
+        span.set_attributes(
+            path=stitch_result["path"],
+            transcoded=stitch_result["transcoded"],
+            duration=stitch_result["duration"],
+        )
+        if stitch_result["success"]:
+            stitch_seconds.observe(stitch_result["seconds"], path=stitch_result["path"])
+        else:
+            span.record_error(stitch_result["error"])
+        return stitch_result
+
+
+def record_stitch_result(concept_video: ConceptVideo, stitch_result: Dict[str, Any]):
+    concept_video.stitch_path = stitch_result["path"]
+    concept_video.stitch_seconds = stitch_result["seconds"]
+    concept_video.duration = stitch_result["duration"]
+    concept_video.bit_rate = stitch_result["bit_rate"]
+    concept_video.keyframes = stitch_result["keyframes"]
+
+
 async def generate_video_background(paper_id: str, concept_id: str, concept: Concept):
+    prefix = storage_manager.concept_prefix(paper_id, concept_id)
+    previous = job_done.get(prefix)
+    if previous:
+        await previous.wait()
+    done = job_done[prefix] = asyncio.Event()
+
+    # Active jobs are never evicted or swept while they write to disk
+    storage_manager.job_started(paper_id, concept_id)
+    video_jobs_active.inc()
+    try:
+        with tracer.span("video.job", paper_id=paper_id, concept_id=concept_id):
+            await run_video_job(paper_id, concept_id, concept)
+    finally:
+        video_jobs_active.dec()
+        paper = papers_db.get(paper_id)
+        concept_video = paper.concept_videos.get(concept_id) if paper else None
+        video_jobs_total.inc(
+            outcome=concept_video.status.value if concept_video else "deleted"
+        )
+        job_log = job_logs.get(prefix)
+        if job_log:
+            job_log.close()
+        storage_manager.job_finished(paper_id, concept_id)
+        await storage_manager.enforce_quota(papers_db)
+        done.set()
+        if job_done.get(prefix) is done:
+            del job_done[prefix]
+
+
+async def run_video_job(paper_id: str, concept_id: str, concept: Concept):
     paper = papers_db.get(paper_id)
     if not paper:
         return
@@ -110,105 +339,213 @@ async def generate_video_background(paper_id: str, concept_id: str, concept: Con
     if not concept_video:
         return
 
+    job_log = job_logs.open(f"{paper_id}_{concept_id}")
+
     async def log(message: str):
         print(message)
-        log_entry = f"[{datetime.now().strftime('%H:%M:%S')}] {message}"
-        concept_video.logs.append(log_entry)
-        if manager:
-            await manager.send_log(
-                paper_id, json.dumps({"type": "log", "message": log_entry})
-            )
+        log_entry = job_log.append(message)
+        await event_bus.publish(
+            paper_id, json.dumps({"type": "log", "message": log_entry})
+        )
+
+    async def mark_failed(error: str):
+        concept_video.status = VideoStatus.FAILED
+        await storage_manager.remove_intermediates(paper, concept_id)
+        paper_changed(paper)
+        await publish_state(
+            paper, STATE_FAILED, stage="video", concept_id=concept_id, error=error
+        )
+
+    async def mark_ready():
+        await publish_state(
+            paper,
+            STATE_VIDEO_READY,
+            concept_id=concept_id,
+            video_path=concept_video.video_path,
+            quality=concept_video.quality,
+            is_preview=concept_video.is_preview,
+        )
 
     try:
         await log("Handing off to agent for video generation...")
 
-        project_root = Path(__file__).resolve().parents[4]
-        clips_dir = project_root / "backend/clips"
-        videos_dir = project_root / "backend/videos"
-
-        output_dir = clips_dir / f"{paper_id}_{concept_id}"
+        videos_dir = storage_manager.videos_dir
+        file_prefix = storage_manager.concept_prefix(paper_id, concept_id)
+        output_dir = Path(storage_manager.clip_dir(paper_id, concept_id))
         os.makedirs(output_dir, exist_ok=True)
+        for path in storage_manager.concept_artifacts(paper_id, concept_id):
+            storage_manager.track(paper_id, path)
+
+        # Publish each clip to a growing HLS playlist as soon as it renders
+        playlist = ClipPlaylist(stream_dir_for(str(videos_dir), file_prefix))
+
+        async def publish_clip(clip_path: str):
+            concept_video.clips_paths.append(clip_path)
+            paper_changed(paper)
+            try:
+                published = await playlist.add_clip(clip_path)
+            except Exception as e:
+                # Streaming is best-effort; the stitched video is still produced
+                print(f"Could not publish clip to stream: {e}")
+                published = False
+            if published:
+                if not concept_video.stream_path:
+                    concept_video.stream_path = stream_url(file_prefix)
+                    paper_changed(paper)
+                    await log(f"Streaming started: {concept_video.stream_path}")
+                await log(f"Clip {len(playlist.clips)} is ready to play.")
+            await publish_state(
+                paper,
+                STATE_CLIP_READY,
+                concept_id=concept_id,
+                clip_index=len(concept_video.clips_paths) - 1,
+                stream_path=concept_video.stream_path,
+            )
 
-        result = await run_agent_script(
-            paper_id, concept.name, concept.description, str(output_dir)
+        progressive = (
+            settings.PROGRESSIVE_RENDERING
+            and settings.MANIM_PREVIEW_QUALITY != settings.MANIM_QUALITY
+        )
+        render_quality = (
+            settings.MANIM_PREVIEW_QUALITY if progressive else settings.MANIM_QUALITY
         )
 
+        with tracer.span("agent.run", quality=render_quality) as agent_span:
+            result = await run_agent_script(
+                paper_id,
+                concept.name,
+                concept.description,
+                str(output_dir),
+                render_quality,
+                on_clip=publish_clip,
+            )
+            agent_span.set_attribute("clips", len(result.get("clip_paths", [])))
+            if not result.get("success"):
+                agent_span.record_error(result.get("error") or "agent failed")
+        await playlist.finish()
+
         clip_paths = result.get("clip_paths", [])
 
         if not clip_paths:
             await log("Agent did not produce any successful video clips.")
-            concept_video.status = VideoStatus.FAILED
+            await mark_failed(result.get("error") or "No clips were rendered")
             return
 
         await log(
             "Agent finished. Stitching " + str(len(clip_paths)) + " successful clips..."
         )
 
-        final_video_path = await stitch_clips_simple(
-            f"{paper_id}_{concept_id}", clip_paths, str(videos_dir)
-        )
+        stitch_result = await traced_stitch(file_prefix, clip_paths, str(videos_dir))
+        record_stitch_result(concept_video, stitch_result)
+        final_video_path = stitch_result["output_path"]
 
-        if final_video_path:
-            file_name = os.path.basename(final_video_path)
-            accessible_path = f"/api/videos/{file_name}"
+        if stitch_result["success"]:
+            await log(
+                f"Stitched via {stitch_result['path']} in {stitch_result['seconds']}s "
+                f"({stitch_result['transcoded']} clips transcoded)."
+            )
+            accessible_path = await media_registry.register(final_video_path)
             await log(f"Video successfully stitched: {accessible_path}")
             concept_video.video_path = accessible_path
+            concept_video.quality = render_quality
+            concept_video.is_preview = progressive
             concept_video.status = VideoStatus.COMPLETED
+            # Rendered clips are now in the stitched video and the stream;
+            # only the scene sources are kept for the quality upgrade
+            await storage_manager.remove_intermediates(paper, concept_id)
+            paper_changed(paper)
+            await mark_ready()
         else:
-            await log("Stitching failed.")
-            concept_video.status = VideoStatus.FAILED
+            await log(f"Stitching failed: {stitch_result['error']}")
+            await mark_failed(stitch_result["error"])
+            return
 
     except Exception as e:
         await log(f"An unexpected error occurred: {e}")
-        concept_video.status = VideoStatus.FAILED
-
-
-async def stitch_clips_simple(
-    file_prefix: str, clip_paths: List[str], videos_dir: str
-) -> Optional[str]:
-    if not clip_paths:
-        return None
-
-    os.makedirs(videos_dir, exist_ok=True)
-
-    output_path = os.path.join(videos_dir, f"{file_prefix}_final.mp4")
-    concat_file_path = os.path.join(videos_dir, f"{file_prefix}_concat.txt")
-
-    with open(concat_file_path, "w", encoding="utf-8") as f:
-        for path in clip_paths:
-            # The agent now returns verified, absolute paths. No modification needed.
-            safe_path = str(path).replace("\\", "/").replace("'", "'\\''")
-            f.write(f"file '{safe_path}'\n")
-
-    cmd = [
-        "ffmpeg",
-        "-y",
-        "-f",
-        "concat",
-        "-safe",
-        "0",
-        "-i",
-        concat_file_path,
-        "-c",
-        "copy",
-        output_path,
-    ]
-
-    process = await asyncio.create_subprocess_exec(
-        *cmd,
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE,
-    )
-    stdout, stderr = await process.communicate()
+        await mark_failed(str(e))
+        return
 
-    if process.returncode != 0:
-        print("--- FFMPEG STITCHING FAILED ---")
-        print(f"STDOUT:\n{stdout.decode()}")
-        print(f"STDERR:\n{stderr.decode()}")
-        return None
+    if progressive:
+        with tracer.span("video.upgrade", quality=settings.MANIM_QUALITY) as upgrade_span:
+            upgrade = asyncio.create_task(
+                upgrade_video_quality(
+                    concept_video, str(output_dir), clip_paths, final_video_path, log
+                )
+            )
+            pending_upgrades[file_prefix] = upgrade
+            try:
+                # Waits without propagating the upgrade's own cancellation
+                await asyncio.wait({upgrade})
+            finally:
+                if pending_upgrades.get(file_prefix) is upgrade:
+                    del pending_upgrades[file_prefix]
+            upgraded = not upgrade.cancelled() and upgrade.result()
+            upgrade_span.set_attributes(
+                upgraded=upgraded, superseded=upgrade.cancelled()
+            )
+        # The upgrade's clips are in the swapped video; drop them either way
+        await storage_manager.remove_intermediates(paper, concept_id)
+        paper_changed(paper)
+        if upgraded:
+            await mark_ready()
+
+
+async def upgrade_video_quality(
+    concept_video: ConceptVideo,
+    output_dir: str,
+    clip_paths: List[str],
+    final_video_path: str,
+    log,
+) -> bool:
+    """
+    Re-render the validated preview clips at settings.MANIM_QUALITY and swap
+    the stitched result over the preview file. The preview stays published
+    if any part of the upgrade fails.
+    """
+    try:
+        await log(f"Upgrading video to {settings.MANIM_QUALITY} in the background...")
+
+        hd_clip_paths = []
+        for clip_path in clip_paths:
+            clip_stem = Path(clip_path).stem
+            source_path = Path(output_dir) / f"{clip_stem}.py"
+            if not source_path.exists():
+                await log(f"Upgrade skipped: no source kept for {clip_stem}.")
+                return False
+
+            hd_path = await manim_generator.generate_manim_video(
+                source_path.read_text(encoding="utf-8"),
+                clip_name=f"{clip_stem}_{settings.MANIM_QUALITY}",
+                quality=settings.MANIM_QUALITY,
+                output_dir=output_dir,
+                niceness=settings.UPGRADE_RENDER_NICENESS,
+            )
+            clips_total.inc(stage="upgrade", outcome="success" if hd_path else "failure")
+            if not hd_path:
+                await log(f"Upgrade failed while rendering {clip_stem}; keeping preview.")
+                return False
+            hd_clip_paths.append(hd_path)
+
+        videos_dir = os.path.dirname(final_video_path)
+        file_prefix = Path(final_video_path).stem[: -len("_final")] + "_upgrade"
+        stitch_result = await traced_stitch(file_prefix, hd_clip_paths, videos_dir)
+        if not stitch_result["success"]:
+            await log(f"Upgrade stitching failed; keeping preview: {stitch_result['error']}")
+            return False
+
+        # Atomic swap: readers see either the whole preview or the whole upgrade
+        os.replace(stitch_result["output_path"], final_video_path)
+        # New content, new URL: clients never see a stale cached preview
+        concept_video.video_path = await media_registry.register(final_video_path)
+        record_stitch_result(concept_video, stitch_result)
+        concept_video.quality = settings.MANIM_QUALITY
+        concept_video.is_preview = False
+        await log(f"Video upgraded to {settings.MANIM_QUALITY}.")
+        return True
 
-    os.remove(concat_file_path)
-    return output_path
+    except Exception as e:
+        await log(f"Video upgrade failed, keeping preview: {e}")
+        return False
 
 
 @router.post("/papers/{paper_id}/concepts/{concept_id}/generate-video")
@@ -232,12 +569,18 @@ async def generate_video_for_concept(
             status_code=400, detail="A video is already being generated for this paper."
         )
 
+    # The previous video's quality upgrade would overwrite the new one
+    upgrade = pending_upgrades.get(storage_manager.concept_prefix(paper_id, concept_id))
+    if upgrade and not upgrade.done():
+        upgrade.cancel()
+
     paper.concept_videos[concept_id] = ConceptVideo(
         concept_id=concept_id,
         concept_name=concept.name,
         status=VideoStatus.GENERATING,
         created_at=datetime.now(),
     )
+    paper_changed(paper)
 
     background_tasks.add_task(
         generate_video_background,
@@ -250,7 +593,17 @@ async def generate_video_for_concept(
 
 
 @router.get("/papers/{paper_id}/concepts/{concept_id}/video/status")
-async def get_concept_video_status(paper_id: str, concept_id: str) -> Dict[str, Any]:
+async def get_concept_video_status(
+    paper_id: str,
+    concept_id: str,
+    request: Request,
+    response: Response,
+    since: int = 0,
+) -> Dict[str, Any]:
+    """
+    Video status plus the log lines after the `since` cursor. Pass the
+    returned log_seq back as `since` to receive only new lines.
+    """
     if paper_id not in papers_db:
         raise HTTPException(status_code=404, detail="Paper not found")
 
@@ -258,10 +611,52 @@ async def get_concept_video_status(paper_id: str, concept_id: str) -> Dict[str,
     concept_video = paper.concept_videos.get(concept_id)
 
     if not concept_video:
-        return {"video_status": "not_started", "logs": []}
+        return {"video_status": "not_started", "logs": [], "log_seq": 0}
+
+    job_log = job_logs.get(f"{paper_id}_{concept_id}")
+    not_modified = check_etag(
+        request,
+        response,
+        make_etag(
+            paper_id,
+            paper.revision,
+            concept_id,
+            job_log.last_seq if job_log else 0,
+            since,
+        ),
+    )
+    if not_modified:
+        return not_modified
+
+    logs, log_seq, logs_truncated = job_log.since(since) if job_log else ([], 0, False)
 
     return {
         "video_status": concept_video.status.value,
         "video_path": concept_video.video_path,
-        "logs": concept_video.logs,
+        "stream_path": concept_video.stream_path,
+        "clips_ready": len(concept_video.clips_paths),
+        "quality": concept_video.quality,
+        "is_preview": concept_video.is_preview,
+        "stitch_path": concept_video.stitch_path,
+        "stitch_seconds": concept_video.stitch_seconds,
+        "duration": concept_video.duration,
+        "bit_rate": concept_video.bit_rate,
+        "keyframes": concept_video.keyframes,
+        "logs": logs,
+        "log_seq": log_seq,
+        "logs_truncated": logs_truncated,
     }
+
+
+@router.get("/papers/{paper_id}/concepts/{concept_id}/video/logs")
+async def get_concept_video_logs(paper_id: str, concept_id: str):
+    """Full generation log, including lines no longer kept in memory"""
+    if paper_id not in papers_db:
+        raise HTTPException(status_code=404, detail="Paper not found")
+
+    job_log = job_logs.get(f"{paper_id}_{concept_id}")
+    if not job_log or not os.path.exists(job_log.path):
+        raise HTTPException(status_code=404, detail="No logs for this video")
+
+    job_log.flush()
+    return FileResponse(path=job_log.path, media_type="text/plain; charset=utf-8")
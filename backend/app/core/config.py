@@ -17,6 +17,18 @@ class Settings(BaseSettings):
     # Gemini API Configuration
     GEMINI_API_KEY: str = ""
     GEMINI_MODEL: str = "gemini-2.5-flash"
+    AGENT_LLM_MODEL: str = "gemini-1.5-flash"
+    # LLM provider for GeminiService and the agent: "gemini" calls the API,
+    # "record" also saves each response to LLM_CASSETTE_DIR, "replay" answers
+    # from those cassettes only, and "synthetic" generates valid responses
+    # offline after LLM_SYNTHETIC_LATENCY seconds (no API key needed)
+    LLM_PROVIDER: str = "gemini"
+    LLM_CASSETTE_DIR: str = "cassettes"
+    LLM_SYNTHETIC_LATENCY: float = 0.0
+
+    @property
+    def llm_needs_api_key(self) -> bool:
+        return self.LLM_PROVIDER in ("gemini", "record")
 
     # CORS Settings
     ALLOWED_HOSTS: str = "http://localhost:3000,http://127.0.0.1:3000,https://localhost:3000"
@@ -31,14 +43,89 @@ class Settings(BaseSettings):
     UPLOAD_DIR: str = "storage"
     VIDEO_DIR: str = "videos"
     CLIPS_DIR: str = "clips"
+    # Video job logs: recent lines stay in memory, the full log goes to disk
+    JOB_LOG_DIR: str = "logs"
+    JOB_LOG_MAX_LINES: int = 200
+    # Lines buffered between flushes of the on-disk log
+    JOB_LOG_FLUSH_LINES: int = 20
+    # Digest -> file index behind /api/media URLs, shared by every worker
+    # and kept across restarts
+    MEDIA_INDEX_DIR: str = "media_index"
+    # Disk quota for videos and clips (0 = unlimited); the least recently
+    # watched videos are evicted past it. The sweeper removes files no paper
+    # owns once they are older than the grace period.
+    STORAGE_QUOTA_MB: int = 10240
+    STORAGE_SWEEP_SECONDS: int = 600
+    STORAGE_ORPHAN_GRACE_SECONDS: int = 3600
 
     # Manim Settings
     MANIM_QUALITY: str = "medium_quality"
+    # 0 = derive from the CPU count
+    MANIM_MAX_CONCURRENT_RENDERS: int = 0
+    # Progressive rendering: publish a preview-quality video first, then
+    # re-render the validated scenes at MANIM_QUALITY in the background
+    PROGRESSIVE_RENDERING: bool = True
+    MANIM_PREVIEW_QUALITY: str = "low_quality"
+    UPGRADE_RENDER_NICENESS: int = 10
+    # LaTeX/text SVGs shared by all renders ("" disables the cache)
+    MANIM_TEX_CACHE_DIR: str = "tex_cache"
+    MANIM_TEX_CACHE_MB: int = 512
+    # Per-render resource budget (0 disables a limit)
+    RENDER_TIMEOUT_SECONDS: int = 300
+    RENDER_CPU_SECONDS: int = 600
+    RENDER_MAX_MEMORY_MB: int = 4096
+    RENDER_MAX_OUTPUT_MB: int = 512
+    RENDER_MAX_FRAMES: int = 7200
+    # Pre-warmed render workers: MIN_SIZE start at boot, the pool grows to
+    # MAX_SIZE (0 = the render concurrency) while jobs wait and shrinks back
+    # after IDLE_SECONDS. The interpreter must have manim ("" = agent_env).
+    # The video agent sends its renders here too, so jobs start warm
+    RENDER_POOL_ENABLED: bool = True
+    RENDER_POOL_MIN_SIZE: int = 1
+    RENDER_POOL_MAX_SIZE: int = 0
+    RENDER_POOL_IDLE_SECONDS: int = 300
+    RENDER_POOL_PYTHON: str = ""
+    # Agent repair loop: >1 renders that many LLM candidates per scene in
+    # parallel and keeps the first success; 0 = no ceiling on LLM calls per job
+    AGENT_SPECULATIVE_CANDIDATES: int = 1
+    AGENT_MAX_LLM_CALLS: int = 0
+    # Generate all scene programs in one LLM call, falling back per scene
+    AGENT_BATCH_GENERATION: bool = False
+    # Full prompts/responses from the agent go to the server log only, truncated
+    AGENT_DEBUG: bool = False
+    AGENT_DEBUG_MAX_CHARS: int = 2000
+    # WebSocket log fan-out: per-connection queue, events replayed on connect,
+    # and how long a single send may take before the client is dropped
+    WS_QUEUE_SIZE: int = 256
+    WS_REPLAY_EVENTS: int = 50
+    WS_SEND_TIMEOUT_SECONDS: float = 10.0
+    # Idle SSE streams send a comment line this often
+    SSE_KEEPALIVE_SECONDS: float = 15.0
+    # Event bus between job producers and WebSocket clients: "memory" for a
+    # single worker, "sqlite" to share events between processes on one host
+    EVENT_BUS_BACKEND: str = "memory"
+    EVENT_BUS_PATH: str = "events.db"
+    EVENT_BUS_POLL_SECONDS: float = 0.2
+    EVENT_BUS_RETENTION_SECONDS: int = 600
+    # Clips are published to an HLS playlist as they finish rendering
+    HLS_SEGMENT_SECONDS: int = 4
+    # Pipeline tracing: finished spans are appended to TRACE_FILE as JSON
+    # lines ("" = off, rotated past TRACE_FILE_MAX_MB) and, with
+    # TRACE_CONSOLE, printed to the server log
+    TRACE_FILE: str = "traces.jsonl"
+    TRACE_FILE_MAX_MB: int = 100
+    TRACE_CONSOLE: bool = False
 
     # Create directories
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        for directory in [self.UPLOAD_DIR, self.VIDEO_DIR, self.CLIPS_DIR]:
+        for directory in [
+            self.UPLOAD_DIR,
+            self.VIDEO_DIR,
+            self.CLIPS_DIR,
+            self.JOB_LOG_DIR,
+            self.MEDIA_INDEX_DIR,
+        ]:
             Path(directory).mkdir(exist_ok=True)
 
     class Config:
@@ -50,5 +137,5 @@ class Settings(BaseSettings):
 settings = Settings()
 
 # Validate Gemini API key
-if not settings.GEMINI_API_KEY and not settings.DEBUG:
+if not settings.GEMINI_API_KEY and settings.llm_needs_api_key and not settings.DEBUG:
     raise ValueError("GEMINI_API_KEY is required for production")
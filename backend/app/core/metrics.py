@@ -0,0 +1,306 @@
+"""
+Prometheus-style metrics for the API process
+
+Counters, gauges and histograms with labels, rendered in the Prometheus
+text exposition format by GET /metrics. Updates are a dict lookup and an
+addition under a lock, cheap enough to leave on in production; anything
+expensive to measure (disk usage) is updated by the job that already
+computes it, and gauges can read their value from a callback at scrape
+time instead.
+
+All metrics are declared at the bottom of this module so names, labels
+and buckets are defined in one place.
+"""
+
+import math
+import threading
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+LabelValues = Tuple[str, ...]
+# A callback returns one value, or {label values: value}
+GaugeCallback = Callable[[], Union[float, Dict[LabelValues, float]]]
+
+# Seconds; covers API calls up to full renders
+DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric(ABC):
+    # Prometheus TYPE line; every subclass sets its own
+    type_name = "untyped"
+
+    def __init__(self, name: str, description: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, object]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    @abstractmethod
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        """(suffix, formatted labels, value) for every series"""
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        for suffix, labels, value in self.samples():
+            lines.append(f"{self.name}{suffix}{labels} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    type_name = "counter"
+
+    def __init__(self, name: str, description: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, description, labelnames)
+        self.values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self.values)
+        for key, value in sorted(values.items()):
+            yield "", _format_labels(self.labelnames, key), value
+
+
+class Gauge(Metric):
+    type_name = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labelnames: Sequence[str] = (),
+        callback: Optional[GaugeCallback] = None,
+    ):
+        super().__init__(name, description, labelnames)
+        self.values: Dict[LabelValues, float] = {}
+        self.callback = callback
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self.values[key] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_callback(self, callback: Optional[GaugeCallback]):
+        """Read the gauge from callback at scrape time instead of stored values"""
+        self.callback = callback
+
+    def samples(self):
+        if self.callback is not None:
+            try:
+                result = self.callback()
+            except Exception as e:
+                print(f"Metric callback for {self.name} failed: {e}")
+                return
+            values = result if isinstance(result, dict) else {(): result}
+        else:
+            with self._lock:
+                values = dict(self.values)
+        for key, value in sorted(values.items()):
+            yield "", _format_labels(self.labelnames, key), value
+
+
+class Histogram(Metric):
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, description, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # label values -> (per-bucket counts, sum, count)
+        self.values: Dict[LabelValues, Tuple[List[int], float, int]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total, count = self.values.get(key) or ([0] * len(self.buckets), 0.0, 0)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self.values[key] = (counts, total + value, count + 1)
+
+    def samples(self):
+        with self._lock:
+            values = {key: (list(c), s, n) for key, (c, s, n) in self.values.items()}
+        for key, (counts, total, count) in sorted(values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(
+                    self.labelnames + ("le",), key + (_format_value(bound),)
+                )
+                yield "_bucket", labels, cumulative
+            labels = _format_labels(self.labelnames, key)
+            yield "_sum", labels, total
+            yield "_count", labels, count
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+
+    def _add(self, metric: Metric) -> Metric:
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, description: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(name, description, labelnames))
+
+    def gauge(
+        self,
+        name: str,
+        description: str,
+        labelnames: Sequence[str] = (),
+        callback: Optional[GaugeCallback] = None,
+    ) -> Gauge:
+        return self._add(Gauge(name, description, labelnames, callback))
+
+    def histogram(
+        self,
+        name: str,
+        description: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._add(Histogram(name, description, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Global registry
+registry = Registry()
+
+# --- Papers ---
+uploads_total = registry.counter(
+    "clarifai_uploads_total", "PDF uploads by outcome", ["outcome"]
+)
+upload_bytes_total = registry.counter(
+    "clarifai_upload_bytes_total", "Bytes of PDF uploaded"
+)
+pdf_parse_seconds = registry.histogram(
+    "clarifai_pdf_parse_seconds", "PDF text extraction time", ["outcome"]
+)
+pdf_pages = registry.histogram(
+    "clarifai_pdf_pages",
+    "Pages per parsed PDF",
+    buckets=(1, 5, 10, 20, 50, 100, 200, 500),
+)
+
+# --- Gemini ---
+gemini_calls_total = registry.counter(
+    "clarifai_gemini_calls_total",
+    "Gemini API calls by method and outcome",
+    ["method", "outcome"],
+)
+gemini_call_seconds = registry.histogram(
+    "clarifai_gemini_call_seconds", "Gemini API call latency", ["method"]
+)
+gemini_tokens_total = registry.counter(
+    "clarifai_gemini_tokens_total",
+    "Gemini tokens by method and direction (input/output)",
+    ["method", "direction"],
+)
+gemini_fallbacks_total = registry.counter(
+    "clarifai_gemini_fallbacks_total",
+    "Results produced by a local fallback instead of Gemini",
+    ["fallback"],
+)
+
+# --- Video jobs ---
+video_jobs_active = registry.gauge(
+    "clarifai_video_jobs_active", "Video jobs currently running"
+)
+video_jobs_total = registry.counter(
+    "clarifai_video_jobs_total", "Finished video jobs by outcome", ["outcome"]
+)
+clips_total = registry.counter(
+    "clarifai_clips_total",
+    "Clip renders by stage (preview/upgrade) and outcome",
+    ["stage", "outcome"],
+)
+render_attempts_per_clip = registry.histogram(
+    "clarifai_render_attempts_per_clip",
+    "Manim render attempts the agent needed per clip",
+    buckets=(1, 2, 3, 4, 6, 9, 12, 18),
+)
+llm_calls_per_clip = registry.histogram(
+    "clarifai_llm_calls_per_clip",
+    "Agent LLM calls per clip",
+    buckets=(1, 2, 3, 4, 6, 9, 12, 18),
+)
+clip_seconds = registry.histogram(
+    "clarifai_clip_seconds", "Agent time per clip, generation and rendering"
+)
+tex_cache_lookups_total = registry.counter(
+    "clarifai_tex_cache_lookups_total", "Shared TeX cache lookups", ["result"]
+)
+stitch_seconds = registry.histogram(
+    "clarifai_stitch_seconds", "Clip stitching time by concat path", ["path"]
+)
+render_pool_workers = registry.gauge(
+    "clarifai_render_pool_workers", "Warm render workers by state", ["state"]
+)
+
+# --- Streaming and storage ---
+stream_connections = registry.gauge(
+    "clarifai_stream_connections", "Open live event connections", ["transport"]
+)
+stream_messages_dropped_total = registry.counter(
+    "clarifai_stream_messages_dropped_total",
+    "Live events dropped because a client's queue was full",
+)
+storage_bytes = registry.gauge(
+    "clarifai_storage_bytes", "Bytes used by videos and clips, as of the last sweep"
+)
@@ -0,0 +1,284 @@
+"""
+Tracing for the paper and video pipelines
+
+Stdlib only: run_agent.py imports this from inside the agent virtualenv.
+Spans follow the OpenTelemetry data model (128-bit trace ids, 64-bit span
+ids, parent links, attributes, status) and finished spans are handed to
+exporters as flat JSON records: a JSON-lines file, the console, or, in the
+agent, its event channel back to the API. The current span lives in a
+contextvar, so nested `with tracer.span(...)` blocks and asyncio tasks or
+threads started inside them are parented automatically. Context crosses
+process boundaries as a W3C traceparent string.
+
+Summarise a span file with p50/p95 per span name:
+
+    python -m app.core.tracing traces.jsonl
+"""
+
+import contextvars
+import json
+import math
+import os
+import secrets
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+Exporter = Callable[[Dict[str, Any]], None]
+
+
+class SpanContext:
+    """Identity of a span, enough to parent another span to it"""
+
+    def __init__(self, trace_id: str, span_id: str):
+        self.trace_id = trace_id
+        self.span_id = span_id
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[SpanContext]:
+    """SpanContext from a W3C traceparent header value, if it is well formed"""
+    parts = (value or "").strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        int(parts[1], 16)
+        int(parts[2], 16)
+    except ValueError:
+        return None
+    return SpanContext(parts[1], parts[2])
+
+
+class Span:
+    def __init__(
+        self,
+        name: str,
+        context: SpanContext,
+        parent_id: Optional[str] = None,
+        attributes: Optional[Dict[str, Any]] = None,
+    ):
+        self.name = name
+        self.context = context
+        self.parent_id = parent_id
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.status = "OK"
+        self.status_message: Optional[str] = None
+
+    @property
+    def traceparent(self) -> str:
+        return self.context.traceparent
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes: Any):
+        self.attributes.update(attributes)
+
+    def record_error(self, error: Any):
+        self.status = "ERROR"
+        self.status_message = str(error) or type(error).__name__
+
+    def to_dict(self, service_name: str) -> Dict[str, Any]:
+        end_ns = self.end_ns or time.time_ns()
+        return {
+            "name": self.name,
+            "trace_id": self.context.trace_id,
+            "span_id": self.context.span_id,
+            "parent_span_id": self.parent_id,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": end_ns,
+            "duration_ms": round((end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+            "status": {"code": self.status, "message": self.status_message},
+            "resource": {"service.name": service_name},
+        }
+
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar(
+    "current_span", default=None
+)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def current_traceparent() -> str:
+    """traceparent of the current span, or "" outside any span"""
+    span = _current_span.get()
+    return span.traceparent if span else ""
+
+
+class FileExporter:
+    """Appends span records to a JSON-lines file, keeping one rotated backup"""
+
+    def __init__(self, path: str, max_bytes: int = 0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def __call__(self, record: Dict[str, Any]):
+        line = json.dumps(record, default=str) + "\n"
+        with self._lock:
+            if self.max_bytes:
+                try:
+                    if os.path.getsize(self.path) + len(line) > self.max_bytes:
+                        os.replace(self.path, self.path + ".1")
+                except OSError:
+                    pass
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+
+def console_exporter(record: Dict[str, Any]):
+    # stderr: the agent's stdout is its event channel
+    status = "" if record["status"]["code"] == "OK" else " ERROR"
+    print(
+        f"[trace] {record['name']} {record['duration_ms']:.1f}ms{status} "
+        f"{json.dumps(record['attributes'], default=str)}",
+        file=sys.stderr,
+    )
+
+
+class Tracer:
+    def __init__(self, service_name: str):
+        self.service_name = service_name
+        self.exporters: List[Exporter] = []
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.exporters)
+
+    def add_exporter(self, exporter: Exporter):
+        self.exporters.append(exporter)
+
+    def configure(self, file_path: str = "", console: bool = False, max_mb: int = 0):
+        if file_path:
+            self.add_exporter(FileExporter(file_path, max_mb * 1024 * 1024))
+        if console:
+            self.add_exporter(console_exporter)
+
+    def start_span(
+        self, name: str, parent: Optional[SpanContext] = None, **attributes: Any
+    ) -> Span:
+        """A new span under `parent`, or under the current span by default"""
+        if parent is None and _current_span.get() is not None:
+            parent = _current_span.get().context
+        trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        return Span(
+            name,
+            SpanContext(trace_id, secrets.token_hex(8)),
+            parent.span_id if parent else None,
+            attributes,
+        )
+
+    def end_span(self, span: Span):
+        span.end_ns = time.time_ns()
+        if self.exporters:
+            self.export(span.to_dict(self.service_name))
+
+    @contextmanager
+    def span(
+        self, name: str, parent: Optional[SpanContext] = None, **attributes: Any
+    ) -> Iterator[Span]:
+        """Time a block as a span that is current while the block runs"""
+        span = self.start_span(name, parent, **attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_error(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            self.end_span(span)
+
+    def export(self, record: Dict[str, Any]):
+        """Hand a finished span record (local or from the agent) to the exporters"""
+        for exporter in self.exporters:
+            try:
+                exporter(record)
+            except Exception as e:
+                print(f"Could not export span {record.get('name')}: {e}", file=sys.stderr)
+
+
+# --- Summary ---
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    rank = max(math.ceil(q / 100 * len(ordered)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def summarize(records: List[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+    """{span name: count, errors, p50, p95 and max duration in ms}"""
+    durations: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    for record in records:
+        name = record.get("name", "?")
+        durations.setdefault(name, []).append(float(record.get("duration_ms", 0.0)))
+        if (record.get("status") or {}).get("code") == "ERROR":
+            errors[name] = errors.get(name, 0) + 1
+    return {
+        name: {
+            "count": len(values),
+            "errors": errors.get(name, 0),
+            "p50": percentile(values, 50),
+            "p95": percentile(values, 95),
+            "max": max(values),
+        }
+        for name, values in sorted(durations.items())
+    }
+
+
+def read_records(paths: List[str]) -> List[Dict[str, Any]]:
+    records = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    return records
+
+
+def main(argv: List[str]) -> int:
+    if not argv:
+        print("usage: python -m app.core.tracing SPANS.jsonl [...]", file=sys.stderr)
+        return 2
+    summary = summarize(read_records(argv))
+    width = max([len(name) for name in summary] + [4])
+    print(
+        f"{'span':<{width}} {'count':>7} {'errors':>7} "
+        f"{'p50 ms':>10} {'p95 ms':>10} {'max ms':>10}"
+    )
+    for name, stats in summary.items():
+        print(
+            f"{name:<{width}} {stats['count']:>7} {stats['errors']:>7} "
+            f"{stats['p50']:>10.1f} {stats['p95']:>10.1f} {stats['max']:>10.1f}"
+        )
+    return 0
+
+
+# Global tracer; main.py attaches the exporters from settings
+tracer = Tracer("clarifai-backend")
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
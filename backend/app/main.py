@@ -1,30 +1,42 @@
+import asyncio
 import os
+from contextlib import asynccontextmanager
 from pathlib import Path
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from .api.endpoints import upload, analysis, video
+from .api.endpoints import upload, analysis, video, events, media, metrics
 from .core.config import settings
+from .core.tracing import tracer
+from .services.connection_manager import ConnectionManager
+from .services.event_bus import event_bus
+from .services.manim_generator import manim_generator
+from .services.storage_manager import storage_manager
 
+tracer.configure(settings.TRACE_FILE, settings.TRACE_CONSOLE, settings.TRACE_FILE_MAX_MB)
 
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: dict[str, WebSocket] = {}
-
-    async def connect(self, paper_id: str, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections[paper_id] = websocket
+manager = ConnectionManager()
+video.manager = manager
+events.manager = manager
+# Every API process delivers bus events to its own WebSocket clients
+event_bus.subscribe(manager.publish)
 
-    def disconnect(self, paper_id: str):
-        if paper_id in self.active_connections:
-            del self.active_connections[paper_id]
 
-    async def send_log(self, paper_id: str, message: str):
-        if paper_id in self.active_connections:
-            await self.active_connections[paper_id].send_text(message)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await event_bus.start()
+    # Render workers warm up in the background while the app starts serving
+    manim_generator.start_render_pool()
+    sweeper = asyncio.create_task(
+        storage_manager.run_sweeper(upload.papers_db, settings.STORAGE_SWEEP_SECONDS)
+    )
+    yield
+    sweeper.cancel()
+    await asyncio.to_thread(manim_generator.close_render_pool)
+    await event_bus.close()
 
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # CORS middleware
 app.add_middleware(
@@ -35,18 +47,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-manager = ConnectionManager()
-video.manager = manager
-
 
 @app.websocket("/ws/papers/{paper_id}/logs")
 async def websocket_endpoint(websocket: WebSocket, paper_id: str):
-    await manager.connect(paper_id, websocket)
+    subscriber = await manager.connect(
+        paper_id, websocket, events.paper_snapshot(paper_id)
+    )
     try:
         while True:
             await websocket.receive_text()
     except WebSocketDisconnect:
-        manager.disconnect(paper_id)
+        pass
+    finally:
+        manager.disconnect(paper_id, subscriber)
 
 
 # --- THIS IS THE DEFINITIVE PATHING FIX ---
@@ -58,3 +71,7 @@ app.mount("/api/videos", StaticFiles(directory=videos_dir), name="videos")
 app.include_router(upload.router, prefix="/api", tags=["upload"])
 app.include_router(analysis.router, prefix="/api", tags=["analysis"])
 app.include_router(video.router, prefix="/api", tags=["video"])
+app.include_router(events.router, prefix="/api", tags=["events"])
+app.include_router(media.router, prefix="/api", tags=["media"])
+# Scraped at the conventional path, outside /api
+app.include_router(metrics.router, tags=["metrics"])
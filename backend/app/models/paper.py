@@ -28,9 +28,17 @@ class ConceptVideo(BaseModel):
     concept_name: str
     status: VideoStatus
     video_path: Optional[str] = None
+    stream_path: Optional[str] = None
     clips_paths: List[str] = []
+    quality: Optional[str] = None
+    is_preview: bool = False
+    stitch_path: Optional[str] = None
+    stitch_seconds: Optional[float] = None
+    # Playback metadata of the final video
+    duration: Optional[float] = None
+    bit_rate: Optional[int] = None
+    keyframes: List[float] = []
     created_at: datetime
-    logs: List[str] = []
 
 
 class Concept(BaseModel):
@@ -69,6 +77,9 @@ class Paper(BaseModel):
     # NEW: Concept-specific video tracking
     concept_videos: Dict[str, ConceptVideo] = {}
 
+    # Bumped on every change; used for ETags
+    revision: int = 0
+
     @classmethod
     def create_new(cls, filename: str, file_path: str) -> "Paper":
         """Create a new paper instance with generated ID"""
@@ -0,0 +1,192 @@
+"""
+Event protocol between the API and the video agent process
+
+Stdlib only: run_agent.py imports the event names from here. The agent
+writes one JSON object per line (NDJSON) on stdout, each with a "type"
+field. Newlines inside messages are escaped by JSON, so multi-line
+messages can't break the framing.
+
+Renders go the other way too: the agent asks the API to run them on its
+warm render pool with a render event, and the API answers with a
+render_result line on the agent's stdin.
+"""
+
+import asyncio
+import json
+import os
+import select
+import signal
+import threading
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from .render_limits import CANCEL_POLL_SECONDS, RENDER_CANCELLED, RenderBudget
+
+EVENT_PROGRESS = "progress"  # {"message"}
+EVENT_CLIP_READY = "clip_ready"  # {"index", "path"}
+EVENT_METRICS = "metrics"  # free-form numeric fields
+EVENT_ERROR = "error"  # {"message"}
+EVENT_RESULT = "result"  # {"success", "error"?}
+EVENT_DEBUG = "debug"  # {"message"}, server log only
+EVENT_SPAN = "span"  # {"span": finished tracing span record}
+EVENT_RENDER = "render"  # {"id", "args", "budget", "niceness"}
+EVENT_RENDER_CANCEL = "render_cancel"  # {"id"}
+
+# API -> agent, on the agent's stdin
+REPLY_RENDER_RESULT = "render_result"  # {"id", "result": [returncode, stdout, stderr, budget_error] | null}
+
+
+def encode_event(event_type: str, **payload: Any) -> str:
+    return json.dumps({"type": event_type, **payload}, ensure_ascii=False)
+
+
+def decode_event(raw: bytes) -> Optional[Dict[str, Any]]:
+    """
+    Parse one line from the agent. Lines that aren't protocol events (stray
+    prints from libraries) come back as debug events; blank lines as None.
+    """
+    text = raw.decode("utf-8", errors="replace").strip()
+    if not text:
+        return None
+    try:
+        event = json.loads(text)
+    except json.JSONDecodeError:
+        return {"type": EVENT_DEBUG, "message": text}
+    if not isinstance(event, dict) or "type" not in event:
+        return {"type": EVENT_DEBUG, "message": text}
+    return event
+
+
+async def drain_stream(stream: asyncio.StreamReader, tail: Deque[str]):
+    """Read a pipe to EOF so the child never blocks on it, keeping the last lines"""
+    async for line in stream:
+        tail.append(line.decode("utf-8", errors="replace").rstrip())
+
+
+class ProgressForwarder:
+    """
+    Bounded buffer between the agent reader and a possibly slow sink
+    (WebSocket clients). The reader never waits on the sink; when the buffer
+    is full the oldest progress message is dropped.
+    """
+
+    def __init__(self, send: Callable[[str], Awaitable[None]], maxsize: int = 256):
+        self.send = send
+        self.pending: Deque[str] = deque(maxlen=maxsize)
+        self.dropped = 0
+        self._wakeup = asyncio.Event()
+        self._closed = False
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    def put(self, message: str):
+        if len(self.pending) == self.pending.maxlen:
+            self.dropped += 1
+        self.pending.append(message)
+        self._wakeup.set()
+
+    async def close(self):
+        """Flush what is buffered, then stop"""
+        self._closed = True
+        self._wakeup.set()
+        if self._task:
+            await self._task
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            while self.pending:
+                message = self.pending.popleft()
+                try:
+                    await self.send(message)
+                except Exception as e:
+                    print(f"Dropping agent progress message: {e}")
+            if self._closed:
+                return
+
+
+class RenderClient:
+    """
+    Agent side of renders run on the API's warm render pool. render() has
+    the signature of RenderPool.render: it returns None when the API has no
+    warm worker to offer (or has gone away), and the caller runs the manim
+    CLI itself.
+    """
+
+    def __init__(self, emit: Callable[..., None], replies_fd: int):
+        self.emit = emit
+        self.replies_fd = replies_fd
+        self.results: Dict[int, Optional[List[Any]]] = {}
+        self.closed = False
+        self._next_id = 0
+        self._condition = threading.Condition()
+        self._reader: Optional[threading.Thread] = None
+
+    def start(self):
+        self._reader = threading.Thread(target=self._read_replies, daemon=True)
+        self._reader.start()
+
+    def _read_replies(self):
+        # Polls instead of blocking in read() so close() can stop the thread
+        buffered = b""
+        while not self.closed:
+            ready, _, _ = select.select([self.replies_fd], [], [], CANCEL_POLL_SECONDS)
+            if not ready:
+                continue
+            chunk = os.read(self.replies_fd, 65536)
+            if not chunk:
+                # EOF: the API has gone away, nobody will answer any more
+                break
+            *lines, buffered = (buffered + chunk).split(b"\n")
+            for line in lines:
+                reply = decode_event(line)
+                if reply is None or reply.get("type") != REPLY_RENDER_RESULT:
+                    continue
+                with self._condition:
+                    self.results[reply["id"]] = reply.get("result")
+                    self._condition.notify_all()
+        self.close()
+
+    def close(self):
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+        if self._reader is not None and self._reader is not threading.current_thread():
+            self._reader.join()
+
+    def render(
+        self,
+        args: List[str],
+        budget: RenderBudget,
+        niceness: int = 0,
+        cancel_event: Optional[threading.Event] = None,
+    ) -> Optional[Tuple[int, str, str, Optional[str]]]:
+        with self._condition:
+            if self.closed:
+                return None
+            self._next_id += 1
+            request_id = self._next_id
+        self.emit(
+            EVENT_RENDER,
+            id=request_id,
+            args=args,
+            budget=budget.to_env(),
+            niceness=niceness,
+        )
+
+        cancel_sent = False
+        with self._condition:
+            while request_id not in self.results:
+                if self.closed:
+                    if cancel_sent:
+                        return -signal.SIGKILL, "", "", RENDER_CANCELLED
+                    return None
+                if cancel_event is not None and cancel_event.is_set() and not cancel_sent:
+                    self.emit(EVENT_RENDER_CANCEL, id=request_id)
+                    cancel_sent = True
+                self._condition.wait(CANCEL_POLL_SECONDS)
+            result = self.results.pop(request_id)
+        return tuple(result) if result is not None else None
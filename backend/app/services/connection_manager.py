@@ -0,0 +1,170 @@
+"""
+Fan-out hub for live paper events (WebSocket and SSE clients)
+
+Any number of clients can subscribe to a paper. Publishing never waits on a
+client: each connection has its own bounded outbound queue drained by its
+own sender task. When a queue is full the oldest message is dropped and the
+client is told how many it missed. Connections that fail or stall on a send
+are closed and removed. New subscribers first receive the paper's most
+recent events.
+"""
+
+import asyncio
+import json
+from collections import deque
+from typing import AsyncIterator, Deque, Dict, List, Optional, Set
+
+from fastapi import WebSocket
+
+from ..core.config import settings
+from ..core.metrics import stream_connections, stream_messages_dropped_total
+
+
+class Subscriber:
+    """One client connection and its outbound queue"""
+
+    transport = "sse"
+
+    def __init__(self, paper_id: str, queue_size: int):
+        self.paper_id = paper_id
+        self.pending: Deque[str] = deque(maxlen=queue_size)
+        self.dropped = 0
+        self.closed = False
+        self._wakeup = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+    def put(self, message: str):
+        if len(self.pending) == self.pending.maxlen:
+            self.dropped += 1
+            stream_messages_dropped_total.inc()
+        self.pending.append(message)
+        self._wakeup.set()
+
+    def close(self):
+        self.closed = True
+        self._wakeup.set()
+
+    async def drain(self, timeout: Optional[float] = None) -> List[str]:
+        """
+        Wait up to timeout for messages and take everything queued. Messages
+        lost to overflow are coalesced into one leading "dropped" notice.
+        """
+        if not self.pending and not self.closed:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+        self._wakeup.clear()
+        if self.closed:
+            return []
+
+        messages = []
+        if self.dropped:
+            messages.append(json.dumps({"type": "dropped", "count": self.dropped}))
+            self.dropped = 0
+        messages.extend(self.pending)
+        self.pending.clear()
+        return messages
+
+    async def messages(self) -> AsyncIterator[str]:
+        """Yield queued messages as they arrive until the subscriber is closed"""
+        while not self.closed:
+            for message in await self.drain():
+                yield message
+
+
+class WebSocketSubscriber(Subscriber):
+    """Subscriber drained by its own sender task"""
+
+    transport = "websocket"
+
+    def __init__(self, paper_id: str, websocket: WebSocket, queue_size: int):
+        super().__init__(paper_id, queue_size)
+        self.websocket = websocket
+
+    async def run(self, send_timeout: float):
+        """Send queued messages until the connection fails or is closed"""
+        try:
+            async for message in self.messages():
+                await asyncio.wait_for(self.websocket.send_text(message), send_timeout)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Closing WebSocket for paper {self.paper_id}: {e!r}")
+            self.closed = True
+            try:
+                await self.websocket.close()
+            except Exception:
+                pass
+
+
+class ConnectionManager:
+    def __init__(
+        self,
+        queue_size: int = settings.WS_QUEUE_SIZE,
+        replay_size: int = settings.WS_REPLAY_EVENTS,
+        send_timeout: float = settings.WS_SEND_TIMEOUT_SECONDS,
+    ):
+        self.queue_size = queue_size
+        self.replay_size = replay_size
+        self.send_timeout = send_timeout
+        self.active_connections: Dict[str, Set[Subscriber]] = {}
+        self.recent_events: Dict[str, Deque[str]] = {}
+
+    async def connect(
+        self, paper_id: str, websocket: WebSocket, snapshot: Optional[str] = None
+    ) -> Subscriber:
+        await websocket.accept()
+        subscriber = WebSocketSubscriber(paper_id, websocket, self.queue_size)
+        self._register(subscriber, snapshot)
+        subscriber.task = asyncio.create_task(subscriber.run(self.send_timeout))
+        return subscriber
+
+    def subscribe(self, paper_id: str, snapshot: Optional[str] = None) -> Subscriber:
+        """Subscriber consumed by the caller through drain(), e.g. for SSE"""
+        subscriber = Subscriber(paper_id, self.queue_size)
+        self._register(subscriber, snapshot)
+        return subscriber
+
+    def _register(self, subscriber: Subscriber, snapshot: Optional[str]):
+        # The snapshot describes current state; replayed events follow it
+        if snapshot:
+            subscriber.put(snapshot)
+        for message in self.recent_events.get(subscriber.paper_id, ()):
+            subscriber.put(message)
+        self.active_connections.setdefault(subscriber.paper_id, set()).add(subscriber)
+        stream_connections.inc(transport=subscriber.transport)
+
+    def disconnect(self, paper_id: str, subscriber: Subscriber):
+        subscriber.close()
+        if subscriber.task:
+            subscriber.task.cancel()
+        subscribers = self.active_connections.get(paper_id)
+        if subscribers is not None and subscriber in subscribers:
+            subscribers.discard(subscriber)
+            stream_connections.dec(transport=subscriber.transport)
+            if not subscribers:
+                del self.active_connections[paper_id]
+
+    async def send_log(self, paper_id: str, message: str):
+        """Queue a message for every subscriber of the paper; never blocks"""
+        self.publish(paper_id, message)
+
+    def publish(self, paper_id: str, message: str):
+        recent = self.recent_events.get(paper_id)
+        if recent is None:
+            recent = self.recent_events[paper_id] = deque(maxlen=self.replay_size)
+        recent.append(message)
+
+        for subscriber in list(self.active_connections.get(paper_id, ())):
+            if subscriber.closed:
+                self.disconnect(paper_id, subscriber)
+            else:
+                subscriber.put(message)
+
+    def forget(self, paper_id: str):
+        """Drop the replay history of a deleted paper"""
+        self.recent_events.pop(paper_id, None)
+
+    def subscriber_count(self, paper_id: str) -> int:
+        return len(self.active_connections.get(paper_id, ()))
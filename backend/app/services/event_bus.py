@@ -0,0 +1,188 @@
+"""
+Event bus between job producers and WebSocket subscribers
+
+Producers (video generation, analysis) publish per-paper events to the bus
+instead of writing to a ConnectionManager directly. Every API process
+subscribes its own ConnectionManager at startup, so a client receives
+events no matter which worker it is connected to or which process ran the
+job.
+
+Backends:
+    memory - in-process dispatch, for a single API worker
+    sqlite - an append-only table in a shared database file that every
+             process polls; works across uvicorn workers on one host
+
+A networked backend (e.g. Redis pub/sub) only needs to implement
+publish/subscribe/start/close.
+"""
+
+import asyncio
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, List, Optional, Tuple
+
+from ..core.config import settings
+
+# Called with (paper_id, message) for every event
+EventHandler = Callable[[str, str], None]
+
+
+class EventBus(ABC):
+    """Interface shared by all backends"""
+
+    def __init__(self):
+        self.handlers: List[EventHandler] = []
+
+    def subscribe(self, handler: EventHandler):
+        self.handlers.append(handler)
+
+    @abstractmethod
+    async def publish(self, paper_id: str, message: str):
+        """Deliver message to the subscribers of every API process"""
+
+    async def start(self):
+        """Begin delivering events to subscribers"""
+
+    async def close(self):
+        """Stop delivering events and release resources"""
+
+    def _dispatch(self, paper_id: str, message: str):
+        for handler in self.handlers:
+            try:
+                handler(paper_id, message)
+            except Exception as e:
+                print(f"Event handler failed for paper {paper_id}: {e}")
+
+
+class InMemoryEventBus(EventBus):
+    async def publish(self, paper_id: str, message: str):
+        self._dispatch(paper_id, message)
+
+
+class SQLiteEventBus(EventBus):
+    """
+    Events are rows in a shared SQLite table. Each process polls for rows
+    newer than the last one it delivered, starting from the end of the table
+    when it starts. Old rows are pruned after the retention period.
+    """
+
+    BATCH_SIZE = 500
+
+    def __init__(
+        self,
+        path: str,
+        poll_seconds: float = 0.2,
+        retention_seconds: int = 600,
+    ):
+        super().__init__()
+        self.path = path
+        self.poll_seconds = poll_seconds
+        self.retention_seconds = retention_seconds
+        self.last_id = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._task: Optional[asyncio.Task] = None
+        self._last_prune = 0.0
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS events ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " paper_id TEXT NOT NULL,"
+                " message TEXT NOT NULL,"
+                " created_at REAL NOT NULL)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _insert(self, paper_id: str, message: str):
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT INTO events (paper_id, message, created_at) VALUES (?, ?, ?)",
+                (paper_id, message, time.time()),
+            )
+            conn.commit()
+
+    def _fetch(self) -> List[Tuple[int, str, str]]:
+        with self._lock:
+            conn = self._connection()
+            rows = conn.execute(
+                "SELECT id, paper_id, message FROM events WHERE id > ? "
+                "ORDER BY id LIMIT ?",
+                (self.last_id, self.BATCH_SIZE),
+            ).fetchall()
+
+            now = time.time()
+            if now - self._last_prune > self.retention_seconds / 10:
+                self._last_prune = now
+                conn.execute(
+                    "DELETE FROM events WHERE created_at < ?",
+                    (now - self.retention_seconds,),
+                )
+                conn.commit()
+            return rows
+
+    def _latest_id(self) -> int:
+        with self._lock:
+            row = self._connection().execute("SELECT MAX(id) FROM events").fetchone()
+            return row[0] or 0
+
+    async def publish(self, paper_id: str, message: str):
+        await asyncio.to_thread(self._insert, paper_id, message)
+
+    async def start(self):
+        # Only events published from now on are delivered; clients catch up
+        # on older history through the status endpoints
+        self.last_id = await asyncio.to_thread(self._latest_id)
+        self._task = asyncio.create_task(self._poll())
+
+    async def _poll(self):
+        while True:
+            try:
+                rows = await asyncio.to_thread(self._fetch)
+            except sqlite3.Error as e:
+                print(f"Event bus poll failed: {e}")
+                rows = []
+            for event_id, paper_id, message in rows:
+                self.last_id = event_id
+                self._dispatch(paper_id, message)
+            if len(rows) < self.BATCH_SIZE:
+                await asyncio.sleep(self.poll_seconds)
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def create_event_bus() -> EventBus:
+    """Build the bus selected by settings.EVENT_BUS_BACKEND"""
+    backend = settings.EVENT_BUS_BACKEND.lower()
+    if backend == "memory":
+        return InMemoryEventBus()
+    if backend == "sqlite":
+        return SQLiteEventBus(
+            settings.EVENT_BUS_PATH,
+            poll_seconds=settings.EVENT_BUS_POLL_SECONDS,
+            retention_seconds=settings.EVENT_BUS_RETENTION_SECONDS,
+        )
+    raise ValueError(f"Unknown EVENT_BUS_BACKEND: {settings.EVENT_BUS_BACKEND}")
+
+
+# Global event bus instance
+event_bus = create_event_bus()
@@ -0,0 +1,127 @@
+"""
+Thin async wrappers around the ffmpeg / ffprobe command line tools
+"""
+
+import asyncio
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+
+async def run_ffmpeg(args: List[str], binary: str = "ffmpeg") -> Tuple[int, str, str]:
+    """
+    Run ffmpeg (or ffprobe) with the given arguments.
+
+    Returns:
+        (returncode, stdout, stderr)
+    """
+    process = await asyncio.create_subprocess_exec(
+        binary,
+        *args,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    stdout, stderr = await process.communicate()
+    return (
+        process.returncode,
+        stdout.decode("utf-8", errors="replace"),
+        stderr.decode("utf-8", errors="replace"),
+    )
+
+
+async def probe_streams(path: str) -> Optional[Dict[str, Any]]:
+    """
+    Probe the first video and audio stream of a media file.
+
+    Returns:
+        {"video": {...} or None, "audio": {...} or None, "duration": float or None},
+        or None if the file cannot be probed
+    """
+    returncode, stdout, _ = await run_ffmpeg(
+        [
+            "-v",
+            "error",
+            "-show_entries",
+            "stream=codec_type,codec_name,profile,level,width,height,pix_fmt,"
+            "sample_aspect_ratio,r_frame_rate,time_base,sample_rate,channels,bit_rate,"
+            "duration"
+            ":format=duration",
+            "-of",
+            "json",
+            path,
+        ],
+        binary="ffprobe",
+    )
+    if returncode != 0:
+        return None
+
+    try:
+        data = json.loads(stdout)
+    except json.JSONDecodeError:
+        return None
+
+    result = {"video": None, "audio": None, "duration": None}
+    for stream in data.get("streams", []):
+        codec_type = stream.get("codec_type")
+        if codec_type in ("video", "audio") and result[codec_type] is None:
+            result[codec_type] = stream
+
+    try:
+        result["duration"] = float(data["format"]["duration"])
+    except (ValueError, KeyError, TypeError):
+        pass
+
+    if result["video"] is None:
+        return None
+    return result
+
+
+async def probe_playback_info(path: str) -> Optional[Dict[str, Any]]:
+    """
+    Duration, overall bitrate and keyframe timestamps of a media file. The
+    keyframe index is read from packet flags, so nothing is decoded.
+
+    Returns:
+        {"duration": float or None, "bit_rate": int or None,
+         "keyframes": [seconds, ...]}, or None if the file cannot be probed
+    """
+    returncode, stdout, _ = await run_ffmpeg(
+        [
+            "-v",
+            "error",
+            "-select_streams",
+            "v:0",
+            "-show_entries",
+            "packet=pts_time,flags:format=duration,bit_rate",
+            "-of",
+            "json",
+            path,
+        ],
+        binary="ffprobe",
+    )
+    if returncode != 0:
+        return None
+
+    try:
+        data = json.loads(stdout)
+    except json.JSONDecodeError:
+        return None
+
+    fmt = data.get("format", {})
+    info: Dict[str, Any] = {"duration": None, "bit_rate": None, "keyframes": []}
+    try:
+        info["duration"] = float(fmt["duration"])
+    except (ValueError, KeyError, TypeError):
+        pass
+    try:
+        info["bit_rate"] = int(fmt["bit_rate"])
+    except (ValueError, KeyError, TypeError):
+        pass
+
+    for packet in data.get("packets", []):
+        if "K" in packet.get("flags", ""):
+            try:
+                info["keyframes"].append(round(float(packet["pts_time"]), 3))
+            except (ValueError, KeyError, TypeError):
+                continue
+    info["keyframes"].sort()
+    return info
@@ -5,22 +5,38 @@ Replaces Claude + NVIDIA with single unified AI service
 
 import asyncio
 import json
+import time
 from typing import Dict, List, Any, Optional
-from google import genai
 from ..core.config import settings
+from ..core.metrics import (
+    gemini_call_seconds,
+    gemini_calls_total,
+    gemini_fallbacks_total,
+    gemini_tokens_total,
+)
+from ..core.tracing import tracer
+from .llm_provider import GeminiProvider, LLMProvider, LLMResponse, create_provider
 
 
 class GeminiService:
     def __init__(self):
         self.api_key = settings.GEMINI_API_KEY
         self.model = settings.GEMINI_MODEL
-        self.client = None
+        # Gemini API, cassettes or synthetic responses (settings.LLM_PROVIDER)
+        self.provider: Optional[LLMProvider] = create_provider(
+            settings.LLM_PROVIDER,
+            self._create_gemini_provider,
+            settings.LLM_CASSETTE_DIR,
+            settings.LLM_SYNTHETIC_LATENCY,
+        )
 
-        if self.api_key:
-            # Initialize Gemini client
-            self.client = genai.Client(api_key=self.api_key)
-        else:
+        if not self.provider:
             print("Warning: GEMINI_API_KEY not set. Using fallback service.")
+        elif self.provider.name != "gemini":
+            print(f"Using the {self.provider.name} LLM provider.")
+
+    def _create_gemini_provider(self) -> Optional[LLMProvider]:
+        return GeminiProvider(self.api_key, self.model) if self.api_key else None
 
     async def analyze_paper_with_gemini(
         self, content: str, title: str = ""
@@ -28,7 +44,7 @@ class GeminiService:
         """
         Use Gemini 2.5 Flash for comprehensive paper analysis
         """
-        if not self.client:
+        if not self.provider:
             print("No Gemini client available, using fallback analysis")
             return await self._fallback_analysis(content, title)
 
@@ -58,7 +74,7 @@ Rules:
 
 JSON array:"""
 
-            response = await self._call_gemini_api(prompt)
+            response = await self._call_gemini_api(prompt, "analyze_paper")
 
             if response:
                 print(f"Gemini API response received: {len(response)} chars")
@@ -89,7 +105,7 @@ JSON array:"""
         """
         Use Gemini 2.5 for high-quality concept extraction with structured output
         """
-        if not self.client:
+        if not self.provider:
             return await self._fallback_concept_extraction(content)
 
         try:
@@ -118,7 +134,7 @@ Rules:
 
 JSON array:"""
 
-            response = await self._call_gemini_api(prompt)
+            response = await self._call_gemini_api(prompt, "concepts")
 
             if response:
                 # Try to parse as JSON first, fallback to text parsing
@@ -141,7 +157,7 @@ JSON array:"""
         """
         Generate ONE truly fresh additional concept - no caching, always new
         """
-        if not self.client:
+        if not self.provider:
             return await self._fallback_additional_concept()
 
         try:
@@ -187,7 +203,7 @@ Requirements:
 
 JSON object:"""
 
-            response = await self._call_gemini_api(prompt)
+            response = await self._call_gemini_api(prompt, "additional_concept")
 
             if response:
                 try:
@@ -263,7 +279,7 @@ JSON object:"""
         """
         Generate high-quality Manim code using Gemini 2.5
         """
-        if not self.client:
+        if not self.provider:
             print("No Gemini client available, using fallback Manim code")
             return self._generate_fallback_manim_code(concept_name, concept_description)
 
@@ -310,7 +326,7 @@ class {safe_name}Scene(Scene):
         # End with FadeOut of all elements
 """
 
-            response = await self._call_gemini_api(prompt)
+            response = await self._call_gemini_api(prompt, "manim_code")
 
             if response:
                 # Clean and validate the Manim code
@@ -339,7 +355,7 @@ class {safe_name}Scene(Scene):
         """
         Generate intro Manim code for a specific concept.
         """
-        if not self.client:
+        if not self.provider:
             return self._generate_fallback_intro_manim(concept_name)
 
         try:
@@ -370,7 +386,7 @@ VGroup(title, subtitle).arrange(DOWN, buff=0.5)
 Return ONLY the Python class code:
 """
 
-            response = await self._call_gemini_api(prompt)
+            response = await self._call_gemini_api(prompt, "intro_manim_code")
 
             if response:
                 manim_code = self._clean_manim_code(response, "IntroScene")
@@ -389,7 +405,7 @@ Return ONLY the Python class code:
         """
         Use Gemini to clarify specific text from research papers
         """
-        if not self.client:
+        if not self.provider:
             return "Clarification service temporarily unavailable."
 
         try:
@@ -400,7 +416,7 @@ Context: {context}
 
 Provide a clear, direct answer in 2-3 sentences. No bullet points, no markdown formatting, just plain text explanation."""
 
-            response = await self._call_gemini_api(prompt)
+            response = await self._call_gemini_api(prompt, "clarify")
             return (
                 response
                 if response
@@ -415,7 +431,7 @@ Provide a clear, direct answer in 2-3 sentences. No bullet points, no markdown f
         """
         Use Gemini to intelligently extract paper title, authors, and abstract
         """
-        if not self.client:
+        if not self.provider:
             return {"title": "", "authors": [], "abstract": ""}
 
         try:
@@ -443,7 +459,7 @@ Rules:
 
 JSON:"""
 
-            response = await self._call_gemini_api(prompt)
+            response = await self._call_gemini_api(prompt, "metadata")
 
             if response:
                 try:
@@ -499,26 +515,52 @@ JSON:"""
 
         return metadata
 
-    async def _call_gemini_api(self, prompt: str) -> Optional[str]:
+    async def _call_gemini_api(
+        self, prompt: str, operation: str = "generate"
+    ) -> Optional[str]:
         """
-        Make async call to Gemini API
+        Call the configured LLM provider, traced as a gemini.{operation} span
         """
-        try:
-            # Using the new google-genai client
-            response = await asyncio.to_thread(
-                self.client.models.generate_content, model=self.model, contents=prompt
-            )
+        started = time.perf_counter()
+        outcome = "error"
+        with tracer.span(
+            f"gemini.{operation}",
+            model=self.provider.model,
+            provider=self.provider.name,
+            prompt_chars=len(prompt),
+        ) as span:
+            try:
+                response = await asyncio.to_thread(
+                    self.provider.generate, prompt, operation
+                )
+                self._record_token_usage(operation, response, span)
 
-            if response and response.text:
-                print(f"Gemini API call successful: {len(response.text)} chars")
-                return response.text
-            else:
-                print("Gemini API returned empty response")
+                if response.text:
+                    print(f"Gemini API call successful: {len(response.text)} chars")
+                    span.set_attribute("response_chars", len(response.text))
+                    outcome = "success"
+                    return response.text
+                else:
+                    print("Gemini API returned empty response")
+                    span.record_error("empty response")
+                    outcome = "empty"
+                    return None
+
+            except Exception as e:
+                print(f"Gemini API call failed: {e}")
+                span.record_error(e)
                 return None
 
-        except Exception as e:
-            print(f"Gemini API call failed: {e}")
-            return None
+            finally:
+                gemini_calls_total.inc(method=operation, outcome=outcome)
+                gemini_call_seconds.observe(time.perf_counter() - started, method=operation)
+
+    def _record_token_usage(self, operation: str, response: LLMResponse, span):
+        input_tokens = response.input_tokens
+        output_tokens = response.output_tokens
+        gemini_tokens_total.inc(input_tokens, method=operation, direction="input")
+        gemini_tokens_total.inc(output_tokens, method=operation, direction="output")
+        span.set_attributes(input_tokens=input_tokens, output_tokens=output_tokens)
 
     def _extract_concepts_from_gemini_response(
         self, gemini_text: str, title: str
@@ -631,6 +673,7 @@ JSON:"""
         self, concept_name: str, concept_description: str
     ) -> str:
         """Generate optimized, simple Manim code for fast, reliable rendering"""
+        gemini_fallbacks_total.inc(fallback="manim_code")
         safe_name = "".join(c for c in concept_name.replace(" ", "") if c.isalnum())[
             :15
         ]
@@ -681,6 +724,7 @@ class {safe_name}Scene(Scene):
 
     def _generate_fallback_intro_manim(self, concept_name: str) -> str:
         """Generate fallback intro Manim code"""
+        gemini_fallbacks_total.inc(fallback="intro_manim_code")
         return f'''
 class IntroScene(Scene):
     def construct(self):
@@ -701,7 +745,7 @@ class IntroScene(Scene):
         """
         Generate a practical Python implementation for a given concept.
         """
-        if not self.client:
+        if not self.provider:
             return "# Code generation service temporarily unavailable."
 
         try:
@@ -720,7 +764,7 @@ Your task is to write a **single, concise** Python script that demonstrates the
 7.  **Raw Code Only:** Your final output must be only the raw Python code, with no markdown formatting or explanations outside of the code's comments.
 '''
 
-            response = await self._call_gemini_api(prompt)
+            response = await self._call_gemini_api(prompt, "python_implementation")
 
             if response:
                 # Clean the response to ensure it's just the code
@@ -738,6 +782,7 @@ Your task is to write a **single, concise** Python script that demonstrates the
 
     async def _fallback_analysis(self, content: str, title: str) -> Dict[str, Any]:
         """Fallback analysis when API fails - provide some basic concepts"""
+        gemini_fallbacks_total.inc(fallback="analysis")
         print(f"Using fallback analysis for: {title}")
 
         # Generate some basic concepts based on common research paper patterns
@@ -793,6 +838,7 @@ Your task is to write a **single, concise** Python script that demonstrates the
 
     async def _fallback_concept_extraction(self, content: str) -> List[Dict[str, Any]]:
         """Fallback concept extraction - generate one basic concept"""
+        gemini_fallbacks_total.inc(fallback="concept_extraction")
         print("Using fallback concept extraction")
         return [
             {
@@ -806,6 +852,7 @@ Your task is to write a **single, concise** Python script that demonstrates the
         self, timestamp: int = None
     ) -> Dict[str, Any]:
         """Fallback for when additional concept generation fails - make it unique each time"""
+        gemini_fallbacks_total.inc(fallback="additional_concept")
         print("Using fallback additional concept")
 
         import time
@@ -0,0 +1,119 @@
+"""
+Bounded per-job logs for video generation
+
+Each job keeps only its most recent lines in memory, numbered with a
+monotonically increasing sequence so pollers can ask for "everything after
+N". Every line is also appended to an on-disk log file, which holds the
+complete history once older lines have left the ring buffer. The file stays
+open while the job runs and is flushed every few lines rather than opened
+and written per line, since appends happen on the event loop.
+"""
+
+import os
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, List, Optional, TextIO, Tuple
+
+from ..core.config import settings
+
+
+class JobLog:
+    """Ring buffer of (seq, line) pairs backed by an append-only file"""
+
+    def __init__(self, path: str, max_lines: int = 200, flush_lines: int = 20):
+        self.path = path
+        self.entries: Deque[Tuple[int, str]] = deque(maxlen=max_lines)
+        self.last_seq = 0
+        self.flush_lines = flush_lines
+        self.unflushed = 0
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # A new job with the same key starts a fresh file
+        self.file: Optional[TextIO] = open(path, "w", encoding="utf-8")
+
+    def append(self, message: str) -> str:
+        """Record a message and return the timestamped line"""
+        line = f"[{datetime.now().strftime('%H:%M:%S')}] {message}"
+        self.last_seq += 1
+        self.entries.append((self.last_seq, line))
+        if self.file is None:
+            return line
+        try:
+            self.file.write(line + "\n")
+            self.unflushed += 1
+            if self.unflushed >= self.flush_lines:
+                self.flush()
+        except OSError as e:
+            print(f"Could not write job log {self.path}: {e}")
+        return line
+
+    def flush(self):
+        """Write buffered lines through to the log file"""
+        if self.file is None or not self.unflushed:
+            return
+        try:
+            self.file.flush()
+        except OSError as e:
+            print(f"Could not write job log {self.path}: {e}")
+        self.unflushed = 0
+
+    def close(self):
+        """Flush and close the log file; the in-memory lines stay readable"""
+        if self.file is None:
+            return
+        self.flush()
+        self.file.close()
+        self.file = None
+
+    def since(self, seq: int = 0) -> Tuple[List[str], int, bool]:
+        """
+        Lines with a sequence number above seq.
+
+        Returns:
+            (lines, last_seq, truncated) - truncated is True when some lines
+            after seq have already left the buffer (read the log file for them)
+        """
+        lines = [line for entry_seq, line in self.entries if entry_seq > seq]
+        oldest = self.entries[0][0] if self.entries else self.last_seq + 1
+        truncated = seq + 1 < oldest
+        return lines, self.last_seq, truncated
+
+
+class JobLogStore:
+    """Registry of job logs keyed by job name"""
+
+    def __init__(self, log_dir: str, max_lines: int = 200, flush_lines: int = 20):
+        self.log_dir = log_dir
+        self.max_lines = max_lines
+        self.flush_lines = flush_lines
+        self.logs: Dict[str, JobLog] = {}
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.log_dir, f"{key}.log")
+
+    def open(self, key: str) -> JobLog:
+        """Start a fresh log for a job, replacing any previous one"""
+        previous = self.logs.get(key)
+        if previous:
+            previous.close()
+        job_log = JobLog(self.path_for(key), self.max_lines, self.flush_lines)
+        self.logs[key] = job_log
+        return job_log
+
+    def get(self, key: str) -> Optional[JobLog]:
+        return self.logs.get(key)
+
+    def discard(self, key: str):
+        """Forget a job and delete its log file"""
+        job_log = self.logs.pop(key, None)
+        if job_log:
+            job_log.close()
+        path = job_log.path if job_log else self.path_for(key)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+# Global job log registry
+job_logs = JobLogStore(
+    settings.JOB_LOG_DIR, settings.JOB_LOG_MAX_LINES, settings.JOB_LOG_FLUSH_LINES
+)
@@ -0,0 +1,358 @@
+"""
+Pluggable LLM providers for GeminiService and the video agent
+
+Stdlib only: run_agent.py imports this from inside the agent virtualenv,
+and provider SDKs are imported when a live provider is created. Every
+provider answers generate(prompt, operation) with an LLMResponse:
+
+- "gemini": the live API (the agent supplies its own LangChain provider)
+- "record": the live API, saving every response as a cassette
+- "replay": answers only from cassettes, keyed by the SHA-256 of the prompt
+  with its volatile parts (paths, timestamps, request ids) normalised away
+- "synthetic": offline, deterministic responses in the shape each operation
+  expects (concept JSON, scene lists, renderable Manim code) after an
+  injectable latency, for load tests without quota or network
+
+Speculative candidates each get their own provider with a candidate index,
+so replayed and synthetic candidates answer differently, like live ones at
+different temperatures would.
+"""
+
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, List, Optional
+
+PROVIDERS = ("gemini", "record", "replay", "synthetic")
+
+
+class LLMProviderError(Exception):
+    pass
+
+
+class CassetteMissError(LLMProviderError):
+    pass
+
+
+class LLMResponse:
+    def __init__(self, text: str, input_tokens: int = 0, output_tokens: int = 0):
+        self.text = text
+        self.input_tokens = input_tokens
+        self.output_tokens = output_tokens
+
+
+class LLMProvider(ABC):
+    name = "base"
+    model = ""
+    temperature: Optional[float] = None
+
+    @abstractmethod
+    def generate(self, prompt: str, operation: str = "generate") -> LLMResponse:
+        """Answer one prompt; operation names the call site (e.g. "correct_code")"""
+
+
+class GeminiProvider(LLMProvider):
+    """google-genai client, as used by GeminiService"""
+
+    name = "gemini"
+
+    def __init__(self, api_key: str, model: str):
+        from google import genai
+
+        self.model = model
+        self.client = genai.Client(api_key=api_key)
+
+    def generate(self, prompt: str, operation: str = "generate") -> LLMResponse:
+        response = self.client.models.generate_content(model=self.model, contents=prompt)
+        usage = getattr(response, "usage_metadata", None)
+        return LLMResponse(
+            (response.text if response else None) or "",
+            getattr(usage, "prompt_token_count", None) or 0,
+            getattr(usage, "candidates_token_count", None) or 0,
+        )
+
+
+# --- Cassettes ---
+
+
+# Parts of a prompt that change between otherwise identical runs
+VOLATILE_PATTERNS = (
+    # GeminiService stamps some prompts with the time of the request
+    (re.compile(r"\[Request #\d+\]"), "[Request #]"),
+    # Directories of files in tracebacks: render dirs, virtualenvs, home dirs
+    (re.compile(r"(?:[A-Za-z]:)?(?:[/\\][\w.\-]+)+[/\\](?=[\w.\-]+)"), ""),
+    (re.compile(r"\d{4}-\d\d-\d\d[T ]\d\d:\d\d:\d\d(?:\.\d+)?"), "<time>"),
+    (re.compile(r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b"), "<uuid>"),
+    (re.compile(r"\b0x[0-9a-f]{6,}\b"), "0x?"),
+    # Progress bar timings in manim's stderr
+    (re.compile(r"\[\d+:\d\d<[\d:?]+, *[\d.?]+ *\w+/s\]"), ""),
+)
+
+
+def normalize_prompt(prompt: str) -> str:
+    for pattern, replacement in VOLATILE_PATTERNS:
+        prompt = pattern.sub(replacement, prompt)
+    return prompt
+
+
+def prompt_key(prompt: str, candidate: int = 0) -> str:
+    """Cassette key of a prompt; speculative candidates after the first get their own"""
+    key = hashlib.sha256(normalize_prompt(prompt).encode("utf-8")).hexdigest()
+    return f"{key}-{candidate}" if candidate else key
+
+
+def cassette_path(cassette_dir: str, key: str) -> str:
+    return os.path.join(cassette_dir, key[:2], f"{key}.json")
+
+
+class RecordingProvider(LLMProvider):
+    """Passes calls through to a live provider and saves each response"""
+
+    name = "record"
+
+    def __init__(self, inner: LLMProvider, cassette_dir: str, candidate: int = 0):
+        self.inner = inner
+        self.cassette_dir = cassette_dir
+        self.candidate = candidate
+        self.model = inner.model
+        self.temperature = inner.temperature
+
+    def generate(self, prompt: str, operation: str = "generate") -> LLMResponse:
+        response = self.inner.generate(prompt, operation)
+        key = prompt_key(prompt, self.candidate)
+        path = cassette_path(self.cassette_dir, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "operation": operation,
+                    "model": self.model,
+                    "prompt_chars": len(prompt),
+                    "text": response.text,
+                    "input_tokens": response.input_tokens,
+                    "output_tokens": response.output_tokens,
+                },
+                f,
+            )
+        os.replace(tmp_path, path)
+        return response
+
+
+class ReplayProvider(LLMProvider):
+    """Answers from recorded cassettes; a prompt never recorded is an error"""
+
+    name = "replay"
+
+    def __init__(self, cassette_dir: str, candidate: int = 0):
+        self.cassette_dir = cassette_dir
+        self.candidate = candidate
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _load(self, key: str) -> Optional[dict]:
+        try:
+            with open(cassette_path(self.cassette_dir, key), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def generate(self, prompt: str, operation: str = "generate") -> LLMResponse:
+        key = prompt_key(prompt)
+        # A candidate's own recording if there is one, else the shared one
+        cassette = (
+            self._load(prompt_key(prompt, self.candidate)) if self.candidate else None
+        ) or self._load(key)
+        if cassette is None:
+            with self._lock:
+                self.misses += 1
+            raise CassetteMissError(f"No cassette for {operation} prompt {key[:12]}")
+        with self._lock:
+            self.hits += 1
+        return LLMResponse(
+            cassette.get("text", ""),
+            cassette.get("input_tokens", 0),
+            cassette.get("output_tokens", 0),
+        )
+
+
+# --- Synthetic ---
+
+TOPICS = (
+    ("Scaled Dot-Product Attention", "mathematical"),
+    ("Residual Connections", "technical"),
+    ("Layer Normalization", "technical"),
+    ("Stochastic Gradient Descent", "mathematical"),
+    ("Contrastive Pretraining", "methodological"),
+    ("Ablation Study Design", "empirical"),
+    ("Positional Encoding", "mathematical"),
+    ("Mixture of Experts Routing", "conceptual"),
+)
+
+# Text and shapes only: renders quickly and needs no LaTeX installation
+SCENE_TEMPLATE = """from manim import *
+
+
+class {class_name}(Scene):
+    def construct(self):
+        title = Text("{title}", font_size=36).to_edge(UP)
+        shape = {shape}.set_color({color})
+        label = Text("{label}", font_size=24).next_to(shape, DOWN)
+        self.play(Write(title))
+        self.play(Create(shape), FadeIn(label))
+        self.play(shape.animate.scale(1.5).rotate(PI / 4))
+        self.wait(0.5)
+        self.play(FadeOut(title), FadeOut(shape), FadeOut(label))
+"""
+SHAPES = ("Circle(radius=1)", "Square(side_length=2)", "Triangle().scale(1.5)")
+COLORS = ("BLUE", "GREEN", "YELLOW", "RED")
+
+
+class SyntheticProvider(LLMProvider):
+    """
+    Deterministic offline responses: the content depends only on the prompt
+    and the candidate index, while latency (latency ± jitter seconds) and
+    injected failures come from a seeded generator.
+    """
+
+    name = "synthetic"
+    model = "synthetic"
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int = 0,
+        candidate: int = 0,
+    ):
+        self.latency = latency
+        self.candidate = candidate
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.calls = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def generate(self, prompt: str, operation: str = "generate") -> LLMResponse:
+        with self._lock:
+            self.calls += 1
+            delay = max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+            failed = self._random.random() < self.error_rate
+            if failed:
+                self.errors += 1
+        if delay:
+            time.sleep(delay)
+        if failed:
+            raise LLMProviderError(f"Injected failure for {operation}")
+
+        text = self.respond(prompt, operation)
+        # Roughly four characters per token
+        return LLMResponse(text, len(prompt) // 4, len(text) // 4)
+
+    def respond(self, prompt: str, operation: str) -> str:
+        rng = random.Random(prompt_key(prompt, self.candidate))
+        if operation in ("analyze_paper", "concepts"):
+            return json.dumps(self.concepts(rng, 3), indent=2)
+        if operation == "additional_concept":
+            return json.dumps(self.concepts(rng, 1)[0], indent=2)
+        if operation == "metadata":
+            return json.dumps(
+                {
+                    "title": f"A Study of {rng.choice(TOPICS)[0]}",
+                    "authors": ["Ada Example", "Alan Sample"],
+                    "abstract": "We study the method and report results on standard benchmarks.",
+                },
+                indent=2,
+            )
+        if operation == "split_scenes":
+            topic = rng.choice(TOPICS)[0]
+            return json.dumps(
+                [
+                    f"Introduce {topic} and the problem it solves.",
+                    f"Show the core mechanism of {topic} step by step.",
+                    f"Summarize why {topic} matters in practice.",
+                ],
+                indent=2,
+            )
+        if operation in ("manim_code", "intro_manim_code", "generate_code", "correct_code"):
+            return self.scene(rng, self.class_name(prompt))
+        if operation == "generate_all_code":
+            match = re.search(r"generate the (\d+) Manim programs", prompt)
+            count = int(match.group(1)) if match else 3
+            return json.dumps([self.scene(rng, f"Scene{i + 1}") for i in range(count)])
+        if operation == "python_implementation":
+            return (
+                "import math\n\n\n"
+                "def softmax(values):\n"
+                "    peak = max(values)\n"
+                "    exps = [math.exp(v - peak) for v in values]\n"
+                "    total = sum(exps)\n"
+                "    return [e / total for e in exps]\n\n\n"
+                'if __name__ == "__main__":\n'
+                "    print(softmax([1.0, 2.0, 3.0]))\n"
+            )
+        return (
+            "The passage describes how the method weighs different parts of its input. "
+            "Relevant context contributes more to the result, which makes the model "
+            "both more accurate and easier to interpret."
+        )
+
+    def concepts(self, rng: random.Random, count: int) -> List[dict]:
+        return [
+            {
+                "name": name,
+                "description": f"Explains how {name.lower()} shapes the behaviour of the proposed model.",
+                "importance_score": round(rng.uniform(0.6, 0.95), 2),
+                "concept_type": concept_type,
+            }
+            for name, concept_type in rng.sample(TOPICS, count)
+        ]
+
+    def class_name(self, prompt: str) -> str:
+        """The Scene class name the prompt asks for, if it names one"""
+        match = re.search(r"class (\w+)\(Scene\)", prompt) or re.search(
+            r"class named `?(\w+)`?", prompt
+        )
+        return match.group(1) if match else "SyntheticScene"
+
+    def scene(self, rng: random.Random, class_name: str) -> str:
+        topic = rng.choice(TOPICS)[0]
+        return SCENE_TEMPLATE.format(
+            class_name=class_name,
+            title=topic,
+            shape=rng.choice(SHAPES),
+            color=rng.choice(COLORS),
+            label="Synthetic scene",
+        )
+
+
+def create_provider(
+    name: str,
+    live: Callable[[], Optional[LLMProvider]],
+    cassette_dir: str = "",
+    synthetic_latency: float = 0.0,
+    candidate: int = 0,
+) -> Optional[LLMProvider]:
+    """
+    The provider configured by `name`. `live` builds the real API provider
+    for "gemini" and "record"; it returns None when no API key is set.
+    `candidate` is the index of a speculative candidate.
+    """
+    if name == "synthetic":
+        return SyntheticProvider(synthetic_latency, candidate=candidate)
+    if name == "replay":
+        return ReplayProvider(cassette_dir, candidate)
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown LLM provider {name!r}, expected one of {PROVIDERS}")
+    provider = live()
+    if name == "record" and provider is not None:
+        return RecordingProvider(provider, cassette_dir, candidate)
+    return provider
@@ -4,20 +4,104 @@ Manim video generation service - REWRITTEN TO MATCH WORKING clarifai-old impleme
 
 import asyncio
 import os
-import tempfile
-from typing import List, Dict, Any, Optional
+import sys
 from pathlib import Path
+from typing import List, Dict, Any, Optional
 
 from ..core.config import settings
+from ..core.metrics import render_pool_workers, tex_cache_lookups_total
+from ..core.tracing import tracer
+from .manim_render import (
+    build_manim_command,
+    create_render_dir,
+    locate_output,
+    remove_render_dir,
+    write_scene_file,
+)
+from .render_limits import RenderBudget, check_frame_budget, run_supervised_async
+from .render_pool import RenderPool, worker_command, worker_env
+from .tex_cache import TexCache
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
+
+def render_budget() -> RenderBudget:
+    """Resource budget for one render, from settings"""
+    return RenderBudget(
+        wall_seconds=settings.RENDER_TIMEOUT_SECONDS,
+        cpu_seconds=settings.RENDER_CPU_SECONDS,
+        memory_mb=settings.RENDER_MAX_MEMORY_MB,
+        output_mb=settings.RENDER_MAX_OUTPUT_MB,
+        max_frames=settings.RENDER_MAX_FRAMES,
+    )
+
+
+def render_concurrency() -> int:
+    """Number of manim renders allowed to run at once on this machine"""
+    if settings.MANIM_MAX_CONCURRENT_RENDERS > 0:
+        return settings.MANIM_MAX_CONCURRENT_RENDERS
+    # Each render keeps roughly two cores busy (scene construction + encoder)
+    return max(1, (os.cpu_count() or 2) // 2)
+
+
+def render_pool_python() -> str:
+    """Interpreter for warm render workers; it needs manim importable"""
+    if settings.RENDER_POOL_PYTHON:
+        return settings.RENDER_POOL_PYTHON
+    agent_python = BACKEND_DIR / "agent_env" / "bin" / "python"
+    return str(agent_python) if agent_python.exists() else sys.executable
 
 
 class ManimGenerator:
     def __init__(self):
         self.output_dir = settings.CLIPS_DIR
-        self.quality = "medium_quality"  # Default quality
+        self.quality = settings.MANIM_QUALITY
+        # Shared by every concurrent render started through this generator
+        self.render_slots = asyncio.Semaphore(render_concurrency())
+        self.tex_cache = (
+            TexCache(
+                os.path.abspath(settings.MANIM_TEX_CACHE_DIR),
+                settings.MANIM_TEX_CACHE_MB,
+            )
+            if settings.MANIM_TEX_CACHE_DIR
+            else None
+        )
+        # Started by the app lifespan, so importing this module stays cheap
+        self.render_pool: Optional[RenderPool] = None
+
+    def start_render_pool(self):
+        """Start the pre-warmed render workers in the background"""
+        if not settings.RENDER_POOL_ENABLED or self.render_pool is not None:
+            return
+        self.render_pool = RenderPool(
+            worker_command(render_pool_python()),
+            min_size=settings.RENDER_POOL_MIN_SIZE,
+            max_size=settings.RENDER_POOL_MAX_SIZE or render_concurrency(),
+            idle_seconds=settings.RENDER_POOL_IDLE_SECONDS,
+            # Workers link cached TeX/text SVGs into each render on demand
+            env=worker_env(self.tex_cache.root if self.tex_cache else ""),
+        )
+        self.render_pool.start()
+        render_pool_workers.set_callback(self._render_pool_states)
+
+    def _render_pool_states(self):
+        stats = self.render_pool.stats() if self.render_pool else {}
+        return {
+            (state,): stats.get(state, 0) for state in ("idle", "busy", "starting")
+        }
+
+    def close_render_pool(self):
+        if self.render_pool is not None:
+            self.render_pool.close()
+            self.render_pool = None
 
     async def generate_manim_video(
-        self, code: str, clip_name: str = None, quality: str = None
+        self,
+        code: str,
+        clip_name: str = None,
+        quality: str = None,
+        output_dir: str = None,
+        niceness: int = 0,
     ) -> Optional[str]:
         """
         Generate a video from Manim code asynchronously - EXACT COPY FROM WORKING clarifai-old
@@ -26,12 +110,16 @@ class ManimGenerator:
             code: The Manim Python code to execute
             clip_name: Optional name for the clip file
             quality: Manim quality setting (low_quality, medium_quality, high_quality)
+            output_dir: Directory to render into (defaults to settings.CLIPS_DIR)
+            niceness: Scheduling priority offset for background renders
 
         Returns:
             Path to the generated video file or None if failed
         """
+        output_dir = output_dir or self.output_dir
+
         # Create output directory if it doesn't exist
-        os.makedirs(self.output_dir, exist_ok=True)
+        os.makedirs(output_dir, exist_ok=True)
 
         # Use provided quality or default
         quality = quality or self.quality
@@ -40,21 +128,20 @@ class ManimGenerator:
         if not clip_name:
             clip_name = f"clip_{hash(code) % 10000}"
 
-        # Create temporary Python file with the Manim code
-        with tempfile.NamedTemporaryFile(
-            mode="w", suffix=".py", delete=False
-        ) as temp_file:
-            # Always include default imports for mathematical content
-            full_code = (
-                """from manim import *
+        # Each render gets a private media directory so the output path is
+        # deterministic and concurrent renders cannot pick up each other's files
+        render_dir = create_render_dir(output_dir, clip_name)
+
+        # Always include default imports for mathematical content
+        full_code = (
+            """from manim import *
 import numpy as np
 import math
 
 """
-                + code
-            )
-            temp_file.write(full_code)
-            temp_file_path = temp_file.name
+            + code
+        )
+        scene_path = write_scene_file(render_dir, full_code)
 
         try:
             # Extract scene name from code - CRITICAL FOR MANIM TO WORK
@@ -63,59 +150,66 @@ import math
                 print(f"No scene name found in code for {clip_name}")
                 return None
 
-            # Run Manim command asynchronously - FIXED WITH SCENE NAME
-            quality_flag = f"-q{quality[0]}"  # -ql (low), -qm (medium), -qh (high)
+            budget = render_budget()
+            budget_error = check_frame_budget(full_code, quality, budget, self.quality)
+            if budget_error:
+                print(f"Warning: {budget_error} ({clip_name})")
+                return None
 
-            cmd = [
-                "manim",
-                temp_file_path,
-                scene_name,  # CRITICAL: Must specify scene name
-                "-o",
-                self.output_dir,
-                "--media_dir",
-                self.output_dir,
-                "-v",
-                "WARNING",  # Reduce verbosity
-                quality_flag,
-            ]
+            args = build_manim_command(
+                [], scene_path, scene_name, clip_name, render_dir, quality
+            )
 
             print(f"Generating Manim video: {clip_name}")
             print(f"Scene name: {scene_name}")
-            print(f"Command: {' '.join(cmd)}")
-
-            process = await asyncio.create_subprocess_exec(
-                *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
-            )
-
-            stdout, stderr = await process.communicate()
-
-            if process.returncode != 0:
-                print(f"Warning: Manim execution failed for clip {clip_name}")
-                print(f"Error: {stderr.decode()}")
+            print(f"Command: manim {' '.join(args)}")
+
+            # Runs under rlimits + timeout; cancellation kills the render.
+            # A warm worker skips manim's start-up cost; without one the CLI
+            # is started cold
+            with tracer.span("manim.render", clip=clip_name, quality=quality) as span:
+                result = (
+                    await self.render_pool.render_async(args, budget, niceness)
+                    if self.render_pool
+                    else None
+                )
+                span.set_attribute("warm", result is not None)
+                if result is None:
+                    result = await run_supervised_async(["manim"] + args, budget, niceness)
+                returncode, _, stderr, budget_error = result
+                span.set_attribute("returncode", returncode)
+                if budget_error or returncode != 0:
+                    span.record_error(budget_error or f"manim exited with {returncode}")
+
+            if budget_error:
+                print(f"Warning: {budget_error} ({clip_name})")
                 return None
 
-            # Find the generated video file - EXACT SAME AS WORKING VERSION
-            video_files = list(Path(self.output_dir).glob("**/*.mp4"))
-            if not video_files:
-                print(f"Warning: No video file was generated for clip {clip_name}")
+            if returncode != 0:
+                print(f"Warning: Manim execution failed for clip {clip_name}")
+                print(f"Error: {stderr}")
                 return None
 
-            # Filter out partial files and find the most recent
-            final_videos = [f for f in video_files if "partial" not in str(f)]
-
-            if not final_videos:
+            if self.tex_cache:
+                cache_stats = await asyncio.to_thread(
+                    self.tex_cache.publish, render_dir
+                )
+                tex_cache_lookups_total.inc(cache_stats["hits"], result="hit")
+                tex_cache_lookups_total.inc(cache_stats["misses"], result="miss")
                 print(
-                    f"Warning: No final video file found for clip {clip_name}, using latest available"
+                    f"TeX cache for {clip_name}: {cache_stats['hits']} hits, "
+                    f"{cache_stats['misses']} misses "
+                    f"(overall hit rate {self.tex_cache.hit_rate():.0%})"
                 )
-                final_videos = video_files
 
-            # Return the most recently created final video file
-            latest_video = max(final_videos, key=os.path.getctime)
+            video_path = locate_output(render_dir, quality, clip_name)
+            if not video_path:
+                print(f"Warning: No video file was generated for clip {clip_name}")
+                return None
 
-            # Rename to our desired clip name
-            final_path = os.path.join(self.output_dir, f"{clip_name}.mp4")
-            if str(latest_video) != final_path:
-                os.rename(str(latest_video), final_path)
+            # Move to our desired clip name
+            final_path = os.path.join(output_dir, f"{clip_name}.mp4")
+            os.replace(video_path, final_path)
 
             print(f"Successfully generated Manim video: {final_path}")
             return final_path
@@ -125,20 +219,27 @@ import math
             return None
 
         finally:
-            # Clean up temporary file
-            try:
-                os.unlink(temp_file_path)
-            except:
-                pass
+            # Clean up the render directory (scene file, partial movie files)
+            remove_render_dir(render_dir)
 
     async def generate_multiple_clips(
-        self, clips_config: List[Dict[str, Any]], quality: str = None
+        self,
+        clips_config: List[Dict[str, Any]],
+        quality: str = None,
+        concurrent: bool = False,
     ) -> List[str]:
         """
-        Generate multiple Manim clips sequentially to maintain order.
+        Generate multiple Manim clips, returned in config order.
         If any clip fails, the entire process is aborted.
+
+        With concurrent=True clips render in parallel (bounded by
+        render_slots); the first failure cancels the remaining renders.
         """
         quality = quality or self.quality
+
+        if concurrent:
+            return await self._generate_clips_concurrently(clips_config, quality)
+
         clip_paths = []
 
         for i, clip in enumerate(clips_config):
@@ -160,26 +261,75 @@ import math
                 else:
                     print(f"Clip {i}: Failed to generate. Aborting.")
                     # Clean up successfully generated clips from this run
-                    for path in clip_paths:
-                        try:
-                            os.remove(path)
-                        except OSError:
-                            pass
+                    self._remove_clips(clip_paths)
                     return []  # Return empty list to indicate failure
 
             except Exception as e:
                 print(f"Error processing clip {i}: {e}. Aborting.")
                 # Clean up successfully generated clips from this run
-                for path in clip_paths:
-                    try:
-                        os.remove(path)
-                    except OSError:
-                        pass
+                self._remove_clips(clip_paths)
                 return []  # Return empty list to indicate failure
 
         print(f"Generated {len(clip_paths)} out of {len(clips_config)} clips")
         return clip_paths
 
+    async def _generate_clips_concurrently(
+        self, clips_config: List[Dict[str, Any]], quality: str
+    ) -> List[str]:
+        # Indexed results keep config order regardless of completion order
+        results: List[Optional[str]] = [None] * len(clips_config)
+
+        async def render_clip(i: int, code: str):
+            async with self.render_slots:
+                video_path = await self.generate_manim_video(
+                    code, f"clip_{i:03d}", quality
+                )
+            if not video_path or not os.path.exists(video_path):
+                raise RuntimeError(f"Clip {i}: Failed to generate")
+            results[i] = video_path
+            print(f"Clip {i} generated successfully: {video_path}")
+
+        tasks = []
+        for i, clip in enumerate(clips_config):
+            if not clip.get("code"):
+                print(f"Skipping clip {i}: no code provided")
+                continue
+            tasks.append(asyncio.create_task(render_clip(i, clip["code"])))
+
+        if not tasks:
+            return []
+
+        try:
+            done, pending = await asyncio.wait(
+                tasks, return_when=asyncio.FIRST_EXCEPTION
+            )
+        except asyncio.CancelledError:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self._remove_clips([path for path in results if path])
+            raise
+
+        failed = next((task for task in done if task.exception()), None)
+        if failed:
+            print(f"{failed.exception()}. Aborting.")
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            self._remove_clips([path for path in results if path])
+            return []
+
+        clip_paths = [path for path in results if path]
+        print(f"Generated {len(clip_paths)} out of {len(clips_config)} clips")
+        return clip_paths
+
+    def _remove_clips(self, clip_paths: List[str]):
+        for path in clip_paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
     def create_sample_manim_code(self, concept: str, explanation: str) -> str:
         """
         Create sample Manim code for a mathematical concept - FROM WORKING clarifai-old
@@ -0,0 +1,102 @@
+"""
+Manim invocation helpers shared by the API and the standalone agent
+
+Stdlib only: run_agent.py imports this from inside the agent virtualenv.
+Every render gets its own media directory, so the output path is known in
+advance and concurrent renders never see each other's files.
+"""
+
+import os
+import shutil
+import tempfile
+from typing import List, Optional
+
+# Manim CLI quality flags, keyed by the config names used in settings
+QUALITY_FLAGS = {
+    "low_quality": "-ql",
+    "medium_quality": "-qm",
+    "high_quality": "-qh",
+    "production_quality": "-qp",
+    "fourk_quality": "-qk",
+}
+
+# Directory manim names after the resolution and frame rate of each quality
+QUALITY_DIRS = {
+    "low_quality": "480p15",
+    "medium_quality": "720p30",
+    "high_quality": "1080p60",
+    "production_quality": "1440p60",
+    "fourk_quality": "2160p60",
+}
+
+# Module name of the scene file inside a render directory
+SCENE_MODULE = "scene"
+
+
+def create_render_dir(parent_dir: str, name: str) -> str:
+    """Create a fresh, private media directory for one render"""
+    os.makedirs(parent_dir, exist_ok=True)
+    return tempfile.mkdtemp(prefix=f".render_{name}_", dir=parent_dir)
+
+
+def write_scene_file(render_dir: str, code: str) -> str:
+    scene_path = os.path.join(render_dir, f"{SCENE_MODULE}.py")
+    with open(scene_path, "w", encoding="utf-8") as f:
+        f.write(code)
+    return scene_path
+
+
+def build_manim_command(
+    executable: List[str],
+    scene_path: str,
+    scene_name: str,
+    output_name: str,
+    render_dir: str,
+    quality: str,
+) -> List[str]:
+    """
+    Args:
+        executable: How to invoke manim, e.g. ["manim"] or [sys.executable, "-m", "manim"]
+        output_name: File name of the rendered video, without extension
+    """
+    return executable + [
+        scene_path,
+        scene_name,
+        "-o",
+        output_name,
+        "--media_dir",
+        render_dir,
+        "-v",
+        "WARNING",
+        QUALITY_FLAGS.get(quality, "-qm"),
+    ]
+
+
+def expected_output_path(render_dir: str, quality: str, output_name: str) -> str:
+    return os.path.join(
+        render_dir,
+        "videos",
+        SCENE_MODULE,
+        QUALITY_DIRS.get(quality, QUALITY_DIRS["medium_quality"]),
+        f"{output_name}.mp4",
+    )
+
+
+def locate_output(render_dir: str, quality: str, output_name: str) -> Optional[str]:
+    """
+    Return the rendered video inside a render directory. The deterministic
+    path is checked first; the fallback scan only covers this one render.
+    """
+    path = expected_output_path(render_dir, quality, output_name)
+    if os.path.exists(path):
+        return path
+
+    file_name = f"{output_name}.mp4"
+    for root, _, files in os.walk(os.path.join(render_dir, "videos")):
+        if file_name in files and "partial_movie_files" not in root:
+            return os.path.join(root, file_name)
+    return None
+
+
+def remove_render_dir(render_dir: str):
+    shutil.rmtree(render_dir, ignore_errors=True)
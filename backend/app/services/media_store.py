@@ -0,0 +1,192 @@
+"""
+Content-addressed media serving for videos and PDFs
+
+Finished files are registered under a digest of their content and served
+from /api/media/{digest}/{file_name}. Each registration is also written to
+an index directory as a small {digest}.json file, so any worker process, and
+the server after a restart, can resolve a URL another one handed out. Because a URL never changes meaning,
+responses carry a one-year immutable Cache-Control and the digest as ETag.
+Range requests (video seeking, PDF.js page fetches) are answered with 206
+by Starlette's FileResponse. When the server supports the ASGI pathsend
+extension, whole-file responses hand the path to the server so it can use
+sendfile instead of copying through Python.
+"""
+
+import asyncio
+import hashlib
+import json
+import mimetypes
+import os
+from typing import Dict, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.responses import FileResponse
+from starlette.types import Receive, Scope, Send
+
+from ..core.config import settings
+from ..utils.etag import is_not_modified
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# For URLs that are not content-addressed: cache, but revalidate by ETag
+REVALIDATE_CACHE_CONTROL = "no-cache"
+MEDIA_URL_PREFIX = "/api/media"
+DIGEST_LENGTH = 16
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:DIGEST_LENGTH]
+
+
+def _fingerprint(path: str) -> Tuple[int, int]:
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+class MediaRegistry:
+    """Maps content digests to files on disk"""
+
+    def __init__(self, index_dir: str):
+        self.index_dir = index_dir
+        os.makedirs(index_dir, exist_ok=True)
+        # digest -> (path, size, mtime_ns) at registration time; a cache of
+        # this process's view of the on-disk index
+        self.entries: Dict[str, Tuple[str, int, int]] = {}
+        self.digests: Dict[str, str] = {}
+
+    def _index_path(self, digest: str) -> str:
+        return os.path.join(self.index_dir, f"{digest}.json")
+
+    def _write_index(self, digest: str, entry: Tuple[str, int, int]):
+        path, size, mtime_ns = entry
+        index_path = self._index_path(digest)
+        temp_path = f"{index_path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"path": path, "size": size, "mtime_ns": mtime_ns}, f)
+        os.replace(temp_path, index_path)
+
+    def _read_index(self, digest: str) -> Optional[Tuple[str, int, int]]:
+        try:
+            with open(self._index_path(digest), encoding="utf-8") as f:
+                data = json.load(f)
+            return data["path"], data["size"], data["mtime_ns"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    async def digest_for(self, path: str) -> str:
+        """Digest of a file, hashed at most once per version of the file"""
+        path = os.path.abspath(path)
+        size, mtime_ns = _fingerprint(path)
+        digest = self.digests.get(path)
+        if digest and self.entries.get(digest) == (path, size, mtime_ns):
+            return digest
+
+        digest = await asyncio.to_thread(file_digest, path)
+        self.forget(path)
+        entry = (path, size, mtime_ns)
+        await asyncio.to_thread(self._write_index, digest, entry)
+        self.entries[digest] = entry
+        self.digests[path] = digest
+        return digest
+
+    async def register(self, path: str) -> str:
+        """Register a file and return its immutable URL"""
+        digest = await self.digest_for(path)
+        return f"{MEDIA_URL_PREFIX}/{digest}/{os.path.basename(path)}"
+
+    def resolve(self, digest: str) -> Optional[str]:
+        """Path for a digest, if the file still has the registered content"""
+        entry = self.entries.get(digest)
+        if entry is None:
+            # Registered by another worker or before a restart
+            entry = self._read_index(digest)
+            if entry is None:
+                return None
+            self.entries[digest] = entry
+            self.digests[entry[0]] = digest
+        path, size, mtime_ns = entry
+        try:
+            current = _fingerprint(path)
+        except OSError:
+            current = None
+        if current != (size, mtime_ns):
+            # The file changed or is gone, possibly via another worker
+            self._drop(digest)
+            return None
+        return path
+
+    def forget(self, path: str):
+        digest = self.digests.get(os.path.abspath(path))
+        if digest:
+            self._drop(digest)
+
+    def _drop(self, digest: str):
+        entry = self.entries.pop(digest, None)
+        if entry and self.digests.get(entry[0]) == digest:
+            del self.digests[entry[0]]
+        try:
+            os.remove(self._index_path(digest))
+        except OSError:
+            pass
+
+
+class MediaFileResponse(FileResponse):
+    """FileResponse that uses the pathsend extension for whole-file bodies"""
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        extensions = scope.get("extensions") or {}
+        whole_file = "range" not in {
+            key.decode("latin-1").lower() for key, _ in scope.get("headers", [])
+        }
+        if (
+            "http.response.pathsend" in extensions
+            and whole_file
+            and scope["method"].upper() != "HEAD"
+            and self.background is None
+        ):
+            stat_result = await asyncio.to_thread(os.stat, self.path)
+            self.set_stat_headers(stat_result)
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": self.status_code,
+                    "headers": self.raw_headers,
+                }
+            )
+            await send({"type": "http.response.pathsend", "path": str(self.path)})
+            return
+        await super().__call__(scope, receive, send)
+
+
+def media_response(
+    request: Request,
+    path: str,
+    digest: str,
+    media_type: Optional[str] = None,
+    cache_control: str = IMMUTABLE_CACHE_CONTROL,
+    headers: Optional[Dict[str, str]] = None,
+) -> Response:
+    """Serve a file with its digest as ETag, honouring If-None-Match and Range"""
+    etag = f'"{digest}"'
+    response_headers = {
+        "ETag": etag,
+        "Cache-Control": cache_control,
+        "Accept-Ranges": "bytes",
+        **(headers or {}),
+    }
+    if is_not_modified(request, etag):
+        return Response(status_code=304, headers=response_headers)
+
+    return MediaFileResponse(
+        path,
+        media_type=media_type or mimetypes.guess_type(path)[0],
+        headers=response_headers,
+    )
+
+
+# Global media registry
+media_registry = MediaRegistry(settings.MEDIA_INDEX_DIR)
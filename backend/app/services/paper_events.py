@@ -0,0 +1,56 @@
+"""
+Typed paper state events
+
+State transitions are published on the event bus next to the raw log lines,
+so WebSocket and SSE clients can follow a paper without polling. Every
+event carries the paper's revision; clients can ignore events whose
+revision is not newer than the snapshot they received on connect.
+"""
+
+import json
+from typing import Any, Dict
+
+from ..models.paper import Paper
+from .event_bus import event_bus
+
+STATE_PARSED = "parsed"  # PDF text extracted
+STATE_METADATA_READY = "metadata_ready"  # {"title", "authors"}
+STATE_CONCEPTS_READY = "concepts_ready"  # {"concepts_count"}
+STATE_CLIP_READY = "clip_ready"  # {"concept_id", "clip_index", "stream_path"}
+STATE_VIDEO_READY = "video_ready"  # {"concept_id", "video_path", "quality", "is_preview"}
+STATE_FAILED = "failed"  # {"stage", "concept_id"?, "error"?}
+
+EVENT_SNAPSHOT = "snapshot"
+
+
+def video_summary(paper: Paper) -> Dict[str, Dict[str, Any]]:
+    return {
+        concept_id: {
+            "status": concept_video.status.value,
+            "video_path": concept_video.video_path,
+            "stream_path": concept_video.stream_path,
+            "clips_ready": len(concept_video.clips_paths),
+            "quality": concept_video.quality,
+            "is_preview": concept_video.is_preview,
+        }
+        for concept_id, concept_video in paper.concept_videos.items()
+    }
+
+
+def snapshot_event(paper: Paper, status: Dict[str, Any]) -> str:
+    """Current state of a paper, sent first to every new subscriber"""
+    return json.dumps(
+        {"type": EVENT_SNAPSHOT, **status, "videos": video_summary(paper)},
+        default=str,
+    )
+
+
+async def publish_state(paper: Paper, state: str, **payload: Any):
+    message = json.dumps(
+        {"type": state, "paper_id": paper.id, "revision": paper.revision, **payload}
+    )
+    try:
+        await event_bus.publish(paper.id, message)
+    except Exception as e:
+        # State events are advisory; the status endpoints stay authoritative
+        print(f"Could not publish {state} event for paper {paper.id}: {e}")
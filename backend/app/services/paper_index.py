@@ -0,0 +1,131 @@
+"""
+Precomputed paper summaries for list and status endpoints
+
+Endpoints that are polled or list the whole library read small summary
+records from this index instead of serializing full Paper objects. Code
+that mutates a paper calls paper_changed(paper) afterwards so its records
+are rebuilt once, at write time.
+"""
+
+import bisect
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..models.paper import Paper, PaperResponse
+
+
+def _summarize(paper: Paper) -> PaperResponse:
+    return PaperResponse(
+        id=paper.id,
+        title=paper.title or paper.filename,
+        authors=paper.authors,
+        abstract=paper.abstract,
+        analysis_status=paper.analysis_status.value,
+        video_status=paper.video_status.value,
+        upload_time=paper.upload_time,
+        concepts_count=len(paper.concepts),
+        has_video=bool(paper.video_path),
+    )
+
+
+def _status(paper: Paper) -> Dict[str, Any]:
+    return {
+        "paper_id": paper.id,
+        "analysis_status": paper.analysis_status.value,
+        "video_status": paper.video_status.value,
+        "concepts_count": len(paper.concepts),
+        "has_content": bool(paper.content),
+        "has_video": bool(paper.video_path),
+        "revision": paper.revision,
+    }
+
+
+class PaperIndex:
+    """Summary and status records, ordered by upload time"""
+
+    def __init__(self):
+        self.summaries: Dict[str, PaperResponse] = {}
+        self.statuses: Dict[str, Dict[str, Any]] = {}
+        # Sorted (upload_time, paper_id) keys; the cursor is the last key seen
+        self.order: List[Tuple[datetime, str]] = []
+        # Bumped whenever any record changes; used for list ETags
+        self.version = 0
+
+    def update(self, paper: Paper):
+        if paper.id not in self.summaries:
+            bisect.insort(self.order, (paper.upload_time, paper.id))
+        self.summaries[paper.id] = _summarize(paper)
+        self.statuses[paper.id] = _status(paper)
+        self.version += 1
+
+    def remove(self, paper_id: str):
+        summary = self.summaries.pop(paper_id, None)
+        self.statuses.pop(paper_id, None)
+        if summary is not None:
+            self.version += 1
+            key = (summary.upload_time, paper_id)
+            position = bisect.bisect_left(self.order, key)
+            if position < len(self.order) and self.order[position] == key:
+                del self.order[position]
+
+    def status(self, paper_id: str) -> Optional[Dict[str, Any]]:
+        return self.statuses.get(paper_id)
+
+    def page(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+        analysis_status: Optional[str] = None,
+        video_status: Optional[str] = None,
+    ) -> Tuple[List[PaperResponse], Optional[str]]:
+        """
+        Up to `limit` summaries after `cursor` (a paper id from a previous
+        page), optionally filtered by status.
+
+        Returns:
+            (summaries, next_cursor) - next_cursor is None on the last page
+        """
+        start = 0
+        if cursor:
+            summary = self.summaries.get(cursor)
+            if summary is None:
+                raise KeyError(cursor)
+            start = bisect.bisect_right(self.order, (summary.upload_time, cursor))
+
+        items: List[PaperResponse] = []
+        for position in range(start, len(self.order)):
+            summary = self.summaries[self.order[position][1]]
+            if analysis_status and summary.analysis_status != analysis_status:
+                continue
+            if video_status and summary.video_status != video_status:
+                continue
+            if len(items) == limit:
+                return items, items[-1].id
+            items.append(summary)
+        return items, None
+
+    def count(
+        self, analysis_status: Optional[str] = None, video_status: Optional[str] = None
+    ) -> int:
+        if not analysis_status and not video_status:
+            return len(self.summaries)
+        return sum(
+            1
+            for summary in self.summaries.values()
+            if (not analysis_status or summary.analysis_status == analysis_status)
+            and (not video_status or summary.video_status == video_status)
+        )
+
+
+# Global paper index
+paper_index = PaperIndex()
+
+
+def paper_changed(paper: Paper):
+    """Bump the paper's revision and refresh its index records"""
+    paper.revision += 1
+    paper_index.update(paper)
+
+
+def paper_removed(paper_id: str):
+    paper_index.remove(paper_id)
@@ -5,9 +5,12 @@ Extracts text, metadata, and structure from research papers
 
 import pdfplumber
 import re
+import time
 from typing import Dict, List, Tuple
 from pathlib import Path
 
+from ..core.metrics import pdf_pages, pdf_parse_seconds
+
 
 class PDFParser:
     def __init__(self):
@@ -17,6 +20,7 @@ class PDFParser:
         """
         Parse PDF file and extract content, metadata, and structure
         """
+        started = time.perf_counter()
         try:
             # Open PDF document
             with pdfplumber.open(file_path) as pdf:
@@ -38,6 +42,9 @@ class PDFParser:
             # Clean the full text
             cleaned_text = self._clean_text(full_text)
 
+            pdf_parse_seconds.observe(time.perf_counter() - started, outcome="success")
+            pdf_pages.observe(len(page_texts))
+
             return {
                 "title": title,
                 "authors": authors,
@@ -50,6 +57,7 @@ class PDFParser:
 
         except Exception as e:
             print(f"✗ Error parsing PDF: {e}")
+            pdf_parse_seconds.observe(time.perf_counter() - started, outcome="error")
             return {
                 "title": "",
                 "authors": [],
@@ -0,0 +1,318 @@
+"""
+Per-render resource budgets for manim jobs
+
+Stdlib only: run_agent.py imports this from inside the agent virtualenv.
+Renders run in their own process group with rlimits on CPU time, address
+space and output file size, a wall-clock timeout, and a static frame-count
+check before anything is started. Any breach kills the whole group and is
+reported as a precise "exceeded budget" error for the repair loop.
+"""
+
+import ast
+import asyncio
+import os
+import signal
+import subprocess
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows: only the wall-clock limit applies
+    resource = None
+
+# Frame rate manim uses for each quality preset
+QUALITY_FRAME_RATES = {
+    "low_quality": 15,
+    "medium_quality": 30,
+    "high_quality": 60,
+    "production_quality": 60,
+    "fourk_quality": 60,
+}
+
+# How often a synchronous render checks for cancellation and its deadline
+CANCEL_POLL_SECONDS = 0.5
+RENDER_CANCELLED = "RENDER CANCELLED: another candidate finished first."
+
+
+class RenderBudget:
+    """Limits applied to a single manim render. A value of 0 disables that limit."""
+
+    ENV_NAMES = {
+        "wall_seconds": "RENDER_TIMEOUT_SECONDS",
+        "cpu_seconds": "RENDER_CPU_SECONDS",
+        "memory_mb": "RENDER_MAX_MEMORY_MB",
+        "output_mb": "RENDER_MAX_OUTPUT_MB",
+        "max_frames": "RENDER_MAX_FRAMES",
+    }
+
+    def __init__(
+        self,
+        wall_seconds: int = 300,
+        cpu_seconds: int = 600,
+        memory_mb: int = 4096,
+        output_mb: int = 512,
+        max_frames: int = 7200,
+    ):
+        self.wall_seconds = wall_seconds
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        self.output_mb = output_mb
+        self.max_frames = max_frames
+
+    @classmethod
+    def from_env(cls, env: Optional[Dict[str, str]] = None) -> "RenderBudget":
+        env = os.environ if env is None else env
+        budget = cls()
+        for attr, name in cls.ENV_NAMES.items():
+            if env.get(name):
+                setattr(budget, attr, int(env[name]))
+        return budget
+
+    def to_env(self) -> Dict[str, str]:
+        """Environment variables that reproduce this budget in a child process"""
+        return {name: str(getattr(self, attr)) for attr, name in self.ENV_NAMES.items()}
+
+
+def _number(node: ast.AST, default: float) -> float:
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+        return float(node.value)
+    return default
+
+
+def _call_seconds(call: ast.Call) -> float:
+    """Estimated duration of a self.play(...) / self.wait(...) call"""
+    func = call.func
+    if not (
+        isinstance(func, ast.Attribute)
+        and isinstance(func.value, ast.Name)
+        and func.value.id == "self"
+    ):
+        return 0.0
+
+    if func.attr == "wait":
+        duration = _number(call.args[0], 1.0) if call.args else 1.0
+        for keyword in call.keywords:
+            if keyword.arg == "duration":
+                duration = _number(keyword.value, 1.0)
+        return duration
+
+    if func.attr == "play":
+        for keyword in call.keywords:
+            if keyword.arg == "run_time":
+                return _number(keyword.value, 1.0)
+        return 1.0
+
+    return 0.0
+
+
+def _loop_multiplier(loop: ast.For) -> int:
+    """Iteration count of `for ... in range(<constants>)`, else 1"""
+    it = loop.iter
+    if (
+        isinstance(it, ast.Call)
+        and isinstance(it.func, ast.Name)
+        and it.func.id == "range"
+        and it.args
+        and all(isinstance(a, ast.Constant) and isinstance(a.value, int) for a in it.args)
+    ):
+        return max(len(range(*[a.value for a in it.args])), 0)
+    if isinstance(it, (ast.List, ast.Tuple)):
+        return len(it.elts)
+    return 1
+
+
+# Statement fields that hold nested statement lists (if/with/try/def/class...)
+BLOCK_FIELDS = ("body", "orelse", "finalbody", "handlers")
+
+
+def _estimate_body(nodes: List[ast.AST]) -> float:
+    total = 0.0
+    for node in nodes:
+        if isinstance(node, ast.For):
+            total += _loop_multiplier(node) * _estimate_body(node.body)
+            total += _estimate_body(node.orelse)
+        elif any(isinstance(getattr(node, field, None), list) for field in BLOCK_FIELDS):
+            for field in BLOCK_FIELDS:
+                total += _estimate_body(getattr(node, field, None) or [])
+        else:
+            for child in ast.walk(node):
+                if isinstance(child, ast.Call):
+                    total += _call_seconds(child)
+    return total
+
+
+def estimate_animation_seconds(code: str) -> float:
+    """
+    Static estimate of a scene's total animation time from its play/wait
+    calls, multiplying through constant-range for loops. Returns 0.0 for
+    code that does not parse (the render itself will report that).
+    """
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return 0.0
+    return _estimate_body(tree.body)
+
+
+def check_frame_budget(
+    code: str, quality: str, budget: RenderBudget, final_quality: Optional[str] = None
+) -> Optional[str]:
+    """
+    Return a budget error if the scene would render too many frames. A
+    preview is checked at the frame rate of final_quality too (whichever is
+    higher), so it never accepts a scene its quality upgrade would reject.
+    """
+    if not budget.max_frames:
+        return None
+
+    seconds = estimate_animation_seconds(code)
+    fps = max(
+        QUALITY_FRAME_RATES.get(q, 30) for q in (quality, final_quality or quality)
+    )
+    frames = int(seconds * fps)
+    if frames > budget.max_frames:
+        return (
+            f"RENDER BUDGET EXCEEDED: the scene animates for about {seconds:.0f}s "
+            f"({frames} frames at {fps}fps), over the limit of {budget.max_frames} frames. "
+            "Shorten wait() calls, run_time values and loop counts."
+        )
+    return None
+
+
+def limit_resources(budget: RenderBudget, niceness: int = 0) -> Callable[[], None]:
+    """preexec_fn that applies the budget's rlimits inside the child process"""
+
+    def apply():
+        if niceness:
+            os.nice(niceness)
+        if resource is None:
+            return
+        if budget.cpu_seconds:
+            # Soft limit sends SIGXCPU; the hard limit a little later is SIGKILL
+            resource.setrlimit(
+                resource.RLIMIT_CPU, (budget.cpu_seconds, budget.cpu_seconds + 5)
+            )
+        if budget.memory_mb:
+            limit = budget.memory_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        if budget.output_mb:
+            limit = budget.output_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_FSIZE, (limit, limit))
+
+    return apply
+
+
+def describe_failure(returncode: int, stderr: str, budget: RenderBudget) -> Optional[str]:
+    """Translate a render's exit status into a budget error, if a limit caused it"""
+    if returncode == -getattr(signal, "SIGXCPU", -1):
+        return f"RENDER BUDGET EXCEEDED: used more than {budget.cpu_seconds}s of CPU time."
+    if returncode == -signal.SIGKILL:
+        return (
+            "RENDER BUDGET EXCEEDED: the render was killed after hitting its CPU "
+            f"({budget.cpu_seconds}s) or memory ({budget.memory_mb} MB) limit."
+        )
+    if returncode == -getattr(signal, "SIGXFSZ", -1) or "File too large" in stderr:
+        return f"RENDER BUDGET EXCEEDED: output grew beyond {budget.output_mb} MB."
+    if "MemoryError" in stderr or "Cannot allocate memory" in stderr:
+        return f"RENDER BUDGET EXCEEDED: needed more than {budget.memory_mb} MB of memory."
+    return None
+
+
+def timeout_error(budget: RenderBudget) -> str:
+    return (
+        f"RENDER BUDGET EXCEEDED: the render ran longer than {budget.wall_seconds}s "
+        "and was killed. Make the scene shorter and simpler."
+    )
+
+
+def kill_group(pid: int):
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError, AttributeError):
+        pass
+
+
+def run_supervised(
+    cmd: List[str],
+    budget: RenderBudget,
+    niceness: int = 0,
+    cancel_event: Optional[threading.Event] = None,
+) -> Tuple[int, str, str, Optional[str]]:
+    """
+    Run a render synchronously under the budget. Setting cancel_event from
+    another thread kills the render.
+
+    Returns:
+        (returncode, stdout, stderr, budget_error)
+    """
+    process = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+        start_new_session=True,
+        preexec_fn=limit_resources(budget, niceness),
+    )
+    deadline = time.monotonic() + budget.wall_seconds if budget.wall_seconds else None
+    try:
+        while True:
+            try:
+                stdout, stderr = process.communicate(timeout=CANCEL_POLL_SECONDS)
+                break
+            except subprocess.TimeoutExpired:
+                if cancel_event is not None and cancel_event.is_set():
+                    kill_group(process.pid)
+                    stdout, stderr = process.communicate()
+                    return process.returncode, stdout, stderr, RENDER_CANCELLED
+                if deadline is not None and time.monotonic() > deadline:
+                    kill_group(process.pid)
+                    stdout, stderr = process.communicate()
+                    return process.returncode, stdout, stderr, timeout_error(budget)
+    except BaseException:
+        kill_group(process.pid)
+        process.wait()
+        raise
+
+    return (
+        process.returncode,
+        stdout,
+        stderr,
+        describe_failure(process.returncode, stderr, budget),
+    )
+
+
+async def run_supervised_async(
+    cmd: List[str], budget: RenderBudget, niceness: int = 0
+) -> Tuple[int, str, str, Optional[str]]:
+    """Async counterpart of run_supervised; cancellation kills the render"""
+    process = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        start_new_session=True,
+        preexec_fn=limit_resources(budget, niceness),
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(
+            process.communicate(), timeout=budget.wall_seconds or None
+        )
+    except asyncio.TimeoutError:
+        kill_group(process.pid)
+        await process.wait()
+        return process.returncode, "", "", timeout_error(budget)
+    except asyncio.CancelledError:
+        kill_group(process.pid)
+        await process.wait()
+        raise
+
+    stderr_text = stderr.decode("utf-8", errors="replace")
+    return (
+        process.returncode,
+        stdout.decode("utf-8", errors="replace"),
+        stderr_text,
+        describe_failure(process.returncode, stderr_text, budget),
+    )
@@ -0,0 +1,612 @@
+"""
+Pool of pre-warmed manim render workers
+
+Stdlib only: the workers run this module with the agent virtualenv's python.
+A cold `manim` run spends seconds importing manim, building the pango/cairo
+font state and loading LaTeX before it draws anything. A worker pays that
+once: it imports manim, renders a still warm-up frame with text and a
+formula, then takes jobs over stdin. Each job runs the manim CLI in a
+forked child, so it starts warm but keeps the isolation of a separate
+process: its own session, the render budget's rlimits and deadline, and a
+crashing scene never takes the worker down.
+
+The pool starts its minimum number of workers in the background, pings a
+worker before handing it out, starts another one for every job left
+waiting (up to the maximum) and retires workers that sit idle. When no
+worker can be started, e.g. manim is not importable by the pool's
+interpreter, render() returns None and callers run the CLI directly.
+"""
+
+import asyncio
+import json
+import os
+import select
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .render_limits import (
+    CANCEL_POLL_SECONDS,
+    RENDER_CANCELLED,
+    RenderBudget,
+    describe_failure,
+    kill_group,
+    limit_resources,
+    timeout_error,
+)
+from .tex_cache import TexCache
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
+# A worker imports manim and compiles the warm-up formula before it is ready
+STARTUP_TIMEOUT_SECONDS = 120.0
+HEALTH_CHECK_TIMEOUT_SECONDS = 5.0
+# How long past the render deadline a silent worker is given up on
+RESULT_GRACE_SECONDS = 30.0
+# Captured manim output returned per job (the tail is kept)
+OUTPUT_LIMIT_BYTES = 1024 * 1024
+
+
+class RenderWorkerError(Exception):
+    pass
+
+
+class LineChannel:
+    """Newline-delimited JSON messages over a pair of pipe descriptors"""
+
+    def __init__(self, read_fd: int, write_fd: int):
+        self.read_fd = read_fd
+        self.write_fd = write_fd
+        self.buffer = b""
+
+    def send(self, message: Dict[str, Any]):
+        data = (json.dumps(message) + "\n").encode("utf-8")
+        while data:
+            written = os.write(self.write_fd, data)
+            data = data[written:]
+
+    def receive(
+        self, timeout: Optional[float], wake_fd: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Next message, or None if none arrives within the timeout or wake_fd
+        becomes readable first. Raises EOFError once the other end has
+        closed the pipe.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            line, newline, rest = self.buffer.partition(b"\n")
+            if newline:
+                self.buffer = rest
+                try:
+                    return json.loads(line)
+                except ValueError:
+                    continue
+
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return None
+            watched = [self.read_fd] if wake_fd is None else [self.read_fd, wake_fd]
+            ready, _, _ = select.select(watched, [], [], remaining)
+            if self.read_fd not in ready:
+                return None
+            chunk = os.read(self.read_fd, 65536)
+            if not chunk:
+                raise EOFError
+            self.buffer += chunk
+
+
+# --- Worker process ---
+
+
+def _warm_up() -> Dict[str, bool]:
+    """Render still frames with text and a formula to load fonts and LaTeX"""
+    import manim
+    import manim.__main__  # noqa: F401 - the CLI module every job runs
+
+    warmed = {}
+    mobjects = {
+        "text": lambda: manim.Text("Warm up"),
+        "tex": lambda: manim.MathTex(r"\int_0^1 x^2 \, dx"),
+    }
+    with tempfile.TemporaryDirectory(prefix="render_warmup_") as media_dir:
+        for name, make_mobject in mobjects.items():
+
+            class WarmUpScene(manim.Scene):
+                def construct(self):
+                    self.add(make_mobject())
+
+            try:
+                with manim.tempconfig(
+                    {
+                        "media_dir": media_dir,
+                        "pixel_width": 854,
+                        "pixel_height": 480,
+                        "frame_rate": 15,
+                        "save_last_frame": True,
+                        "write_to_movie": False,
+                        "verbosity": "ERROR",
+                    }
+                ):
+                    WarmUpScene().render()
+                warmed[name] = True
+            except Exception as e:
+                # LaTeX may simply not be installed; text-only scenes still benefit
+                print(f"Render worker warm-up ({name}) failed: {e}", file=sys.stderr)
+                warmed[name] = False
+    return warmed
+
+
+def _kill_render(pid: int):
+    kill_group(pid)
+    try:
+        # The child may not have created its own process group yet
+        os.kill(pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+def _read_output(capture) -> str:
+    size = capture.seek(0, os.SEEK_END)
+    capture.seek(max(size - OUTPUT_LIMIT_BYTES, 0))
+    return capture.read().decode("utf-8", errors="replace")
+
+
+def _render_child(
+    channel: LineChannel,
+    exit_fd: int,
+    args: List[str],
+    budget: RenderBudget,
+    niceness: int,
+    stdout,
+    stderr,
+):
+    """Runs in the forked child: apply the budget and call the manim CLI"""
+    code = 1
+    try:
+        # Only the worker talks to the pool; a render that outlives a dead
+        # worker must not keep the pipes open
+        os.close(channel.write_fd)
+        os.close(exit_fd)
+        os.dup2(os.open(os.devnull, os.O_RDONLY), channel.read_fd)
+        os.setsid()
+        limit_resources(budget, niceness)()
+        os.dup2(stdout.fileno(), 1)
+        os.dup2(stderr.fileno(), 2)
+        from manim.__main__ import main as manim_cli
+
+        manim_cli.main(args=args, prog_name="manim")
+        code = 0
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    except BaseException:
+        traceback.print_exc()
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(code)
+
+
+def _run_job(channel: LineChannel, request: Dict[str, Any]) -> Dict[str, Any]:
+    budget = RenderBudget.from_env(request.get("budget", {}))
+    with tempfile.TemporaryFile() as stdout, tempfile.TemporaryFile() as stderr:
+        # The child holds the write end, so the read end turns readable
+        # (EOF) the moment it exits; the pipe is not inherited by anything
+        # the child execs
+        exit_read, exit_write = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            _render_child(
+                channel,
+                exit_read,
+                request["args"],
+                budget,
+                request.get("niceness", 0),
+                stdout,
+                stderr,
+            )
+        os.close(exit_write)
+
+        deadline = time.monotonic() + budget.wall_seconds if budget.wall_seconds else None
+        budget_error = None
+        while True:
+            finished, status = os.waitpid(pid, os.WNOHANG)
+            if finished:
+                break
+            try:
+                message = channel.receive(CANCEL_POLL_SECONDS, wake_fd=exit_read)
+            except EOFError:
+                _kill_render(pid)
+                os.waitpid(pid, 0)
+                os.close(exit_read)
+                raise
+            if message and message.get("op") == "cancel":
+                budget_error = RENDER_CANCELLED
+            elif deadline is not None and time.monotonic() > deadline:
+                budget_error = timeout_error(budget)
+            if budget_error:
+                _kill_render(pid)
+                _, status = os.waitpid(pid, 0)
+                break
+
+        os.close(exit_read)
+        returncode = os.waitstatus_to_exitcode(status)
+        stdout_text = _read_output(stdout)
+        stderr_text = _read_output(stderr)
+
+    return {
+        "type": "result",
+        "returncode": returncode,
+        "stdout": stdout_text,
+        "stderr": stderr_text,
+        "budget_error": budget_error or describe_failure(returncode, stderr_text, budget),
+    }
+
+
+def serve():
+    """Worker entry point: python -m app.services.render_pool"""
+    # stdout carries the protocol; anything manim prints goes to stderr
+    channel = LineChannel(0, os.dup(1))
+    os.dup2(2, 1)
+
+    started = time.monotonic()
+    try:
+        warmed = _warm_up()
+    except Exception as e:
+        channel.send({"type": "ready", "ok": False, "error": str(e)})
+        return
+    if os.environ.get("TEX_CACHE_DIR"):
+        try:
+            TexCache(os.environ["TEX_CACHE_DIR"]).install()
+        except Exception as e:
+            # Renders still work, they just compile every formula themselves
+            print(f"Render worker could not hook the TeX cache: {e!r}", file=sys.stderr)
+    channel.send(
+        {
+            "type": "ready",
+            "ok": True,
+            "warmed": warmed,
+            "seconds": round(time.monotonic() - started, 3),
+        }
+    )
+
+    while True:
+        try:
+            request = channel.receive(None)
+        except EOFError:
+            return
+        op = request.get("op") if request else None
+        if op == "ping":
+            channel.send({"type": "pong"})
+        elif op == "render":
+            try:
+                channel.send(_run_job(channel, request))
+            except EOFError:
+                return
+        # A cancel that arrives after its job finished is simply dropped
+
+
+# --- Client side ---
+
+
+def worker_command(python: str) -> List[str]:
+    return [python, "-m", "app.services.render_pool"]
+
+
+def worker_env(tex_cache_dir: str = "") -> Dict[str, str]:
+    """
+    Environment that lets the worker interpreter import the app package,
+    and points its renders at the shared TeX cache when one is given
+    """
+    pythonpath = os.environ.get("PYTHONPATH")
+    return {
+        **os.environ,
+        "PYTHONPATH": (
+            f"{BACKEND_DIR}{os.pathsep}{pythonpath}" if pythonpath else str(BACKEND_DIR)
+        ),
+        "TEX_CACHE_DIR": tex_cache_dir,
+    }
+
+
+class RenderWorker:
+    """Client handle for one warm worker process"""
+
+    def __init__(self, command: List[str], env: Optional[Dict[str, str]] = None):
+        self.command = command
+        self.env = env
+        self.process: Optional[subprocess.Popen] = None
+        self.channel: Optional[LineChannel] = None
+
+    def start(self, timeout: float = STARTUP_TIMEOUT_SECONDS) -> Dict[str, Any]:
+        """Start the process and wait until its warm-up has finished"""
+        try:
+            self.process = subprocess.Popen(
+                self.command,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                env=self.env,
+                start_new_session=True,
+            )
+        except OSError as e:
+            raise RenderWorkerError(f"could not start {self.command[0]}: {e}")
+        self.channel = LineChannel(self.process.stdout.fileno(), self.process.stdin.fileno())
+
+        try:
+            ready = self.channel.receive(timeout)
+        except EOFError:
+            ready = {"ok": False, "error": f"exited with code {self.process.wait()}"}
+        if ready is None:
+            ready = {"ok": False, "error": f"not ready after {timeout:.0f}s"}
+        if not ready.get("ok"):
+            self.close()
+            raise RenderWorkerError(ready.get("error", "warm-up failed"))
+        return ready
+
+    def alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def ping(self, timeout: float = HEALTH_CHECK_TIMEOUT_SECONDS) -> bool:
+        if not self.alive():
+            return False
+        try:
+            self.channel.send({"op": "ping"})
+            return (self.channel.receive(timeout) or {}).get("type") == "pong"
+        except (OSError, EOFError):
+            return False
+
+    def render(
+        self,
+        args: List[str],
+        budget: RenderBudget,
+        niceness: int = 0,
+        cancel_event: Optional[threading.Event] = None,
+    ) -> Tuple[int, str, str, Optional[str]]:
+        """
+        Run one manim CLI invocation (arguments without the executable).
+        Setting cancel_event from another thread kills the render. A worker
+        that stays silent past the deadline or dies mid-job is killed and the
+        job is reported as failed; it is not handed back for a cold retry.
+
+        Returns:
+            (returncode, stdout, stderr, budget_error), like run_supervised
+        """
+        deadline = (
+            time.monotonic() + budget.wall_seconds + RESULT_GRACE_SECONDS
+            if budget.wall_seconds
+            else None
+        )
+        cancel_sent = False
+        try:
+            self.channel.send(
+                {
+                    "op": "render",
+                    "args": args,
+                    "budget": budget.to_env(),
+                    "niceness": niceness,
+                }
+            )
+            while True:
+                result = self.channel.receive(CANCEL_POLL_SECONDS)
+                if result is not None and result.get("type") == "result":
+                    return (
+                        result["returncode"],
+                        result["stdout"],
+                        result["stderr"],
+                        result["budget_error"],
+                    )
+                if cancel_event is not None and cancel_event.is_set() and not cancel_sent:
+                    self.channel.send({"op": "cancel"})
+                    cancel_sent = True
+                if deadline is not None and time.monotonic() > deadline:
+                    self.kill()
+                    return -signal.SIGKILL, "", "", timeout_error(budget)
+        except (OSError, EOFError) as e:
+            self.kill()
+            if cancel_sent:
+                return -signal.SIGKILL, "", "", RENDER_CANCELLED
+            error = f"Render worker exited during the render: {e!r}"
+            return self.process.returncode or -1, "", error, None
+
+    def kill(self):
+        kill_group(self.process.pid)
+        self.process.wait()
+
+    def close(self):
+        if self.process is None:
+            return
+        try:
+            # EOF on stdin makes the worker exit after its current job
+            self.process.stdin.close()
+            self.process.wait(timeout=2)
+        except (OSError, subprocess.TimeoutExpired):
+            kill_group(self.process.pid)
+            self.process.wait()
+        self.process.stdout.close()
+
+
+class RenderPool:
+    def __init__(
+        self,
+        command: List[str],
+        min_size: int = 1,
+        max_size: int = 2,
+        idle_seconds: float = 300.0,
+        env: Optional[Dict[str, str]] = None,
+    ):
+        self.command = command
+        self.min_size = min_size
+        self.max_size = max(max_size, min_size, 1)
+        self.idle_seconds = idle_seconds
+        self.env = env
+        # (idle since, worker), most recently used last
+        self.idle: List[Tuple[float, RenderWorker]] = []
+        self.busy = 0
+        self.starting = 0
+        self.waiting = 0
+        # Set once a worker fails to start: every worker runs the same
+        # interpreter, so callers go straight to the CLI from then on
+        self.broken = False
+        self.closed = False
+        self._condition = threading.Condition()
+
+    def start(self):
+        """Start the minimum number of workers; they warm up in the background"""
+        with self._condition:
+            for _ in range(self.min_size - self.size()):
+                self._spawn()
+
+    def size(self) -> int:
+        return len(self.idle) + self.busy + self.starting
+
+    def stats(self) -> Dict[str, Any]:
+        with self._condition:
+            return {
+                "idle": len(self.idle),
+                "busy": self.busy,
+                "starting": self.starting,
+                "waiting": self.waiting,
+                "broken": self.broken,
+            }
+
+    def _spawn(self):
+        # Called with the condition held
+        self.starting += 1
+        threading.Thread(target=self._start_worker, daemon=True).start()
+
+    def _start_worker(self):
+        worker = RenderWorker(self.command, self.env)
+        try:
+            ready = worker.start()
+            print(
+                f"Render worker ready in {ready.get('seconds')}s "
+                f"(warmed: {ready.get('warmed')})",
+                file=sys.stderr,
+            )
+        except RenderWorkerError as e:
+            print(f"Render worker failed to start: {e}", file=sys.stderr)
+            worker = None
+
+        with self._condition:
+            self.starting -= 1
+            if worker is None:
+                self.broken = True
+            elif self.closed:
+                worker.close()
+            else:
+                self.idle.append((time.monotonic(), worker))
+            self._condition.notify_all()
+
+    def _retire_idle(self) -> List[RenderWorker]:
+        """Idle workers past the minimum that have not been used for a while"""
+        # Called with the condition held
+        retired = []
+        now = time.monotonic()
+        while (
+            self.idle
+            and self.size() > self.min_size
+            and now - self.idle[0][0] > self.idle_seconds
+        ):
+            retired.append(self.idle.pop(0)[1])
+        return retired
+
+    def _take(self, cancel_event: Optional[threading.Event]) -> Optional[RenderWorker]:
+        with self._condition:
+            self.waiting += 1
+            try:
+                while True:
+                    if self.broken or self.closed:
+                        return None
+                    if cancel_event is not None and cancel_event.is_set():
+                        return None
+                    if self.idle:
+                        _, worker = self.idle.pop()
+                        self.busy += 1
+                        return worker
+                    # One new worker per job left waiting, up to the maximum
+                    if self.starting < self.waiting and self.size() < self.max_size:
+                        self._spawn()
+                    self._condition.wait(CANCEL_POLL_SECONDS)
+            finally:
+                self.waiting -= 1
+
+    def acquire(self, cancel_event: Optional[threading.Event] = None) -> Optional[RenderWorker]:
+        """A healthy warm worker, or None if the pool cannot provide one"""
+        while True:
+            worker = self._take(cancel_event)
+            if worker is None or worker.ping():
+                return worker
+            print("Render worker failed its health check; replacing it", file=sys.stderr)
+            self.release(worker)
+
+    def release(self, worker: RenderWorker):
+        with self._condition:
+            self.busy -= 1
+            healthy = worker.alive() and not self.closed
+            if healthy:
+                self.idle.append((time.monotonic(), worker))
+            retired = self._retire_idle()
+            if not healthy and not self.closed and self.size() < self.min_size:
+                self._spawn()
+            self._condition.notify_all()
+        if not healthy:
+            retired.append(worker)
+        for old_worker in retired:
+            old_worker.close()
+
+    def render(
+        self,
+        args: List[str],
+        budget: RenderBudget,
+        niceness: int = 0,
+        cancel_event: Optional[threading.Event] = None,
+    ) -> Optional[Tuple[int, str, str, Optional[str]]]:
+        """
+        Render on a warm worker. Returns None when no worker could be had for
+        the job, in which case the caller should run the manim CLI itself;
+        once a worker has taken the job its outcome is returned as is.
+        """
+        worker = self.acquire(cancel_event)
+        if worker is None:
+            if cancel_event is not None and cancel_event.is_set():
+                return -signal.SIGKILL, "", "", RENDER_CANCELLED
+            return None
+        try:
+            return worker.render(args, budget, niceness, cancel_event)
+        finally:
+            self.release(worker)
+
+    async def render_async(
+        self, args: List[str], budget: RenderBudget, niceness: int = 0
+    ) -> Optional[Tuple[int, str, str, Optional[str]]]:
+        """Async counterpart of render; cancellation kills the render"""
+        cancel_event = threading.Event()
+        job = asyncio.ensure_future(
+            asyncio.to_thread(self.render, args, budget, niceness, cancel_event)
+        )
+        try:
+            return await asyncio.shield(job)
+        except asyncio.CancelledError:
+            cancel_event.set()
+            await asyncio.wait([job])
+            raise
+
+    def close(self):
+        with self._condition:
+            self.closed = True
+            idle = [worker for _, worker in self.idle]
+            self.idle = []
+            self._condition.notify_all()
+        for worker in idle:
+            worker.close()
+
+
+if __name__ == "__main__":
+    serve()
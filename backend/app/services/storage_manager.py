@@ -0,0 +1,292 @@
+"""
+Storage lifecycle for uploaded PDFs, clip directories and videos
+
+Tracks the files written for each paper so deleting a paper removes all of
+them, trims clip directories down to their scene sources once a video has
+been stitched, evicts the least recently watched videos when the video and
+clip directories grow past the quota, and periodically sweeps files that
+no paper owns (e.g. after a restart, since papers live in memory).
+"""
+
+import asyncio
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional, Set, Tuple
+
+from ..core.config import settings
+from ..core.metrics import storage_bytes
+from ..models.paper import Paper, VideoStatus
+from .job_logs import job_logs
+from .media_store import media_registry
+from .paper_index import paper_changed
+from .video_stream import stream_dir_for
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
+# Clip directory entries that survive intermediate cleanup: the validated
+# scene sources, which the quality upgrade re-renders from
+KEEP_SUFFIXES = (".py",)
+
+# Temporary work directories left behind by an interrupted render or stitch
+TEMP_PREFIXES = (".render_", ".stitch_")
+
+
+def _remove_path(path: str) -> int:
+    """Delete a file or directory tree and return the bytes freed"""
+    size = _disk_usage(path)
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path, ignore_errors=True)
+    elif os.path.lexists(path):
+        try:
+            os.remove(path)
+        except OSError as e:
+            print(f"Could not remove {path}: {e}")
+            return 0
+    return size
+
+
+def _disk_usage(path: str) -> int:
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def _owner(entry_name: str) -> Tuple[str, Optional[str]]:
+    """(paper_id, concept_id) encoded in a "{paper_id}_{concept_id}..." name"""
+    paper_id, _, rest = os.path.splitext(entry_name)[0].partition("_")
+    concept_id = rest.split("_", 1)[0] if rest else None
+    return paper_id, concept_id
+
+
+class StorageManager:
+    def __init__(
+        self,
+        clips_dir: str,
+        videos_dir: str,
+        upload_dir: str,
+        quota_bytes: int = 0,
+        orphan_grace_seconds: int = 3600,
+    ):
+        self.clips_dir = clips_dir
+        self.videos_dir = videos_dir
+        self.upload_dir = upload_dir
+        self.quota_bytes = quota_bytes
+        self.orphan_grace_seconds = orphan_grace_seconds
+        # paper_id -> every path written for it
+        self.artifacts: Dict[str, Set[str]] = {}
+        # final video path -> last time it was served
+        self.last_access: Dict[str, float] = {}
+        # Concept prefixes of running video jobs
+        self.active_jobs: Set[str] = set()
+        # Job completions and the sweeper both enforce the quota; one pass at
+        # a time, so two passes never measure usage before the other evicts
+        self._quota_lock = asyncio.Lock()
+
+        for directory in (clips_dir, videos_dir, upload_dir):
+            os.makedirs(directory, exist_ok=True)
+
+    # --- Layout ---
+
+    def concept_prefix(self, paper_id: str, concept_id: str) -> str:
+        return f"{paper_id}_{concept_id}"
+
+    def clip_dir(self, paper_id: str, concept_id: str) -> str:
+        return os.path.join(self.clips_dir, self.concept_prefix(paper_id, concept_id))
+
+    def final_video_path(self, paper_id: str, concept_id: str) -> str:
+        prefix = self.concept_prefix(paper_id, concept_id)
+        return os.path.join(self.videos_dir, f"{prefix}_final.mp4")
+
+    def concept_artifacts(self, paper_id: str, concept_id: str) -> List[str]:
+        prefix = self.concept_prefix(paper_id, concept_id)
+        return [
+            self.clip_dir(paper_id, concept_id),
+            self.final_video_path(paper_id, concept_id),
+            stream_dir_for(self.videos_dir, prefix),
+        ]
+
+    # --- Tracking ---
+
+    def track(self, paper_id: str, path: str):
+        self.artifacts.setdefault(paper_id, set()).add(os.path.abspath(path))
+
+    def job_started(self, paper_id: str, concept_id: str):
+        self.active_jobs.add(self.concept_prefix(paper_id, concept_id))
+
+    def job_finished(self, paper_id: str, concept_id: str):
+        self.active_jobs.discard(self.concept_prefix(paper_id, concept_id))
+
+    def touch(self, path: str):
+        """Record that a video was served, for LRU eviction"""
+        self.last_access[os.path.abspath(path)] = time.time()
+
+    # --- Cleanup ---
+
+    async def remove_intermediates(self, paper: Paper, concept_id: str) -> int:
+        """
+        Delete everything in a concept's clip directory except the scene
+        sources: rendered clips (already stitched and segmented into the
+        stream), manim media trees, Tex caches and leftover render
+        directories. The concept's clips_paths are cleared in the same step;
+        the caller bumps the paper's revision.
+        """
+        concept_video = paper.concept_videos.get(concept_id)
+        if concept_video is not None:
+            concept_video.clips_paths = []
+        return await asyncio.to_thread(
+            self._remove_intermediates, self.clip_dir(paper.id, concept_id)
+        )
+
+    def _remove_intermediates(self, clip_dir: str) -> int:
+        freed = 0
+        if not os.path.isdir(clip_dir):
+            return freed
+        for entry in os.scandir(clip_dir):
+            if entry.is_file() and entry.name.endswith(KEEP_SUFFIXES):
+                continue
+            freed += _remove_path(entry.path)
+        return freed
+
+    async def delete_paper(self, paper: Paper) -> int:
+        """Remove every file belonging to a paper"""
+        paths = set(self.artifacts.pop(paper.id, set()))
+        paths.add(os.path.abspath(paper.file_path))
+        for concept_id in paper.concept_videos:
+            paths.update(
+                os.path.abspath(path) for path in self.concept_artifacts(paper.id, concept_id)
+            )
+            job_logs.discard(self.concept_prefix(paper.id, concept_id))
+
+        for path in paths:
+            media_registry.forget(path)
+            self.last_access.pop(path, None)
+        return await asyncio.to_thread(lambda: sum(_remove_path(p) for p in paths))
+
+    # --- Quota ---
+
+    def usage(self) -> int:
+        return _disk_usage(self.videos_dir) + _disk_usage(self.clips_dir)
+
+    def _eviction_candidates(
+        self, papers: Mapping[str, Paper]
+    ) -> List[Tuple[float, Paper, str]]:
+        candidates = []
+        for paper in papers.values():
+            for concept_id, concept_video in paper.concept_videos.items():
+                if concept_video.status != VideoStatus.COMPLETED:
+                    continue
+                if self.concept_prefix(paper.id, concept_id) in self.active_jobs:
+                    continue
+                video_path = os.path.abspath(self.final_video_path(paper.id, concept_id))
+                if not os.path.exists(video_path):
+                    continue
+                last_used = self.last_access.get(video_path) or os.path.getmtime(video_path)
+                candidates.append((last_used, paper, concept_id))
+        candidates.sort(key=lambda candidate: candidate[0])
+        return candidates
+
+    async def enforce_quota(self, papers: Mapping[str, Paper]) -> int:
+        """
+        Evict the least recently served completed videos until usage is
+        under the quota. Evicted concepts go back to not_started so they can
+        be generated again. Returns the bytes freed.
+        """
+        if not self.quota_bytes:
+            return 0
+
+        async with self._quota_lock:
+            return await self._enforce_quota(papers)
+
+    async def _enforce_quota(self, papers: Mapping[str, Paper]) -> int:
+        usage = await asyncio.to_thread(self.usage)
+        freed = 0
+        for _, paper, concept_id in self._eviction_candidates(papers):
+            if usage - freed <= self.quota_bytes:
+                break
+            paths = [os.path.abspath(p) for p in self.concept_artifacts(paper.id, concept_id)]
+            for path in paths:
+                media_registry.forget(path)
+                self.last_access.pop(path, None)
+            freed += await asyncio.to_thread(lambda: sum(_remove_path(p) for p in paths))
+
+            concept_video = paper.concept_videos[concept_id]
+            concept_video.status = VideoStatus.NOT_STARTED
+            concept_video.video_path = None
+            concept_video.stream_path = None
+            concept_video.clips_paths = []
+            paper_changed(paper)
+            print(f"Evicted cold video {paper.id}/{concept_id}")
+        storage_bytes.set(usage - freed)
+        return freed
+
+    # --- Sweeping ---
+
+    def _is_stale(self, path: str, max_age: float) -> bool:
+        try:
+            return time.time() - os.path.getmtime(path) > max_age
+        except OSError:
+            return False
+
+    def _sweep_dir(self, directory: str, papers: Mapping[str, Paper]) -> int:
+        freed = 0
+        if not os.path.isdir(directory):
+            return freed
+        for entry in os.scandir(directory):
+            if entry.name.startswith(TEMP_PREFIXES):
+                if self._is_stale(entry.path, self.orphan_grace_seconds):
+                    freed += _remove_path(entry.path)
+                continue
+
+            paper_id, concept_id = _owner(entry.name)
+            if concept_id and self.concept_prefix(paper_id, concept_id) in self.active_jobs:
+                continue
+            paper = papers.get(paper_id)
+            owned = paper is not None and (
+                directory == self.upload_dir or concept_id in paper.concept_videos
+            )
+            if not owned and self._is_stale(entry.path, self.orphan_grace_seconds):
+                freed += _remove_path(entry.path)
+        return freed
+
+    async def sweep(self, papers: Mapping[str, Paper]) -> int:
+        """
+        Reconcile disk with the paper store: delete files whose paper or
+        concept no longer exists and stale temp directories, then enforce
+        the quota. Only files older than the grace period are touched, so
+        in-flight uploads and renders are safe.
+        """
+        freed = 0
+        for directory in (self.clips_dir, self.videos_dir, self.upload_dir, job_logs.log_dir):
+            freed += await asyncio.to_thread(self._sweep_dir, directory, papers)
+        freed += await self.enforce_quota(papers)
+        storage_bytes.set(await asyncio.to_thread(self.usage))
+        return freed
+
+    async def run_sweeper(self, papers: Mapping[str, Paper], interval_seconds: float):
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                freed = await self.sweep(papers)
+                if freed:
+                    print(f"Storage sweep freed {freed / (1024 * 1024):.1f} MB")
+            except Exception as e:
+                print(f"Storage sweep failed: {e}")
+
+
+# Global storage manager
+storage_manager = StorageManager(
+    clips_dir=str(BACKEND_DIR / settings.CLIPS_DIR),
+    videos_dir=str(BACKEND_DIR / settings.VIDEO_DIR),
+    upload_dir=str(BACKEND_DIR / settings.UPLOAD_DIR),
+    quota_bytes=settings.STORAGE_QUOTA_MB * 1024 * 1024,
+    orphan_grace_seconds=settings.STORAGE_ORPHAN_GRACE_SECONDS,
+)
@@ -0,0 +1,181 @@
+"""
+Shared LaTeX / text SVG cache for manim renders
+
+Stdlib only: run_agent.py imports this from inside the agent virtualenv.
+Manim names compiled Tex and Text SVGs after a hash of their source and
+skips compilation when the SVG already exists in the media directory's
+Tex/ and texts/ folders. Every render keeps its private media directory.
+Render workers install() a hook that links a cached SVG into it on demand,
+as soon as manim has named the file and before it checks for it, so a
+render touches only the entries it uses. After a successful render any new
+SVGs are hard-linked back. Links are created atomically and only from
+finished renders, so concurrent renders never see partially written files.
+Cold CLI renders run without the hook and only publish. The cache is
+trimmed by least recent use.
+"""
+
+import os
+import shutil
+import threading
+from typing import Dict
+
+# Media subdirectories manim uses for LaTeX and Pango output
+CACHE_SUBDIRS = ("Tex", "texts")
+
+
+def _link_or_copy(src: str, dst: str) -> bool:
+    try:
+        os.link(src, dst)
+    except FileExistsError:
+        return False
+    except OSError:
+        # Different filesystem: fall back to a copy renamed into place
+        tmp = f"{dst}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            shutil.copyfile(src, tmp)
+            os.replace(tmp, dst)
+        except OSError:
+            return False
+    return True
+
+
+def _same_file(a: str, b: str) -> bool:
+    try:
+        return os.path.samefile(a, b)
+    except OSError:
+        return False
+
+
+class TexCache:
+    def __init__(self, root: str, max_mb: int = 512):
+        self.root = root
+        self.max_bytes = max_mb * 1024 * 1024
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def fetch(self, subdir: str, name: str, private_dir: str) -> bool:
+        """Link one cached SVG into a render's media directory, if cached"""
+        shared_path = os.path.join(self.root, subdir, name)
+        if not os.path.exists(shared_path):
+            return False
+        os.makedirs(private_dir, exist_ok=True)
+        return _link_or_copy(shared_path, os.path.join(private_dir, name))
+
+    def install(self):
+        """
+        Hook manim in this process to fetch() cached SVGs by hash. Render
+        workers call this once; the renders they fork inherit it.
+        """
+        from manim import config
+        from manim.mobject.text import text_mobject
+        from manim.utils import tex_file_writing
+
+        generate_tex_file = tex_file_writing.generate_tex_file
+
+        def generate_tex_file_cached(*args, **kwargs):
+            # The .tex file is named after the formula's hash; manim looks
+            # for the SVG next to it before compiling
+            tex_file = generate_tex_file(*args, **kwargs)
+            name = os.path.splitext(os.path.basename(tex_file))[0] + ".svg"
+            self.fetch("Tex", name, os.path.dirname(tex_file))
+            return tex_file
+
+        def text_hash_cached(text_hash):
+            def wrapper(mobject, *args, **kwargs):
+                hash_name = text_hash(mobject, *args, **kwargs)
+                self.fetch("texts", f"{hash_name}.svg", str(config.get_dir("text_dir")))
+                return hash_name
+
+            return wrapper
+
+        tex_file_writing.generate_tex_file = generate_tex_file_cached
+        for cls in (text_mobject.Text, text_mobject.MarkupText):
+            # The method that names the SVG differs between manim versions
+            for method in ("_text2hash", "_gen_hash"):
+                if method in vars(cls):
+                    setattr(cls, method, text_hash_cached(vars(cls)[method]))
+
+    def publish(self, render_dir: str) -> Dict[str, int]:
+        """
+        Link new SVGs from a successful render into the shared cache and
+        count LaTeX hits (formulas whose SVG came from the cache) and misses.
+        Text SVGs are shared too, but manim leaves no trace of which cached
+        ones it used, so they are not counted.
+        """
+        hits = misses = published = 0
+        for subdir in CACHE_SUBDIRS:
+            shared_dir = os.path.join(self.root, subdir)
+            private_dir = os.path.join(render_dir, subdir)
+            if not os.path.isdir(private_dir):
+                continue
+            os.makedirs(shared_dir, exist_ok=True)
+            entries = list(os.scandir(private_dir))
+
+            # Count before publishing: a fetched SVG is the cached file itself
+            if subdir == "Tex":
+                for entry in entries:
+                    if not entry.name.endswith(".tex"):
+                        continue
+                    # Manim writes the .tex for every formula it uses
+                    svg_name = entry.name[: -len(".tex")] + ".svg"
+                    shared_path = os.path.join(shared_dir, svg_name)
+                    if _same_file(os.path.join(private_dir, svg_name), shared_path):
+                        hits += 1
+                        self._touch(shared_path)
+                    else:
+                        misses += 1
+
+            for entry in entries:
+                if entry.name.endswith(".svg") and _link_or_copy(
+                    entry.path, os.path.join(shared_dir, entry.name)
+                ):
+                    published += 1
+
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+        if published:
+            self.trim()
+        return {"hits": hits, "misses": misses, "published": published}
+
+    def hit_rate(self) -> float:
+        with self._lock:
+            total = self.hits + self.misses
+            return self.hits / total if total else 0.0
+
+    def _touch(self, path: str):
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def trim(self):
+        """Delete the least recently used SVGs until the cache fits its budget"""
+        if not self.max_bytes:
+            return
+        entries = []
+        total = 0
+        for subdir in CACHE_SUBDIRS:
+            shared_dir = os.path.join(self.root, subdir)
+            if not os.path.isdir(shared_dir):
+                continue
+            for entry in os.scandir(shared_dir):
+                if not entry.name.endswith(".svg"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
@@ -0,0 +1,267 @@
+"""
+Clip stitching service
+
+Probes every clip first and concatenates with stream copy. Only clips whose
+stream parameters differ from the majority are transcoded to match, so the
+whole video is never re-encoded. The concat pass writes a faststart MP4
+(moov atom first) so browsers can start playback from the first bytes.
+Output is written to a temp file and renamed into place.
+"""
+
+import os
+import shutil
+import tempfile
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from .ffmpeg_tools import probe_playback_info, probe_streams, run_ffmpeg
+
+# Stream fields that must agree for the concat demuxer to stream-copy safely
+VIDEO_KEYS = (
+    "codec_name",
+    "profile",
+    "width",
+    "height",
+    "pix_fmt",
+    "sample_aspect_ratio",
+    "r_frame_rate",
+    "time_base",
+)
+AUDIO_KEYS = ("codec_name", "sample_rate", "channels", "time_base")
+
+STITCH_PATH_COPY = "stream_copy"
+STITCH_PATH_PARTIAL = "partial_transcode"
+
+
+def _stream_signature(probe: Dict[str, Any]) -> Tuple:
+    video = tuple(probe["video"].get(key) for key in VIDEO_KEYS)
+    audio = (
+        tuple(probe["audio"].get(key) for key in AUDIO_KEYS)
+        if probe["audio"]
+        else None
+    )
+    return video, audio
+
+
+def _video_duration(probe: Dict[str, Any]) -> Optional[float]:
+    """Duration of the video stream, else of the container"""
+    for value in (probe["video"].get("duration"), probe.get("duration")):
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+# ffprobe's H.264 profile names as libx264 -profile:v values
+X264_PROFILES = {
+    "constrained baseline": "baseline",
+    "baseline": "baseline",
+    "main": "main",
+    "high": "high",
+    "high 10": "high10",
+    "high 4:2:2": "high422",
+    "high 4:4:4 predictive": "high444",
+}
+
+
+def _x264_profile_args(video: Dict[str, Any]) -> List[str]:
+    """-profile:v and -level matching a probed H.264 stream, where known"""
+    args = []
+    profile = X264_PROFILES.get(str(video.get("profile", "")).lower())
+    if profile:
+        args += ["-profile:v", profile]
+    # ffprobe reports the level times ten, e.g. 31 for 3.1
+    level = video.get("level")
+    if isinstance(level, int) and level > 0:
+        args += ["-level", f"{level // 10}.{level % 10}"]
+    return args
+
+
+def _conform_args(
+    clip_path: str,
+    clip_probe: Dict[str, Any],
+    reference: Dict[str, Any],
+    output_path: str,
+) -> List[str]:
+    """ffmpeg arguments that re-encode one clip to the reference parameters"""
+    video = reference["video"]
+    audio = reference["audio"]
+    needs_silence = audio and not clip_probe["audio"]
+
+    args = ["-y", "-v", "error", "-i", clip_path]
+    if needs_silence:
+        # Provide silence for clips that have no audio track of their own
+        args += [
+            "-f",
+            "lavfi",
+            "-i",
+            f"anullsrc=r={audio['sample_rate']}:cl="
+            f"{'mono' if audio.get('channels') == 1 else 'stereo'}",
+        ]
+
+    args += [
+        "-map",
+        "0:v:0",
+        "-c:v",
+        "libx264" if video["codec_name"] == "h264" else video["codec_name"],
+        "-pix_fmt",
+        video["pix_fmt"],
+    ]
+    if video["codec_name"] == "h264":
+        args += _x264_profile_args(video)
+    args += [
+        "-vf",
+        f"scale={video['width']}:{video['height']},setsar=1",
+        "-r",
+        video["r_frame_rate"],
+    ]
+
+    # Match the track timescale so concat does not rewrite timestamps
+    time_base = video.get("time_base", "")
+    if "/" in time_base:
+        args += ["-video_track_timescale", time_base.split("/")[1]]
+
+    if audio:
+        args += [
+            "-map",
+            "1:a:0" if needs_silence else "0:a:0",
+            "-c:a",
+            audio["codec_name"],
+            "-ar",
+            str(audio["sample_rate"]),
+            "-ac",
+            str(audio.get("channels", 2)),
+        ]
+        if audio.get("bit_rate"):
+            args += ["-b:a", str(audio["bit_rate"])]
+        args += [
+            # Pad short audio with silence and cut at the end of the video,
+            # so the picture is never truncated to the audio's length
+            "-af",
+            "apad",
+        ]
+        video_duration = _video_duration(clip_probe)
+        args += ["-t", f"{video_duration:.6f}"] if video_duration else ["-shortest"]
+    else:
+        args += ["-an"]
+
+    return args + [output_path]
+
+
+async def stitch_clips(
+    file_prefix: str, clip_paths: List[str], videos_dir: str
+) -> Dict[str, Any]:
+    """
+    Concatenate clips into {videos_dir}/{file_prefix}_final.mp4.
+
+    Returns:
+        {"success", "output_path", "path", "transcoded", "skipped",
+         "seconds", "duration", "bit_rate", "keyframes", "error"}
+    """
+    started = time.perf_counter()
+    result: Dict[str, Any] = {
+        "success": False,
+        "output_path": None,
+        "path": None,
+        "transcoded": 0,
+        "skipped": 0,
+        "seconds": 0.0,
+        "duration": None,
+        "bit_rate": None,
+        "keyframes": [],
+        "error": None,
+    }
+
+    if not clip_paths:
+        result["error"] = "No clips to stitch"
+        return result
+
+    os.makedirs(videos_dir, exist_ok=True)
+    output_path = os.path.join(videos_dir, f"{file_prefix}_final.mp4")
+    # Same filesystem as the output so the final rename is atomic
+    work_dir = tempfile.mkdtemp(prefix=f".stitch_{file_prefix}_", dir=videos_dir)
+
+    try:
+        probes: List[Tuple[str, Optional[Dict[str, Any]]]] = []
+        for path in clip_paths:
+            probes.append((path, await probe_streams(path)))
+
+        usable = [(path, probe) for path, probe in probes if probe]
+        result["skipped"] = len(probes) - len(usable)
+        for path, probe in probes:
+            if not probe:
+                print(f"Skipping unreadable clip during stitching: {path}")
+        if not usable:
+            result["error"] = "None of the clips could be probed"
+            return result
+
+        # The most common parameter set wins; everything else is conformed to it
+        signatures = [_stream_signature(probe) for _, probe in usable]
+        reference_signature = Counter(signatures).most_common(1)[0][0]
+        reference = usable[signatures.index(reference_signature)][1]
+
+        concat_inputs = []
+        for index, ((path, probe), signature) in enumerate(zip(usable, signatures)):
+            if signature == reference_signature:
+                concat_inputs.append(path)
+                continue
+
+            conformed_path = os.path.join(work_dir, f"conformed_{index:03d}.mp4")
+            returncode, _, stderr = await run_ffmpeg(
+                _conform_args(path, probe, reference, conformed_path)
+            )
+            if returncode != 0:
+                result["error"] = f"Failed to conform clip {path}: {stderr}"
+                return result
+            concat_inputs.append(conformed_path)
+            result["transcoded"] += 1
+
+        concat_file_path = os.path.join(work_dir, "concat.txt")
+        with open(concat_file_path, "w", encoding="utf-8") as f:
+            for path in concat_inputs:
+                safe_path = os.path.abspath(path).replace("\\", "/").replace("'", "'\\''")
+                f.write(f"file '{safe_path}'\n")
+
+        tmp_output_path = os.path.join(work_dir, "stitched.mp4")
+        returncode, _, stderr = await run_ffmpeg(
+            [
+                "-y",
+                "-v",
+                "error",
+                "-f",
+                "concat",
+                "-safe",
+                "0",
+                "-i",
+                concat_file_path,
+                "-c",
+                "copy",
+                "-movflags",
+                "+faststart",
+                tmp_output_path,
+            ]
+        )
+        if returncode != 0:
+            result["error"] = f"ffmpeg concat failed: {stderr}"
+            return result
+
+        playback = await probe_playback_info(tmp_output_path)
+        if playback:
+            result.update(playback)
+
+        os.replace(tmp_output_path, output_path)
+
+        result["success"] = True
+        result["output_path"] = output_path
+        result["path"] = STITCH_PATH_PARTIAL if result["transcoded"] else STITCH_PATH_COPY
+        return result
+
+    except Exception as e:
+        result["error"] = f"Stitching failed: {e}"
+        return result
+
+    finally:
+        result["seconds"] = round(time.perf_counter() - started, 3)
+        shutil.rmtree(work_dir, ignore_errors=True)
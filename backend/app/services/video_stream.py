@@ -0,0 +1,146 @@
+"""
+Incremental HLS publishing for concept videos
+
+Each rendered clip is cut into MPEG-TS segments and appended to an EVENT
+playlist as soon as the agent reports it, so playback can start while later
+scenes are still rendering. The video is re-encoded with a keyframe forced
+at every segment boundary, so no segment runs past the playlist's target
+duration, which players expect to stay fixed.
+"""
+
+import asyncio
+import csv
+import mimetypes
+import os
+import shutil
+from typing import List, Tuple
+
+from ..core.config import settings
+from .ffmpeg_tools import run_ffmpeg
+
+# Python's mimetypes maps .ts to Qt translation files
+mimetypes.add_type("video/mp2t", ".ts")
+
+PLAYLIST_NAME = "index.m3u8"
+
+
+class ClipPlaylist:
+    """A growing HLS playlist backed by one directory of segments"""
+
+    def __init__(self, stream_dir: str):
+        self.stream_dir = stream_dir
+        self.playlist_path = os.path.join(stream_dir, PLAYLIST_NAME)
+        # One entry per clip: list of (segment file name, duration)
+        self.clips: List[List[Tuple[str, float]]] = []
+        self.finished = False
+        # Fixed for the life of the playlist: segments are cut on forced keyframes
+        self.target_duration = max(1, settings.HLS_SEGMENT_SECONDS)
+        self._lock = asyncio.Lock()
+
+        shutil.rmtree(stream_dir, ignore_errors=True)
+        os.makedirs(stream_dir, exist_ok=True)
+
+    async def add_clip(self, clip_path: str) -> bool:
+        """
+        Segment a finished clip and publish it at the end of the playlist.
+        Returns False if the clip could not be segmented.
+        """
+        async with self._lock:
+            if self.finished:
+                return False
+
+            clip_index = len(self.clips)
+            prefix = f"clip{clip_index:03d}"
+            segment_list = os.path.join(self.stream_dir, f"{prefix}.csv")
+            interval = self.target_duration
+
+            returncode, _, stderr = await run_ffmpeg(
+                [
+                    "-y",
+                    "-v",
+                    "error",
+                    "-i",
+                    clip_path,
+                    "-map",
+                    "0",
+                    "-c:v",
+                    "libx264",
+                    "-preset",
+                    "veryfast",
+                    "-pix_fmt",
+                    "yuv420p",
+                    "-force_key_frames",
+                    f"expr:gte(t,n_forced*{interval})",
+                    "-c:a",
+                    "copy",
+                    "-f",
+                    "segment",
+                    "-segment_time",
+                    str(interval),
+                    "-segment_format",
+                    "mpegts",
+                    "-segment_list",
+                    segment_list,
+                    "-segment_list_type",
+                    "csv",
+                    os.path.join(self.stream_dir, f"{prefix}_%03d.ts"),
+                ]
+            )
+            if returncode != 0:
+                print(f"Failed to segment clip {clip_path} for streaming: {stderr}")
+                return False
+
+            segments = []
+            with open(segment_list, newline="", encoding="utf-8") as f:
+                for row in csv.reader(f):
+                    name = os.path.basename(row[0])
+                    start, end = float(row[1]), float(row[2])
+                    segments.append((name, max(end - start, 0.0)))
+            os.remove(segment_list)
+
+            if not segments:
+                return False
+
+            self.clips.append(segments)
+            self._write_playlist()
+            return True
+
+    async def finish(self):
+        """Mark the playlist complete so players stop polling for new segments"""
+        async with self._lock:
+            self.finished = True
+            if self.clips:
+                self._write_playlist()
+
+    def _write_playlist(self):
+        lines = [
+            "#EXTM3U",
+            "#EXT-X-VERSION:3",
+            "#EXT-X-PLAYLIST-TYPE:EVENT",
+            f"#EXT-X-TARGETDURATION:{self.target_duration}",
+            "#EXT-X-MEDIA-SEQUENCE:0",
+        ]
+        for clip_index, segments in enumerate(self.clips):
+            # Every clip restarts its timestamps at zero
+            if clip_index > 0:
+                lines.append("#EXT-X-DISCONTINUITY")
+            for name, duration in segments:
+                lines.append(f"#EXTINF:{duration:.3f},")
+                lines.append(name)
+        if self.finished:
+            lines.append("#EXT-X-ENDLIST")
+
+        # Write then rename so players never read a half-written playlist
+        tmp_path = self.playlist_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, self.playlist_path)
+
+
+def stream_url(file_prefix: str) -> str:
+    """Public URL of the playlist for a stream directory under VIDEO_DIR"""
+    return f"/api/videos/{file_prefix}_stream/{PLAYLIST_NAME}"
+
+
+def stream_dir_for(videos_dir: str, file_prefix: str) -> str:
+    return os.path.join(videos_dir, f"{file_prefix}_stream")
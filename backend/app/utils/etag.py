@@ -0,0 +1,43 @@
+"""
+Conditional GET helpers
+
+ETags are derived from a paper's revision counter (plus whatever else the
+response depends on), so they are cheap to compute and never require
+serializing the body first.
+"""
+
+from typing import Optional
+
+from fastapi import Request, Response
+
+
+def make_etag(*parts) -> str:
+    """Weak ETag built from the values a response depends on"""
+    return 'W/"' + "-".join(str(part) for part in parts) + '"'
+
+
+def _strip_weak(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    current = _strip_weak(etag)
+    return any(_strip_weak(tag) == current for tag in header.split(","))
+
+
+def check_etag(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """
+    Attach the ETag to the response. Returns a 304 response to send instead
+    when the client already has this version.
+    """
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if is_not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
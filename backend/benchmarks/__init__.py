@@ -0,0 +1,13 @@
+"""
+Benchmarks for the backend hot paths
+
+Drives the real FastAPI app in-process through httpx with concurrent
+uploads, analyze and clarify calls and video jobs. Gemini is replaced by
+the synthetic LLM provider with configurable latency and error rate, PDFs
+are generated deterministically, and clips come from a stub renderer (or
+real low-quality manim). Results are compared against baselines.json:
+
+    cd backend
+    python -m benchmarks.run                  # run and compare
+    python -m benchmarks.run --save-baseline  # record new baselines
+"""
@@ -0,0 +1,114 @@
+"""
+Deterministic sample PDFs for the upload and parsing benchmarks
+
+Papers are written with a minimal PDF writer (one Helvetica text stream per
+page) from a seeded word list, so the same seed always produces the same
+bytes and no binary fixtures live in the repo.
+"""
+
+import os
+import random
+from typing import List
+
+WORDS = (
+    "attention transformer gradient encoder decoder layer token embedding "
+    "sequence model training loss optimizer softmax matrix vector residual "
+    "normalization dropout batch inference latency throughput benchmark "
+    "dataset evaluation baseline parameter convolution recurrent kernel "
+    "probability distribution sampling variance estimator convergence"
+).split()
+
+LINES_PER_PAGE = 45
+WORDS_PER_LINE = 12
+# Page counts cycled through the corpus, from short notes to long papers
+DEFAULT_PAGE_COUNTS = (1, 4, 12, 30)
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _page_stream(lines: List[str]) -> bytes:
+    commands = ["BT", "/F1 10 Tf", "12 TL", "50 770 Td"]
+    for line in lines:
+        commands.append(f"({_escape(line)}) Tj T*")
+    commands.append("ET")
+    return "\n".join(commands).encode("latin-1")
+
+
+def _paper_lines(page_count: int, rng: random.Random) -> List[List[str]]:
+    def sentence() -> str:
+        return " ".join(rng.choice(WORDS) for _ in range(WORDS_PER_LINE))
+
+    pages = []
+    for page in range(page_count):
+        lines = []
+        if page == 0:
+            lines += [
+                "Benchmark Paper on Attention Mechanisms",
+                "Ada Example, Alan Sample",
+                "",
+                "Abstract",
+            ]
+        lines.append(f"{page + 1}. Section {page + 1}")
+        while len(lines) < LINES_PER_PAGE:
+            lines.append(sentence())
+        pages.append(lines)
+    return pages
+
+
+def make_pdf(page_count: int, seed: int = 0) -> bytes:
+    """A text PDF with `page_count` pages of seeded pseudo-prose"""
+    rng = random.Random(seed)
+    pages = _paper_lines(page_count, rng)
+
+    # Objects: 1 catalog, 2 page tree, 3 font, then a page and its stream per page
+    objects = {
+        3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    }
+    kids = []
+    for i, lines in enumerate(pages):
+        page_id, stream_id = 4 + 2 * i, 5 + 2 * i
+        stream = _page_stream(lines)
+        objects[page_id] = (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {stream_id} 0 R >>"
+        ).encode()
+        objects[stream_id] = (
+            f"<< /Length {len(stream)} >>\nstream\n".encode() + stream + b"\nendstream"
+        )
+        kids.append(f"{page_id} 0 R")
+    objects[1] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[2] = (
+        f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(pages)} >>".encode()
+    )
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for object_id in sorted(objects):
+        offsets[object_id] = len(out)
+        out += f"{object_id} 0 obj\n".encode() + objects[object_id] + b"\nendobj\n"
+
+    xref_offset = len(out)
+    size = max(objects) + 1
+    out += f"xref\n0 {size}\n0000000000 65535 f \n".encode()
+    for object_id in range(1, size):
+        out += f"{offsets[object_id]:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {size} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode()
+    return bytes(out)
+
+
+def build_corpus(
+    directory: str, count: int, seed: int = 0, page_counts=DEFAULT_PAGE_COUNTS
+) -> List[str]:
+    """Write `count` sample PDFs to directory and return their paths"""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for i in range(count):
+        pages = page_counts[i % len(page_counts)]
+        path = os.path.join(directory, f"paper_{i:03d}_{pages}p.pdf")
+        if not os.path.exists(path):
+            with open(path, "wb") as f:
+                f.write(make_pdf(pages, seed + i))
+        paths.append(path)
+    return paths
@@ -0,0 +1,527 @@
+"""
+Run the backend benchmarks and compare them with the stored baselines
+
+Each run starts the app in a scratch directory with its own storage and
+measures these scenarios one after the other, at a fixed concurrency:
+
+- upload: POST /api/upload
+- paper_processing: upload until the paper status is completed (PDF
+  parsing and metadata extraction in the background task)
+- analyze: POST /api/papers/{id}/analyze
+- clarify: POST /api/papers/{id}/clarify
+- video_job: generate-video until the video is completed (needs ffmpeg)
+
+Per scenario it reports the count, errors, throughput, p50/p95/p99/max
+latency and the process's peak RSS so far, plus p50/p95 per pipeline span
+from the run's trace file. A metric that is worse than baselines.json by
+more than --tolerance is a regression and makes the exit status 1, as
+does a scenario the options ask for that could not run (e.g. video_job
+without ffmpeg; pass --videos 0 to leave it out) or that the baseline has
+no entry for. Such a run is not saved as a baseline. Baselines recorded
+with different workload options are not compared.
+
+    python -m benchmarks.run --papers 16 --concurrency 8 --llm-error-rate 0.1
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+import httpx
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+DEFAULT_BASELINE = BENCHMARK_DIR / "baselines.json"
+
+# Options that change the workload; baselines only compare like with like
+WORKLOAD_OPTIONS = (
+    "papers",
+    "concurrency",
+    "clarify_calls",
+    "videos",
+    "scenes",
+    "llm_latency",
+    "llm_jitter",
+    "llm_error_rate",
+    "renderer",
+    "render_latency",
+    "seed",
+)
+# (metric, higher is better)
+COMPARED_METRICS = (
+    ("throughput_rps", True),
+    ("p95_ms", False),
+    ("peak_rss_mb", False),
+)
+
+POLL_SECONDS = 0.02
+
+
+def peak_rss_mb() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return usage / (1024 * 1024) if sys.platform == "darwin" else usage / 1024
+
+
+def configure_environment(workdir: str, args: argparse.Namespace):
+    """Point every setting the app reads at import time into workdir"""
+    os.chdir(workdir)
+    os.environ.update(
+        {
+            # Replaced after import by a provider with the workload's settings
+            "LLM_PROVIDER": "synthetic",
+            "UPLOAD_DIR": os.path.join(workdir, "storage"),
+            "VIDEO_DIR": os.path.join(workdir, "videos"),
+            "CLIPS_DIR": os.path.join(workdir, "clips"),
+            "JOB_LOG_DIR": os.path.join(workdir, "logs"),
+            "MEDIA_INDEX_DIR": os.path.join(workdir, "media_index"),
+            "MANIM_TEX_CACHE_DIR": os.path.join(workdir, "tex_cache"),
+            "EVENT_BUS_BACKEND": "memory",
+            "TRACE_FILE": os.path.join(workdir, "traces.jsonl"),
+            "TRACE_CONSOLE": "false",
+            "STORAGE_QUOTA_MB": "0",
+            # One render per clip at preview quality, no background upgrade
+            "PROGRESSIVE_RENDERING": "false",
+            "MANIM_QUALITY": "low_quality",
+            # Warm workers only matter for real renders, in this interpreter
+            "RENDER_POOL_ENABLED": "true" if args.renderer == "manim" else "false",
+            "RENDER_POOL_PYTHON": sys.executable,
+        }
+    )
+
+
+class ServerTransport(httpx.AsyncBaseTransport):
+    """
+    ASGI transport that returns as soon as the response body is sent, like
+    a real server. httpx.ASGITransport waits for the whole app call, which
+    would fold background tasks (paper processing, video jobs) into the
+    request latency. Background work keeps running; drain() waits for it.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.tasks = set()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": request.method,
+            "headers": [(k.lower(), v) for (k, v) in request.headers.raw],
+            "scheme": request.url.scheme,
+            "path": request.url.path,
+            "raw_path": request.url.raw_path.split(b"?")[0],
+            "query_string": request.url.query,
+            "server": (request.url.host, request.url.port),
+            "client": ("127.0.0.1", 0),
+            "root_path": "",
+        }
+        body = b"".join([chunk async for chunk in request.stream])
+        body_sent = False
+        status_code = 500
+        headers = []
+        parts = []
+        response_complete = asyncio.Event()
+
+        async def receive():
+            nonlocal body_sent
+            if body_sent:
+                await response_complete.wait()
+                return {"type": "http.disconnect"}
+            body_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def send(message):
+            nonlocal status_code, headers
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = message.get("headers", [])
+            elif message["type"] == "http.response.body":
+                parts.append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    response_complete.set()
+
+        task = asyncio.create_task(self.app(scope, receive, send))
+        self.tasks.add(task)
+        task.add_done_callback(self._finished)
+        waiter = asyncio.create_task(response_complete.wait())
+        await asyncio.wait({task, waiter}, return_when=asyncio.FIRST_COMPLETED)
+        waiter.cancel()
+        if not response_complete.is_set():
+            # The app returned or raised without completing a response
+            status_code, parts = 500, [b"app exited without a response"]
+        return httpx.Response(status_code, headers=headers, content=b"".join(parts))
+
+    def _finished(self, task: asyncio.Task):
+        self.tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"App call failed: {task.exception()!r}")
+
+    async def drain(self):
+        while self.tasks:
+            await asyncio.gather(*list(self.tasks), return_exceptions=True)
+
+
+class Scenario:
+    """Latencies and errors of one scenario"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started = time.perf_counter()
+        self.last_end = self.started
+        self.latencies: List[float] = []
+        self.errors = 0
+        self.peak_rss_mb = 0.0
+
+    def record(self, started: float, ok: bool = True):
+        ended = time.perf_counter()
+        self.latencies.append(ended - started)
+        self.last_end = max(self.last_end, ended)
+        if not ok:
+            self.errors += 1
+
+    def finish(self):
+        self.peak_rss_mb = peak_rss_mb()
+
+    def result(self) -> Dict[str, Any]:
+        from app.core.tracing import percentile
+
+        elapsed = self.last_end - self.started
+        ms = [seconds * 1000 for seconds in self.latencies] or [0.0]
+        return {
+            "count": len(self.latencies),
+            "errors": self.errors,
+            "seconds": round(elapsed, 3),
+            "throughput_rps": round(len(self.latencies) / elapsed, 2) if elapsed else 0.0,
+            "p50_ms": round(percentile(ms, 50), 1),
+            "p95_ms": round(percentile(ms, 95), 1),
+            "p99_ms": round(percentile(ms, 99), 1),
+            "max_ms": round(max(ms), 1),
+            "peak_rss_mb": round(self.peak_rss_mb, 1),
+        }
+
+
+async def run_concurrently(
+    items: Iterable[Any], concurrency: int, fn: Callable[[Any], Awaitable[None]]
+):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(item):
+        async with semaphore:
+            await fn(item)
+
+    await asyncio.gather(*(run(item) for item in items))
+
+
+async def poll_until(
+    client: httpx.AsyncClient, url: str, key: str, timeout: float
+) -> Optional[str]:
+    """Poll a status endpoint until `key` is completed or failed"""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        response = await client.get(url)
+        if response.status_code == 200:
+            value = response.json().get(key)
+            if value in ("completed", "failed"):
+                return value
+        await asyncio.sleep(POLL_SECONDS)
+    return None
+
+
+def log_progress(message: str):
+    print(message, file=sys.stderr, flush=True)
+
+
+async def benchmark(args: argparse.Namespace, workdir: str) -> Dict[str, Any]:
+    from app.api.endpoints import analysis, upload, video
+    from app.core.tracing import read_records, summarize
+    from app.main import app
+
+    from app.services.llm_provider import SyntheticProvider
+
+    from .corpus import build_corpus
+    from .stub_renderer import StubAgent, make_template_clip
+
+    llm = SyntheticProvider(
+        args.llm_latency, args.llm_jitter, args.llm_error_rate, args.seed
+    )
+    upload.gemini_service.provider = llm
+    analysis.gemini_service.provider = llm
+
+    pdfs = build_corpus(os.path.join(workdir, "corpus"), args.papers, args.seed)
+    results: Dict[str, Dict[str, Any]] = {}
+    # Requested scenarios that could not run, with the reason
+    skipped: Dict[str, str] = {}
+
+    template_clip = os.path.join(workdir, "template.mp4")
+    videos = min(args.videos, args.papers)
+    if videos and args.renderer == "stub" and not shutil.which("ffmpeg"):
+        log_progress("ffmpeg not found: cannot run video_job")
+        skipped["video_job"] = "ffmpeg not found"
+        videos = 0
+    if videos and args.renderer == "stub" and not await make_template_clip(template_clip):
+        skipped["video_job"] = "could not make the template clip"
+        videos = 0
+    agent = StubAgent(llm, args.renderer, args.scenes, args.render_latency, template_clip)
+    video.run_agent_script = agent.run_agent_script
+
+    transport = ServerTransport(app)
+    async with app.router.lifespan_context(app), httpx.AsyncClient(
+        transport=transport, base_url="http://benchmark", timeout=args.timeout
+    ) as client:
+        paper_ids: List[str] = []
+
+        log_progress(f"upload + paper_processing: {len(pdfs)} papers")
+        uploads = Scenario("upload")
+        processing = Scenario("paper_processing")
+
+        async def upload_paper(path: str):
+            started = time.perf_counter()
+            with open(path, "rb") as f:
+                content = f.read()
+            response = await client.post(
+                "/api/upload",
+                files={"file": (os.path.basename(path), content, "application/pdf")},
+            )
+            uploads.record(started, response.status_code == 200)
+            if response.status_code != 200:
+                processing.record(started, ok=False)
+                return
+            paper_id = response.json()["paper_id"]
+            status = await poll_until(
+                client, f"/api/papers/{paper_id}/status", "analysis_status", args.timeout
+            )
+            processing.record(started, status == "completed")
+            if status == "completed":
+                paper_ids.append(paper_id)
+
+        await run_concurrently(pdfs, args.concurrency, upload_paper)
+        for scenario in (uploads, processing):
+            scenario.finish()
+            results[scenario.name] = scenario.result()
+
+        log_progress(f"analyze: {len(paper_ids)} papers")
+        analyze = Scenario("analyze")
+
+        async def analyze_paper(paper_id: str):
+            started = time.perf_counter()
+            response = await client.post(f"/api/papers/{paper_id}/analyze")
+            analyze.record(started, response.status_code == 200)
+
+        await run_concurrently(paper_ids, args.concurrency, analyze_paper)
+        analyze.finish()
+        results["analyze"] = analyze.result()
+
+        log_progress(f"clarify: {args.clarify_calls} calls")
+        clarify = Scenario("clarify")
+
+        async def clarify_text(i: int):
+            started = time.perf_counter()
+            response = await client.post(
+                f"/api/papers/{paper_ids[i % len(paper_ids)]}/clarify",
+                json={"text_snippet": "scaled dot-product attention", "context": f"call {i}"},
+            )
+            clarify.record(started, response.status_code == 200)
+
+        if paper_ids:
+            await run_concurrently(range(args.clarify_calls), args.concurrency, clarify_text)
+        clarify.finish()
+        results["clarify"] = clarify.result()
+
+        if videos:
+            log_progress(f"video_job: {videos} jobs of {args.scenes} scenes")
+            video_jobs = Scenario("video_job")
+
+            async def generate_video(paper_id: str):
+                started = time.perf_counter()
+                concepts = (await client.get(f"/api/papers/{paper_id}/concepts")).json()
+                if not concepts.get("concepts"):
+                    video_jobs.record(started, ok=False)
+                    return
+                concept_id = concepts["concepts"][0]["id"]
+                base = f"/api/papers/{paper_id}/concepts/{concept_id}"
+                response = await client.post(f"{base}/generate-video")
+                if response.status_code != 200:
+                    video_jobs.record(started, ok=False)
+                    return
+                status = await poll_until(
+                    client, f"{base}/video/status", "video_status", args.timeout
+                )
+                video_jobs.record(started, status == "completed")
+
+            await run_concurrently(paper_ids[:videos], args.concurrency, generate_video)
+            video_jobs.finish()
+            results["video_job"] = video_jobs.result()
+
+        await transport.drain()
+
+    trace_file = os.environ["TRACE_FILE"]
+    stages = summarize(read_records([trace_file])) if os.path.exists(trace_file) else {}
+    return {
+        "options": {name: getattr(args, name) for name in WORKLOAD_OPTIONS},
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "scenarios": results,
+        "skipped": skipped,
+        "stages": {
+            name: {key: round(value, 1) for key, value in stats.items()}
+            for name, stats in stages.items()
+        },
+        "llm": {"calls": llm.calls, "errors": llm.errors},
+    }
+
+
+def compare(
+    current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float
+) -> List[str]:
+    """Regressions of the current run against the baseline, as report lines"""
+    regressions = [
+        f"{name}: not run ({reason})" for name, reason in current["skipped"].items()
+    ]
+    for name, stats in current["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if not base:
+            regressions.append(f"{name}: no baseline; record one with --save-baseline")
+            continue
+        if stats["errors"] > base.get("errors", 0):
+            regressions.append(f"{name}: errors {base.get('errors', 0)} -> {stats['errors']}")
+        for metric, higher_is_better in COMPARED_METRICS:
+            old, new = base.get(metric), stats.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = -change if higher_is_better else change
+            if worse > tolerance:
+                regressions.append(f"{name}: {metric} {old} -> {new} ({change:+.0%})")
+    return regressions
+
+
+def print_report(result: Dict[str, Any]):
+    print(
+        f"{'scenario':<18} {'count':>6} {'errors':>6} {'req/s':>8} {'p50 ms':>9} "
+        f"{'p95 ms':>9} {'p99 ms':>9} {'max ms':>9} {'RSS MB':>8}"
+    )
+    for name, s in result["scenarios"].items():
+        print(
+            f"{name:<18} {s['count']:>6} {s['errors']:>6} {s['throughput_rps']:>8.2f} "
+            f"{s['p50_ms']:>9.1f} {s['p95_ms']:>9.1f} {s['p99_ms']:>9.1f} "
+            f"{s['max_ms']:>9.1f} {s['peak_rss_mb']:>8.1f}"
+        )
+    for name, reason in result["skipped"].items():
+        print(f"{name:<18} not run: {reason}")
+    if result["stages"]:
+        print()
+        width = max(len(name) for name in result["stages"])
+        print(f"{'span':<{width}} {'count':>6} {'p50 ms':>9} {'p95 ms':>9}")
+        for name, s in result["stages"].items():
+            print(f"{name:<{width}} {int(s['count']):>6} {s['p50']:>9.1f} {s['p95']:>9.1f}")
+    llm = result["llm"]
+    print(f"\nsynthetic LLM: {llm['calls']} calls, {llm['errors']} injected errors")
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.run", description="Benchmark the backend hot paths"
+    )
+    workload = parser.add_argument_group("workload")
+    workload.add_argument("--papers", type=int, default=8)
+    workload.add_argument("--concurrency", type=int, default=4)
+    workload.add_argument("--clarify-calls", type=int, default=32)
+    workload.add_argument("--videos", type=int, default=4)
+    workload.add_argument("--scenes", type=int, default=3)
+    workload.add_argument("--llm-latency", type=float, default=0.05)
+    workload.add_argument("--llm-jitter", type=float, default=0.02)
+    workload.add_argument("--llm-error-rate", type=float, default=0.0)
+    workload.add_argument("--renderer", choices=("stub", "manim"), default="stub")
+    workload.add_argument(
+        "--render-latency", type=float, default=0.2, help="seconds per stub clip"
+    )
+    workload.add_argument("--seed", type=int, default=0)
+
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.25, help="allowed relative slowdown"
+    )
+    parser.add_argument("--output", help="also write the results as JSON here")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--keep", action="store_true", help="keep the scratch directory")
+    parser.add_argument("--verbose", action="store_true", help="show the app's output")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str]) -> int:
+    args = parse_args(argv)
+    baseline_path = os.path.abspath(args.baseline)
+    output_path = os.path.abspath(args.output) if args.output else None
+    # The app package is imported from the backend directory
+    sys.path.insert(0, str(BENCHMARK_DIR.parent))
+
+    original_dir = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix="clarifai-bench-")
+    try:
+        configure_environment(workdir, args)
+        with open(os.path.join(workdir, "app.log"), "w") as app_log:
+            redirect = (
+                contextlib.nullcontext()
+                if args.verbose
+                else contextlib.redirect_stdout(app_log)
+            )
+            with redirect:
+                result = asyncio.run(benchmark(args, workdir))
+    finally:
+        os.chdir(original_dir)
+        if args.keep:
+            log_progress(f"Scratch directory kept at {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print_report(result)
+    if output_path:
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+    if args.save_baseline:
+        if result["skipped"]:
+            print("\nNot saving a baseline that is missing requested scenarios")
+            return 1
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+            f.write("\n")
+        print(f"\nBaseline saved to {baseline_path}")
+        return 0
+
+    if not os.path.exists(baseline_path):
+        print("\nNo baseline to compare with; run with --save-baseline to record one")
+        return 0
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("options") != result["options"]:
+        print("\nBaseline was recorded with different workload options; not compared")
+        return 0
+
+    regressions = compare(result, baseline, args.tolerance)
+    if regressions:
+        print(f"\nRegressions beyond {args.tolerance:.0%} of {baseline_path}:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print(f"\nNo regressions beyond {args.tolerance:.0%} of the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
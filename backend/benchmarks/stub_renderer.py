@@ -0,0 +1,160 @@
+"""
+Stand-in for the agent subprocess in video job benchmarks
+
+StubAgent.run_agent_script replaces video.run_agent_script. Per scene it
+asks the synthetic LLM provider for code (so LLM latency is the configured one)
+and then produces a clip with one of two renderers:
+
+- "stub": waits the configured render latency and copies a small test
+  pattern clip made once with ffmpeg
+- "manim": renders the scene for real through manim_generator at the
+  requested quality (manim must be importable)
+
+Everything after the agent (HLS publishing, stitching, storage, events,
+metrics) runs the production code. The agent itself is not: the stub skips
+its NDJSON protocol, the render server that lends it warm workers, the
+repair loop that asks the LLM to correct a failed render and the
+speculative path that renders several candidates at once. Each scene costs
+exactly one LLM call and one render.
+"""
+
+import asyncio
+import json
+import os
+import shutil
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.api.endpoints.video import record_clip_metrics
+from app.services.event_bus import event_bus
+from app.services.ffmpeg_tools import run_ffmpeg
+from app.services.llm_provider import LLMProvider, LLMProviderError
+from app.services.manim_generator import manim_generator
+
+
+RENDERERS = ("stub", "manim")
+
+SCENE_CODE = """class BenchmarkScene(Scene):
+    def construct(self):
+        title = Text("Scene {index}")
+        formula = MathTex(r"\\sum_{{i=1}}^{{n}} x_i^2")
+        self.play(Write(title))
+        self.play(title.animate.to_edge(UP), FadeIn(formula))
+        self.wait(0.5)
+"""
+
+
+async def make_template_clip(path: str, seconds: float = 2.0) -> bool:
+    """A low-resolution H.264 test pattern, like a low_quality manim clip"""
+    if os.path.exists(path):
+        return True
+    returncode, _, stderr = await run_ffmpeg(
+        [
+            "-y",
+            "-v",
+            "error",
+            "-f",
+            "lavfi",
+            "-i",
+            f"testsrc=size=854x480:rate=15:duration={seconds}",
+            "-c:v",
+            "libx264",
+            "-pix_fmt",
+            "yuv420p",
+            path,
+        ]
+    )
+    if returncode != 0:
+        print(f"Could not create the template clip: {stderr.strip()}")
+    return returncode == 0
+
+
+class StubAgent:
+    def __init__(
+        self,
+        llm: LLMProvider,
+        renderer: str = "stub",
+        scenes: int = 3,
+        render_latency: float = 0.2,
+        template_clip: str = "",
+    ):
+        if renderer not in RENDERERS:
+            raise ValueError(f"Unknown renderer {renderer!r}, expected one of {RENDERERS}")
+        self.llm = llm
+        self.renderer = renderer
+        self.scenes = scenes
+        self.render_latency = render_latency
+        self.template_clip = template_clip
+
+    async def render_clip(self, index: int, output_dir: str, quality: str) -> Optional[str]:
+        code = SCENE_CODE.format(index=index + 1)
+        if self.renderer == "manim":
+            return await manim_generator.generate_manim_video(
+                code, clip_name=f"clip_{index}", quality=quality, output_dir=output_dir
+            )
+
+        await asyncio.sleep(self.render_latency)
+        clip_path = os.path.join(output_dir, f"clip_{index}.mp4")
+        await asyncio.to_thread(shutil.copyfile, self.template_clip, clip_path)
+        return clip_path
+
+    async def run_agent_script(
+        self,
+        paper_id: str,
+        concept_name: str,
+        concept_description: str,
+        output_dir: str,
+        quality: str = "low_quality",
+        on_clip: Optional[Callable[[str], Awaitable[None]]] = None,
+    ) -> Dict[str, Any]:
+        clip_paths = []
+        metrics = []
+        for i in range(self.scenes):
+            started = time.monotonic()
+            await event_bus.publish(
+                paper_id, json.dumps({"type": "log", "message": f"Generating clip {i + 1}"})
+            )
+            # The real agent does not retry a failed LLM call: it ends the job
+            try:
+                await asyncio.to_thread(
+                    self.llm.generate,
+                    f"Generate Manim code for {concept_name}: {concept_description}",
+                    "generate_code",
+                )
+            except LLMProviderError:
+                return {
+                    "success": False,
+                    "error": "Agent crashed unexpectedly",
+                    "clip_paths": clip_paths,
+                    "metrics": metrics,
+                }
+            clip_path = await self.render_clip(i, output_dir, quality)
+
+            event = {
+                "clip": i,
+                "success": clip_path is not None,
+                "seconds": round(time.monotonic() - started, 3),
+                "llm_calls": 1,
+                "render_attempts": 1,
+                "tex_cache_hits": 0,
+                "tex_cache_misses": 0,
+            }
+            metrics.append(event)
+            record_clip_metrics(event)
+            if clip_path is None:
+                continue
+
+            # Kept for the quality upgrade, like the agent does
+            source_path = os.path.join(output_dir, f"clip_{i}.py")
+            with open(source_path, "w", encoding="utf-8") as f:
+                f.write(SCENE_CODE.format(index=i + 1))
+            clip_paths.append(clip_path)
+            if on_clip:
+                await on_clip(clip_path)
+
+        return {
+            "success": bool(clip_paths),
+            "error": None if clip_paths else "No clips were rendered",
+            "clip_paths": clip_paths,
+            "metrics": metrics,
+        }
@@ -1,51 +1,286 @@
 import os
 import sys
 import json
-import subprocess
-import tempfile
 import re
+import string
+import threading
+import time
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.schema import HumanMessage
+
+from app.services.manim_render import (
+    build_manim_command,
+    create_render_dir,
+    locate_output,
+    remove_render_dir,
+    write_scene_file,
+)
+from app.core.tracing import parse_traceparent, tracer
+from app.services.llm_provider import LLMProvider, LLMResponse, create_provider
+from app.services.agent_protocol import (
+    EVENT_CLIP_READY,
+    EVENT_DEBUG,
+    EVENT_ERROR,
+    EVENT_METRICS,
+    EVENT_PROGRESS,
+    EVENT_RESULT,
+    EVENT_SPAN,
+    RenderClient,
+    encode_event,
+)
+from app.services.render_limits import RenderBudget, check_frame_budget, run_supervised
+from app.services.tex_cache import TexCache
+
+# Resource budget for every render, passed in by the backend via environment
+RENDER_BUDGET = RenderBudget.from_env()
+
+# LaTeX/text SVG cache shared with every other render on this machine
+TEX_CACHE = (
+    TexCache(os.environ["TEX_CACHE_DIR"], int(os.environ.get("TEX_CACHE_MB", "512")))
+    if os.environ.get("TEX_CACHE_DIR")
+    else None
+)
+
+# Quality the clips are upgraded to later; previews must fit its frame budget
+FINAL_QUALITY = os.environ.get("MANIM_FINAL_QUALITY") or None
+
+# Speculative mode: number of candidate programs tried in parallel per scene
+SPECULATIVE_CANDIDATES = max(1, int(os.environ.get("AGENT_SPECULATIVE_CANDIDATES", "1")))
+
+# Batch mode: generate every scene's program in one LLM call
+BATCH_GENERATION = os.environ.get("AGENT_BATCH_GENERATION", "0") == "1"
+# Cost ceiling on LLM calls for the whole job (0 = unlimited)
+MAX_LLM_CALLS = int(os.environ.get("AGENT_MAX_LLM_CALLS", "0"))
+# Temperatures handed to successive candidates so they explore different programs
+CANDIDATE_TEMPERATURES = [0.3, 0.7, 1.0, 0.5, 0.9, 0.2]
+
+# LLM provider (see app/services/llm_provider.py); "gemini" uses LangChain
+LLM_PROVIDER = os.environ.get("LLM_PROVIDER", "gemini")
+LLM_MODEL = os.environ.get("AGENT_LLM_MODEL", "gemini-1.5-flash")
+LLM_CASSETTE_DIR = os.environ.get("LLM_CASSETTE_DIR", "cassettes")
+LLM_SYNTHETIC_LATENCY = float(os.environ.get("LLM_SYNTHETIC_LATENCY", "0"))
+
+# Opt-in verbose channel for full prompts/responses, truncated per message
+DEBUG = os.environ.get("AGENT_DEBUG", "0") == "1"
+DEBUG_MAX_CHARS = int(os.environ.get("AGENT_DEBUG_MAX_CHARS", "2000"))
+
+# Trace context of the backend's agent.run span; when it is set, finished
+# spans are reported back as span events
+TRACE_PARENT = parse_traceparent(os.environ.get("TRACEPARENT"))
+
+_output_lock = threading.Lock()
+_llm_calls_lock = threading.Lock()
+_llm_calls = 0
+_render_attempts = 0
+
+
+class LLMBudgetExceeded(Exception):
+    pass
+
+
+def emit(event_type, **payload):
+    """Writes one protocol event (a single JSON line) to stdout."""
+    line = encode_event(event_type, **payload)
+    with _output_lock:
+        sys.stdout.write(line + "\n")
+        sys.stdout.flush()
+
+
+# Renders run on the API's warm render pool, which outlives this process, so
+# no job pays manim's start-up cost. Requests go out as events, replies come
+# back on stdin; without the pool scenes render cold.
+RENDER_CLIENT = (
+    RenderClient(emit, sys.stdin.fileno())
+    if os.environ.get("AGENT_RENDER_SERVER", "0") == "1"
+    else None
+)
 
 
 def log(message):
-    """Prints a log message to stdout for real-time streaming."""
-    print("LOG: " + str(message), flush=True)
+    """Emits a progress message for real-time streaming."""
+    emit(EVENT_PROGRESS, message=str(message))
 
 
-def read_prompt_template(filename):
-    """Reads a prompt template from the 'prompts' directory."""
-    script_dir = Path(__file__).parent
-    template_path = script_dir / "prompts" / filename
+def debug(message):
+    """
+    Prints a verbose diagnostic on the debug channel when AGENT_DEBUG is set.
+    The backend keeps these in its own log instead of streaming them to clients.
+    """
+    if not DEBUG:
+        return
+    text = str(message)
+    if len(text) > DEBUG_MAX_CHARS:
+        text = (
+            text[:DEBUG_MAX_CHARS]
+            + "... ["
+            + str(len(text) - DEBUG_MAX_CHARS)
+            + " more chars]"
+        )
+    emit(EVENT_DEBUG, message=text)
+
+
+def report_span(record):
+    emit(EVENT_SPAN, span=record)
+
+
+tracer.service_name = "clarifai-agent"
+if TRACE_PARENT:
+    tracer.add_exporter(report_span)
+
+
+def invoke_llm(llm, prompt, operation):
+    """Calls the LLM, enforcing the job's LLM call ceiling."""
+    global _llm_calls
+    with _llm_calls_lock:
+        if MAX_LLM_CALLS and _llm_calls >= MAX_LLM_CALLS:
+            raise LLMBudgetExceeded(
+                "LLM call budget of " + str(MAX_LLM_CALLS) + " exhausted"
+            )
+        _llm_calls += 1
+    with tracer.span(
+        "llm." + operation,
+        provider=llm.name,
+        prompt_chars=len(prompt),
+        temperature=llm.temperature,
+    ) as span:
+        response = llm.generate(prompt, operation)
+        span.set_attributes(
+            response_chars=len(response.text),
+            input_tokens=response.input_tokens,
+            output_tokens=response.output_tokens,
+        )
+        return response.text.strip()
+
+
+def llm_calls_made():
+    with _llm_calls_lock:
+        return _llm_calls
+
+
+def remaining_llm_calls():
+    """Number of LLM calls left under the ceiling, or None if unlimited."""
+    if not MAX_LLM_CALLS:
+        return None
+    with _llm_calls_lock:
+        return max(MAX_LLM_CALLS - _llm_calls, 0)
+
+
+class PromptTemplate:
+    """
+    A prompt template parsed once into literal text and fields. format()
+    gives the same result as str.format, conversions and format specs
+    included; nested fields inside a format spec are not supported.
+    """
+
+    formatter = string.Formatter()
+
+    def __init__(self, text):
+        self.parts = list(self.formatter.parse(text))
+        for _, field_name, format_spec, _ in self.parts:
+            if field_name is not None and "{" in format_spec:
+                raise ValueError(
+                    "Nested field in the format spec of {" + field_name + "}"
+                )
+
+    def format(self, **values):
+        pieces = []
+        for literal, field_name, format_spec, conversion in self.parts:
+            pieces.append(literal)
+            if field_name is None:
+                continue
+            value = self.formatter.get_field(field_name, (), values)[0]
+            value = self.formatter.convert_field(value, conversion)
+            pieces.append(self.formatter.format_field(value, format_spec))
+        return "".join(pieces)
+
+
+_prompt_templates = {}
+_prompt_templates_lock = threading.Lock()
+
+# A line "@include <file>" in a prompt is replaced by that prompt file,
+# so guidance shared by several prompts lives in one place
+INCLUDE_DIRECTIVE = "@include "
+
+
+def read_prompt_text(filename):
+    """Returns a prompt file from the 'prompts' directory with its includes expanded."""
+    template_path = Path(__file__).parent / "prompts" / filename
     with open(template_path, "r", encoding="utf-8") as f:
-        return f.read()
+        lines = f.read().split("\n")
+    return "\n".join(
+        read_prompt_text(line[len(INCLUDE_DIRECTIVE):].strip()).rstrip("\n")
+        if line.startswith(INCLUDE_DIRECTIVE)
+        else line
+        for line in lines
+    )
+
+
+def read_prompt_template(filename):
+    """Returns the parsed template from the 'prompts' directory, loading it once."""
+    with _prompt_templates_lock:
+        template = _prompt_templates.get(filename)
+        if template is None:
+            template = PromptTemplate(read_prompt_text(filename))
+            _prompt_templates[filename] = template
+        return template
 
 
-def initialize_llm(api_key):
-    """Initializes the language model with the provided API key."""
-    log("--- DEBUG: Initializing LLM. ---")
-    llm = ChatGoogleGenerativeAI(
-        model="gemini-1.5-flash", google_api_key=api_key, temperature=0.3
+class LangChainGeminiProvider(LLMProvider):
+    """Gemini through LangChain, imported only when the live API is used."""
+
+    name = "gemini"
+
+    def __init__(self, api_key, model, temperature):
+        from langchain_google_genai import ChatGoogleGenerativeAI
+
+        self.model = model
+        self.temperature = temperature
+        self.chat = ChatGoogleGenerativeAI(
+            model=model, google_api_key=api_key, temperature=temperature
+        )
+
+    def generate(self, prompt, operation="generate"):
+        from langchain.schema import HumanMessage
+
+        message = self.chat.invoke([HumanMessage(content=prompt)])
+        usage = getattr(message, "usage_metadata", None) or {}
+        return LLMResponse(
+            message.content,
+            usage.get("input_tokens", 0),
+            usage.get("output_tokens", 0),
+        )
+
+
+def initialize_llm(api_key, temperature=0.3, candidate=0):
+    """
+    Initializes the configured LLM provider with the provided API key.
+    Speculative candidates pass their index so replayed and synthetic
+    responses differ between them.
+    """
+    debug("--- Initializing " + LLM_PROVIDER + " LLM provider. ---")
+    llm = create_provider(
+        LLM_PROVIDER,
+        lambda: LangChainGeminiProvider(api_key, LLM_MODEL, temperature),
+        LLM_CASSETTE_DIR,
+        LLM_SYNTHETIC_LATENCY,
+        candidate,
     )
-    log("--- DEBUG: LLM Initialized successfully. ---")
+    debug("--- LLM Initialized successfully. ---")
     return llm
 
 
 def get_video_scenes(llm, concept_name, concept_description):
     """Uses an AI call to split a concept into logical, thematic scenes for a video."""
-    log("--- DEBUG: Calling LLM to determine video scenes. ---")
+    debug("--- Calling LLM to determine video scenes. ---")
     template = read_prompt_template("split_scenes.txt")
     prompt = template.format(
         concept_name=concept_name, concept_description=concept_description
     )
 
-    log("--- PROMPT FOR SCENE SPLITTING ---")
-    log(prompt)
-    response = llm.invoke([HumanMessage(content=prompt)])
-    response_text = response.content.strip()
-    log("--- AI RESPONSE (SCENES) ---")
-    log(response_text)
+    debug("--- PROMPT FOR SCENE SPLITTING ---\n" + prompt)
+    response_text = invoke_llm(llm, prompt, "split_scenes")
+    debug("--- AI RESPONSE (SCENES) ---\n" + response_text)
 
     json_match = re.search(r"\[.*\]", response_text, re.DOTALL)
 
@@ -55,7 +290,7 @@ def get_video_scenes(llm, concept_name, concept_description):
             scenes = json.loads(json_string)
             if isinstance(scenes, list) and all(isinstance(s, str) for s in scenes):
                 log(
-                    "--- DEBUG: Successfully parsed "
+                    "--- Successfully parsed "
                     + str(len(scenes))
                     + " scenes. ---"
                 )
@@ -75,17 +310,17 @@ def get_video_scenes(llm, concept_name, concept_description):
 
 def sanitize_code(code):
     """Aggressively sanitizes the AI's code output."""
-    log("--- DEBUG: Sanitizing AI response. ---")
+    debug("--- Sanitizing AI response. ---")
     code_pattern = re.compile(r"```python\n(.*?)\n```", re.DOTALL)
     match = code_pattern.search(code)
 
     if match:
         code = match.group(1).strip()
-        log("--- DEBUG: Extracted Python code from markdown block. ---")
+        debug("--- Extracted Python code from markdown block. ---")
 
     if "from manim import *" not in code:
         code = "from manim import *\n\n" + code
-        log("--- DEBUG: Added missing 'from manim import *' import. ---")
+        debug("--- Added missing 'from manim import *' import. ---")
 
     return code
 
@@ -95,30 +330,74 @@ def generate_manim_code(llm, description):
     template = read_prompt_template("generate_code.txt")
     prompt = template.format(description=description)
 
-    log("--- PROMPT FOR MANIM CODE ---")
-    log(prompt)
-    response = llm.invoke([HumanMessage(content=prompt)])
-    code = response.content.strip()
-    log("--- AI RESPONSE (RAW CODE) ---")
-    log(code)
+    debug("--- PROMPT FOR MANIM CODE ---\n" + prompt)
+    code = invoke_llm(llm, prompt, "generate_code")
+    debug("--- AI RESPONSE (RAW CODE) ---\n" + code)
     return sanitize_code(code)
 
 
+def generate_all_manim_code(llm, scene_descriptions):
+    """
+    Generates the programs for every scene in a single LLM call. Returns one
+    entry per scene: sanitized code, or None where the batch did not yield a
+    usable program (those scenes fall back to individual generation).
+    """
+    template = read_prompt_template("generate_all_code.txt")
+    prompt = template.format(
+        scenes="\n".join(
+            str(i + 1) + ". " + description
+            for i, description in enumerate(scene_descriptions)
+        ),
+        scene_count=len(scene_descriptions),
+    )
+
+    debug("--- PROMPT FOR BATCHED MANIM CODE ---\n" + prompt)
+    response_text = invoke_llm(llm, prompt, "generate_all_code")
+    debug("--- AI RESPONSE (BATCHED CODE) ---\n" + response_text)
+
+    codes = [None] * len(scene_descriptions)
+    json_match = re.search(r"\[.*\]", response_text, re.DOTALL)
+    if not json_match:
+        log("--- WARNING: Batched response contained no JSON array. ---")
+        return codes
+
+    try:
+        programs = json.loads(json_match.group(0))
+    except json.JSONDecodeError:
+        log("--- WARNING: Batched response was not valid JSON. ---")
+        return codes
+
+    if not isinstance(programs, list):
+        return codes
+
+    for i, program in enumerate(programs[: len(codes)]):
+        if isinstance(program, str) and "class " in program and "Scene" in program:
+            codes[i] = sanitize_code(program)
+
+    log(
+        "--- Batch produced "
+        + str(sum(code is not None for code in codes))
+        + "/"
+        + str(len(codes))
+        + " usable programs. ---"
+    )
+    return codes
+
+
 def correct_manim_code(llm, code, error):
     """Corrects the Manim code based on an error message."""
     template = read_prompt_template("correct_code.txt")
     prompt = template.format(code=code, error=error)
 
-    log("--- PROMPT FOR CODE CORRECTION ---")
-    log(prompt)
-    response = llm.invoke([HumanMessage(content=prompt)])
-    new_code = response.content.strip()
-    log("--- AI RESPONSE (RAW CORRECTED CODE) ---")
-    log(new_code)
+    debug("--- PROMPT FOR CODE CORRECTION ---\n" + prompt)
+    new_code = invoke_llm(llm, prompt, "correct_code")
+    debug("--- AI RESPONSE (RAW CORRECTED CODE) ---\n" + new_code)
     return sanitize_code(new_code)
 
 
-def render_manim_code(code, output_dir, file_name):
+def render_manim_code(
+    code, output_dir, file_name, quality="low_quality", cancel_event=None
+):
     """
     Renders a single Manim scene and returns the full path to the complete video file,
     ignoring the partial movie files.
@@ -128,69 +407,250 @@ def render_manim_code(code, output_dir, file_name):
         if line.strip().startswith("class ") and "Scene" in line:
             class_name = line.split("class ")[1].split("(")[0].strip()
             break
-    log("--- DEBUG: Detected scene class name: " + class_name + " ---")
+    debug("--- Detected scene class name: " + class_name + " ---")
 
-    with tempfile.NamedTemporaryFile(
-        mode="w", suffix=".py", delete=False, encoding="utf-8"
-    ) as temp_file:
-        temp_file.write(code)
-        temp_file_path = temp_file.name
+    global _render_attempts
+    with tracer.span("manim.render", clip=file_name, quality=quality) as span:
+        with _llm_calls_lock:
+            _render_attempts += 1
 
-    try:
-        cmd = [
-            sys.executable,
-            "-m",
-            "manim",
-            temp_file_path,
-            class_name,
-            "-o",
-            file_name,
-            "--media_dir",
-            output_dir,
-            "-v",
-            "WARNING",
-            "-ql",
-        ]
-        log("--- DEBUG: Executing Manim command: " + " ".join(cmd) + " ---")
-        process = subprocess.run(
-            cmd, capture_output=True, text=True, check=False, encoding="utf-8"
-        )
+        # Reject scenes that would obviously blow the frame budget before rendering
+        budget_error = check_frame_budget(code, quality, RENDER_BUDGET, FINAL_QUALITY)
+        if budget_error:
+            span.record_error(budget_error)
+            return None, budget_error
 
-        if process.returncode != 0:
-            # --- THIS IS THE DEFINITIVE FIX FOR THE SYNTAX ERROR ---
-            # Build the error message safely to prevent parsing errors.
-            error_parts = [
-                "--- MANIM STDOUT ---\\n",
-                process.stdout,
-                "\\n\\n--- MANIM STDERR ---\\n",
-                process.stderr,
-            ]
-            error_message = "".join(error_parts)
-            return None, error_message
+        # A private media directory per render makes the output path deterministic.
+        output_name = os.path.splitext(file_name)[0]
+        render_dir = create_render_dir(output_dir, output_name)
+        scene_path = write_scene_file(render_dir, code)
 
-        for root, dirs, files in os.walk(output_dir):
-            if file_name in files and "partial_movie_files" not in root:
-                found_path = os.path.join(root, file_name)
-                log("--- DEBUG: Found final rendered video at: " + found_path + " ---")
+        try:
+            args = build_manim_command(
+                [],
+                scene_path,
+                class_name,
+                output_name,
+                render_dir,
+                quality,
+            )
+            debug("--- Executing Manim command: manim " + " ".join(args) + " ---")
+            result = (
+                RENDER_CLIENT.render(args, RENDER_BUDGET, cancel_event=cancel_event)
+                if RENDER_CLIENT
+                else None
+            )
+            span.set_attribute("warm", result is not None)
+            if result is None:
+                # No warm worker available: start manim cold
+                result = run_supervised(
+                    [sys.executable, "-m", "manim"] + args,
+                    RENDER_BUDGET,
+                    cancel_event=cancel_event,
+                )
+            returncode, stdout, stderr, budget_error = result
+            span.set_attribute("returncode", returncode)
+
+            if budget_error:
+                log("--- WARNING: " + budget_error + " ---")
+                span.record_error(budget_error)
+                return None, budget_error
+
+            if returncode != 0:
+                # --- THIS IS THE DEFINITIVE FIX FOR THE SYNTAX ERROR ---
+                # Build the error message safely to prevent parsing errors.
+                error_parts = [
+                    "--- MANIM STDOUT ---\\n",
+                    stdout,
+                    "\\n\\n--- MANIM STDERR ---\\n",
+                    stderr,
+                ]
+                error_message = "".join(error_parts)
+                span.record_error("manim exited with " + str(returncode))
+                return None, error_message
+
+            if TEX_CACHE:
+                cache_stats = TEX_CACHE.publish(render_dir)
+                debug("--- TeX cache: " + json.dumps(cache_stats) + " ---")
+
+            rendered_path = locate_output(render_dir, quality, output_name)
+            if rendered_path:
+                found_path = os.path.join(os.path.abspath(output_dir), file_name)
+                os.replace(rendered_path, found_path)
+                debug("--- Found final rendered video at: " + found_path + " ---")
                 return found_path, None
 
-        return (
-            None,
-            "--- AGENT ERROR: Could not find the rendered video file after a successful render. ---",
+            span.record_error("no output file")
+            return (
+                None,
+                "--- AGENT ERROR: Could not find the rendered video file after a successful render. ---",
+            )
+
+        finally:
+            remove_render_dir(render_dir)
+
+
+def generate_clip(
+    llm, clip_number, scene_description, output_dir, quality, initial_code=None
+):
+    """
+    Serial repair loop: generate, render, and correct up to 3 times.
+    initial_code (e.g. from a batched generation) replaces the first
+    generation call. Returns (video_path, code, error).
+    """
+    output_filename = "clip_" + str(clip_number - 1) + ".mp4"
+    code = None
+    error = "Initial code generation failed."
+
+    for attempt in range(1, 4):
+        log("--- Clip " + str(clip_number) + ", Attempt " + str(attempt) + " ---")
+        if code is None and initial_code is not None:
+            code = initial_code
+        elif code is None:
+            code = generate_manim_code(llm, scene_description)
+        else:
+            code = correct_manim_code(llm, code, error)
+
+        video_path, error = render_manim_code(code, output_dir, output_filename, quality)
+
+        if error is None:
+            return video_path, code, None
+
+        log(
+            "--- Clip "
+            + str(clip_number)
+            + ", Attempt "
+            + str(attempt)
+            + " failed. ---"
         )
 
-    finally:
-        os.unlink(temp_file_path)
+    return None, code, error
+
+
+def generate_clip_speculatively(
+    llms, clip_number, scene_description, output_dir, quality, initial_code=None
+):
+    """
+    Speculative repair loop: each round asks the LLM for several candidate
+    programs at once (initial generations, then one correction per failed
+    candidate), renders them in parallel and keeps the first to succeed,
+    cancelling the rest. initial_code, if given, is rendered as the first
+    candidate of round one. Returns (video_path, code, error).
+    """
+    output_filename = "clip_" + str(clip_number - 1) + ".mp4"
+    # Each entry is the (code, error) a candidate should correct, a bare code
+    # string to render as-is, or None to generate a fresh program
+    seeds = [None] * len(llms)
+    if initial_code is not None:
+        seeds[0] = initial_code
+    last_code, last_error = None, "Initial code generation failed."
+
+    for attempt in range(1, 4):
+        remaining = remaining_llm_calls()
+        if remaining is not None:
+            seeds = seeds[:remaining]
+        if not seeds:
+            log("--- Clip " + str(clip_number) + ": LLM call budget exhausted. ---")
+            break
+
+        log(
+            "--- Clip "
+            + str(clip_number)
+            + ", Attempt "
+            + str(attempt)
+            + ": trying "
+            + str(len(seeds))
+            + " candidates in parallel ---"
+        )
+        cancel_event = threading.Event()
+
+        def run_candidate(index, seed):
+            llm = llms[index]
+            if seed is None:
+                code = generate_manim_code(llm, scene_description)
+            elif isinstance(seed, str):
+                code = seed
+            else:
+                code = correct_manim_code(llm, seed[0], seed[1])
+            if cancel_event.is_set():
+                return code, None, "Cancelled before rendering."
+            candidate_file = "clip_" + str(clip_number - 1) + "_c" + str(index) + ".mp4"
+            video_path, error = render_manim_code(
+                code, output_dir, candidate_file, quality, cancel_event
+            )
+            return code, video_path, error
+
+        failures = []
+        # Seeds of candidates that raised, retried unchanged next round
+        retries = []
+        winner = None
+        pool = ThreadPoolExecutor(max_workers=len(seeds))
+        # Each candidate thread gets a copy of the context so its spans
+        # stay under this clip
+        futures = {
+            pool.submit(contextvars.copy_context().run, run_candidate, index, seed): seed
+            for index, seed in enumerate(seeds)
+        }
+        for future in as_completed(futures):
+            try:
+                code, video_path, error = future.result()
+            except LLMBudgetExceeded as e:
+                log("--- WARNING: " + str(e) + " ---")
+                continue
+            except Exception as e:
+                log("--- WARNING: Candidate failed: " + str(e) + " ---")
+                last_error = str(e)
+                retries.append(futures[future])
+                continue
+            if error is None:
+                winner = (code, video_path)
+                break
+            failures.append((code, error))
+
+        # Losing candidates see the event: in-flight renders are killed and
+        # pending LLM responses are discarded without rendering. Their LLM
+        # calls cannot be interrupted, so wait for them to land before the
+        # next clip spends from the same budget.
+        cancel_event.set()
+        pool.shutdown(wait=True, cancel_futures=True)
+
+        final_path = None
+        if winner:
+            code, video_path = winner
+            final_path = os.path.join(os.path.dirname(video_path), output_filename)
+            os.replace(video_path, final_path)
+
+        # Candidates that finished after the winner leave their output behind
+        for index in range(len(seeds)):
+            candidate_path = os.path.join(
+                os.path.abspath(output_dir),
+                "clip_" + str(clip_number - 1) + "_c" + str(index) + ".mp4",
+            )
+            if os.path.exists(candidate_path):
+                os.remove(candidate_path)
+
+        if winner:
+            return final_path, code, None
+
+        log(
+            "--- Clip "
+            + str(clip_number)
+            + ", Attempt "
+            + str(attempt)
+            + ": all candidates failed. ---"
+        )
+        if failures:
+            last_code, last_error = failures[0]
+        seeds = failures + retries
+
+    return None, last_code, last_error
 
 
 def main():
     try:
-        if len(sys.argv) != 5:
-            log("--- FATAL ERROR: Agent requires 4 arguments. ---")
-            print(
-                "FINAL_RESULT: "
-                + json.dumps({"success": False, "error": "Invalid arguments"})
-            )
+        if len(sys.argv) not in (5, 6):
+            emit(EVENT_ERROR, message="--- FATAL ERROR: Agent requires 4 or 5 arguments. ---")
+            emit(EVENT_RESULT, success=False, error="Invalid arguments")
             return
 
         concept_name, concept_description, output_dir, api_key = (
@@ -199,12 +659,38 @@ def main():
             sys.argv[3],
             sys.argv[4],
         )
+        quality = sys.argv[5] if len(sys.argv) == 6 else "low_quality"
+
+        if RENDER_CLIENT:
+            RENDER_CLIENT.start()
 
         llm = initialize_llm(api_key)
+        candidate_llms = None
+        if SPECULATIVE_CANDIDATES > 1:
+            log(
+                "--- Speculative mode: "
+                + str(SPECULATIVE_CANDIDATES)
+                + " candidates per scene ---"
+            )
+            candidate_llms = [
+                initialize_llm(
+                    api_key,
+                    CANDIDATE_TEMPERATURES[k % len(CANDIDATE_TEMPERATURES)],
+                    candidate=k,
+                )
+                for k in range(SPECULATIVE_CANDIDATES)
+            ]
 
         scenes = get_video_scenes(llm, concept_name, concept_description)
         successful_clips = 0
 
+        initial_codes = [None] * len(scenes)
+        if BATCH_GENERATION and len(scenes) > 1:
+            try:
+                initial_codes = generate_all_manim_code(llm, scenes)
+            except Exception as e:
+                log("--- WARNING: Batched generation failed: " + str(e) + " ---")
+
         for i, scene_description in enumerate(scenes):
             log(
                 "--- Generating Clip "
@@ -215,35 +701,58 @@ def main():
                 + scene_description
                 + " ---"
             )
-            output_filename = "clip_" + str(i) + ".mp4"
-
-            code = None
-            error = "Initial code generation failed."
-
-            for attempt in range(1, 4):
-                log("--- Clip " + str(i + 1) + ", Attempt " + str(attempt) + " ---")
-                if code is None:
-                    code = generate_manim_code(llm, scene_description)
-                else:
-                    code = correct_manim_code(llm, code, error)
 
-                video_path, error = render_manim_code(code, output_dir, output_filename)
-
-                if error is None:
-                    log("--- Clip " + str(i + 1) + " rendered successfully. ---")
-                    print("CLIP_SUCCESS: " + video_path, flush=True)
-                    successful_clips += 1
+            clip_started = time.monotonic()
+            llm_calls_before = llm_calls_made()
+            render_attempts_before = _render_attempts
+            tex_before = (TEX_CACHE.hits, TEX_CACHE.misses) if TEX_CACHE else (0, 0)
+            with tracer.span("agent.clip", clip=i) as clip_span:
+                try:
+                    if candidate_llms:
+                        video_path, code, error = generate_clip_speculatively(
+                            candidate_llms,
+                            i + 1,
+                            scene_description,
+                            output_dir,
+                            quality,
+                            initial_codes[i],
+                        )
+                    else:
+                        video_path, code, error = generate_clip(
+                            llm,
+                            i + 1,
+                            scene_description,
+                            output_dir,
+                            quality,
+                            initial_codes[i],
+                        )
+                    if error is not None:
+                        clip_span.record_error("clip failed after all attempts")
+                except LLMBudgetExceeded as e:
+                    log("--- WARNING: " + str(e) + ". Stopping clip generation. ---")
                     break
 
-                log(
-                    "--- Clip "
-                    + str(i + 1)
-                    + ", Attempt "
-                    + str(attempt)
-                    + " failed. ---"
-                )
+            emit(
+                EVENT_METRICS,
+                clip=i,
+                success=error is None,
+                seconds=round(time.monotonic() - clip_started, 3),
+                llm_calls=llm_calls_made() - llm_calls_before,
+                render_attempts=_render_attempts - render_attempts_before,
+                tex_cache_hits=(TEX_CACHE.hits if TEX_CACHE else 0) - tex_before[0],
+                tex_cache_misses=(TEX_CACHE.misses if TEX_CACHE else 0) - tex_before[1],
+            )
 
-            if error is not None:
+            if error is None:
+                log("--- Clip " + str(i + 1) + " rendered successfully. ---")
+                # Keep the validated source so the backend can re-render
+                # this clip at a higher quality later.
+                source_path = os.path.join(output_dir, "clip_" + str(i) + ".py")
+                with open(source_path, "w", encoding="utf-8") as f:
+                    f.write(code)
+                emit(EVENT_CLIP_READY, index=i, path=video_path)
+                successful_clips += 1
+            else:
                 log(
                     "--- FAILED to generate clip "
                     + str(i + 1)
@@ -252,21 +761,20 @@ def main():
 
         if successful_clips == 0:
             log("--- All clips failed to generate. Aborting video generation. ---")
-            print(
-                "FINAL_RESULT: "
-                + json.dumps({"success": False, "error": "All clips failed to render."})
-            )
+            emit(EVENT_RESULT, success=False, error="All clips failed to render.")
         else:
             log("--- Agent finished generating clips. ---")
-            print("FINAL_RESULT: " + json.dumps({"success": True}))
+            emit(EVENT_RESULT, success=True)
 
     except Exception as e:
-        log("--- FATAL CRASH in agent's main loop: " + str(e) + " ---")
-        print(
-            "FINAL_RESULT: "
-            + json.dumps({"success": False, "error": "Agent crashed unexpectedly"})
-        )
+        emit(EVENT_ERROR, message="--- FATAL CRASH in agent's main loop: " + str(e) + " ---")
+        emit(EVENT_RESULT, success=False, error="Agent crashed unexpectedly")
+
+    finally:
+        if RENDER_CLIENT:
+            RENDER_CLIENT.close()
 
 
 if __name__ == "__main__":
-    main()
+    with tracer.span("agent.job", parent=TRACE_PARENT):
+        main()
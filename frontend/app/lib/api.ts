@@ -157,3 +157,43 @@ export function connectToLogs(paperId: string): WebSocket {
   const ws = new WebSocket(`${WS_URL}/ws/papers/${paperId}/logs`);
   return ws;
 }
+
+// Server-sent paper events: a snapshot first, then state transitions
+// (parsed, metadata_ready, concepts_ready, clip_ready, video_ready, failed)
+// and log lines. Replaces polling the status endpoints.
+export interface PaperEvent {
+  type: string;
+  paper_id?: string;
+  revision?: number;
+  [key: string]: unknown;
+}
+
+// Concept video state as reported by paper events, in this client's terms
+export type ConceptVideoStatus = NonNullable<Concept['video_status']>;
+
+const VIDEO_STATUSES: Record<string, ConceptVideoStatus> = {
+  not_started: 'not_generated',
+  generating: 'generating',
+  completed: 'ready',
+  failed: 'error',
+};
+
+export function toVideoStatus(status: unknown): ConceptVideoStatus {
+  return VIDEO_STATUSES[String(status)] || 'not_generated';
+}
+
+// Video paths in events are API-relative (/api/media/...)
+export function mediaUrl(path: unknown): string | undefined {
+  return typeof path === 'string' && path ? `${API_URL}${path}` : undefined;
+}
+
+export function subscribeToPaperEvents(
+  paperId: string,
+  onEvent: (event: PaperEvent) => void
+): () => void {
+  const source = new EventSource(`${API_URL}/api/papers/${paperId}/events`);
+  source.onmessage = (message) => {
+    onEvent(JSON.parse(message.data));
+  };
+  return () => source.close();
+}
@@ -1,6 +1,6 @@
 'use client';
 
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { useParams, useRouter } from 'next/navigation';
 import { motion } from 'framer-motion';
 import { ArrowLeft, Download, Play, Code2, FileText, Terminal } from 'lucide-react';
@@ -9,10 +9,12 @@ import { StatusBadge } from '../../../../components/status-badge';
 import * as Tabs from '@radix-ui/react-tabs';
 import {
   getConcepts,
-  getVideoStatus,
   getCodeImplementation,
-  connectToLogs,
+  subscribeToPaperEvents,
+  toVideoStatus,
+  mediaUrl,
   type Concept,
+  type PaperEvent,
 } from '../../../../lib/api';
 
 export default function ConceptDetailPage() {
@@ -32,25 +34,50 @@ export default function ConceptDetailPage() {
     loadConcept();
   }, [paperId, conceptId]);
 
+  // Video state from paper events; applied again once the concept loads
+  const videoState = useRef<Partial<Concept> | null>(null);
+  // Newest revision seen; older state events are stale
+  const revision = useRef(-1);
+
   useEffect(() => {
-    if (concept?.video_status === 'generating') {
-      // Connect to WebSocket for live logs
-      const ws = connectToLogs(paperId);
-
-      ws.onmessage = (event) => {
-        const message = event.data;
-        setLogs((prev) => [...prev, message]);
-      };
-
-      ws.onerror = () => {
-        setError('Lost connection to logs');
-      };
-
-      return () => {
-        ws.close();
-      };
+    if (!paperId) return;
+    return subscribeToPaperEvents(paperId, handlePaperEvent);
+  }, [paperId, conceptId]);
+
+  const setVideoState = (update: Partial<Concept>) => {
+    videoState.current = update;
+    setConcept((prev) => prev && { ...prev, ...update });
+  };
+
+  const handlePaperEvent = (event: PaperEvent) => {
+    if (event.type === 'log') {
+      setLogs((prev) => [...prev, String(event.message)]);
+      return;
+    }
+    if (event.revision !== undefined) {
+      if (event.revision < revision.current) return;
+      revision.current = event.revision;
+    }
+
+    if (event.type === 'snapshot') {
+      const videos = (event.videos || {}) as Record<string, Record<string, unknown>>;
+      const video = videos[conceptId];
+      if (video) {
+        setVideoState({
+          video_status: toVideoStatus(video.status),
+          video_url: mediaUrl(video.video_path),
+        });
+      }
+      return;
     }
-  }, [concept?.video_status, paperId]);
+    if (event.concept_id !== conceptId) return;
+
+    if (event.type === 'video_ready') {
+      setVideoState({ video_status: 'ready', video_url: mediaUrl(event.video_path) });
+    } else if (event.type === 'failed') {
+      setVideoState({ video_status: 'error' });
+    }
+  };
 
   const loadConcept = async () => {
     try {
@@ -62,41 +89,12 @@ export default function ConceptDetailPage() {
         return;
       }
 
-      setConcept(foundConcept);
-
-      // Poll for video status if generating
-      if (foundConcept.video_status === 'generating') {
-        pollVideoStatus();
-      }
+      setConcept({ ...foundConcept, ...videoState.current });
     } catch (err) {
       setError('Failed to load concept');
     }
   };
 
-  const pollVideoStatus = async () => {
-    const interval = setInterval(async () => {
-      try {
-        const status = await getVideoStatus(paperId, conceptId);
-
-        if (status.status === 'completed') {
-          clearInterval(interval);
-          setConcept((prev) => prev && {
-            ...prev,
-            video_status: 'ready',
-            video_url: status.video_url,
-          });
-        } else if (status.status === 'error') {
-          clearInterval(interval);
-          setConcept((prev) => prev && { ...prev, video_status: 'error' });
-        }
-      } catch (err) {
-        console.error('Failed to poll video status:', err);
-      }
-    }, 3000);
-
-    return () => clearInterval(interval);
-  };
-
   const handleLoadCode = async () => {
     if (!concept) return;
 
@@ -1,6 +1,6 @@
 'use client';
 
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { useParams, useRouter } from 'next/navigation';
 import { motion } from 'framer-motion';
 import { ArrowLeft, Plus, Send } from 'lucide-react';
@@ -14,8 +14,12 @@ import {
   generateAdditionalConcept,
   generateVideo,
   askQuestion,
+  subscribeToPaperEvents,
+  toVideoStatus,
+  mediaUrl,
   type Paper,
   type Concept,
+  type PaperEvent,
 } from '../../lib/api';
 
 export default function PaperDetailPage() {
@@ -44,6 +48,79 @@ export default function PaperDetailPage() {
     }
   }, [paper?.status]);
 
+  // Newest revision seen; older state events are stale
+  const revision = useRef(-1);
+
+  useEffect(() => {
+    if (!paperId) return;
+    return subscribeToPaperEvents(paperId, handlePaperEvent);
+  }, [paperId]);
+
+  // Video state per concept from events; applied again whenever concepts load
+  const videoStates = useRef<Record<string, Partial<Concept>>>({});
+
+  const withVideoStates = (list: Concept[]) =>
+    list.map((c) => (videoStates.current[c.id] ? { ...c, ...videoStates.current[c.id] } : c));
+
+  const setVideoState = (conceptId: string, update: Partial<Concept>) => {
+    videoStates.current[conceptId] = update;
+    setConcepts(withVideoStates);
+  };
+
+  const handlePaperEvent = (event: PaperEvent) => {
+    if (event.type === 'log') return;
+    if (event.revision !== undefined) {
+      if (event.revision < revision.current) return;
+      revision.current = event.revision;
+    }
+
+    const conceptId = event.concept_id as string | undefined;
+    switch (event.type) {
+      case 'snapshot': {
+        const videos = (event.videos || {}) as Record<string, Record<string, unknown>>;
+        for (const [id, video] of Object.entries(videos)) {
+          videoStates.current[id] = {
+            video_status: toVideoStatus(video.status),
+            video_url: mediaUrl(video.video_path),
+          };
+        }
+        setConcepts(withVideoStates);
+        break;
+      }
+      case 'metadata_ready':
+        setPaper((prev) =>
+          prev && {
+            ...prev,
+            title: (event.title as string) || prev.title,
+            authors: (event.authors as string[]) || prev.authors,
+          }
+        );
+        break;
+      case 'concepts_ready':
+        setIsAnalyzing(false);
+        setPaper((prev) => prev && { ...prev, status: 'analyzed' });
+        loadConcepts();
+        break;
+      case 'video_ready':
+        if (conceptId) {
+          setVideoState(conceptId, {
+            video_status: 'ready',
+            video_url: mediaUrl(event.video_path),
+          });
+        }
+        break;
+      case 'failed':
+        if (event.stage === 'video' && conceptId) {
+          setVideoState(conceptId, { video_status: 'error' });
+        } else {
+          setIsAnalyzing(false);
+          setPaper((prev) => prev && { ...prev, status: 'error' });
+          setError('Analysis failed');
+        }
+        break;
+    }
+  };
+
   const loadPaper = async () => {
     if (!paperId) return;
     try {
@@ -58,7 +135,7 @@ export default function PaperDetailPage() {
     if (!paperId) return;
     try {
       const conceptsData = await getConcepts(paperId);
-      setConcepts(conceptsData);
+      setConcepts(withVideoStates(conceptsData));
     } catch (err) {
       console.error('Failed to load concepts:', err);
     }
@@ -70,24 +147,9 @@ export default function PaperDetailPage() {
     setError(null);
 
     try {
-      await analyzePaper(paperId);
       setPaper((prev) => prev && { ...prev, status: 'analyzing' });
-
-      // Poll for analysis completion
-      const pollInterval = setInterval(async () => {
-        const updatedPaper = await getPaper(paperId);
-        setPaper(updatedPaper);
-
-        if (updatedPaper.status === 'analyzed') {
-          clearInterval(pollInterval);
-          setIsAnalyzing(false);
-          loadConcepts();
-        } else if (updatedPaper.status === 'error') {
-          clearInterval(pollInterval);
-          setIsAnalyzing(false);
-          setError('Analysis failed');
-        }
-      }, 3000);
+      // Completion and failure arrive as paper events
+      await analyzePaper(paperId);
     } catch (err) {
       setIsAnalyzing(false);
       setError('Failed to start analysis');
@@ -112,12 +174,8 @@ export default function PaperDetailPage() {
     if (!paperId) return;
     try {
       await generateVideo(paperId, conceptId);
-      // Update concept status
-      setConcepts((prev) =>
-        prev.map((c) =>
-          c.id === conceptId ? { ...c, video_status: 'generating' } : c
-        )
-      );
+      // Completion and failure arrive as paper events
+      setVideoState(conceptId, { video_status: 'generating' });
     } catch (err) {
       setError('Failed to start video generation');
     }